@@ -0,0 +1,106 @@
+import time
+
+from config import DEFAULT_EXCHANGE, ACCOUNT_REGISTRY_TTL, BALANCE_TTL
+from async_three_commas_client import call_client
+from dca_ladder import available_balances
+from metadata_cache import metadata_cache
+
+# Account fields kept in memory and on disk
+ACCOUNT_FIELDS = ('id', 'name', 'market_code', 'type', 'exchange_name')
+
+
+class AccountRegistry:
+    def __init__(self, accounts, fetched_at=None, version=None):
+        """
+        Connected exchange accounts indexed by id, market code and name
+
+        Args:
+            accounts: Accounts as returned by get_accounts
+            fetched_at: Unix time the accounts were downloaded
+            version: Version stamp of the cached accounts the registry was built from
+        """
+        self.accounts = [{field: account.get(field) for field in ACCOUNT_FIELDS if field in account}
+                         for account in accounts]
+        self.fetched_at = fetched_at or time.time()
+        self.version = version
+        self.by_id = {account['id']: account for account in self.accounts}
+        self.by_name = {}
+        self.by_market_code = {}
+        for account in self.accounts:
+            self.by_name.setdefault(str(account.get('name', '')).lower(), account)
+            self.by_market_code.setdefault(str(account.get('market_code', '')).lower(), []).append(account)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def __iter__(self):
+        return iter(self.accounts)
+
+    @property
+    def age(self):
+        """Seconds since the accounts were downloaded"""
+        return time.time() - self.fetched_at
+
+    def get(self, account_id):
+        """Account with the given ID, or None"""
+        account = self.by_id.get(account_id)
+        if account is None and str(account_id).isdigit():
+            account = self.by_id.get(int(account_id))
+        return account
+
+    def for_exchange(self, market_code):
+        """First account on an exchange, or None"""
+        accounts = self.by_market_code.get(str(market_code).lower())
+        return accounts[0] if accounts else None
+
+    def find(self, value):
+        """Account matching an ID, a name or a market code, in that order, or None"""
+        return (self.get(value) or self.by_name.get(str(value).lower())
+                or self.for_exchange(value))
+
+    def default(self, exchange=DEFAULT_EXCHANGE):
+        """Account for the exchange, falling back to the first account (None when there are no accounts)"""
+        return self.for_exchange(exchange) or (self.accounts[0] if self.accounts else None)
+
+
+_registry = None
+_balances = {}  # account ID -> (fetched_at, {currency: free amount})
+
+
+async def load_accounts(client, ttl=ACCOUNT_REGISTRY_TTL, refresh=False):
+    """
+    Account registry from the metadata cache or the API
+
+    Concurrent callers share a single request, see MetadataCache.load.
+
+    Args:
+        client: ThreeCommasClient or AsyncThreeCommasClient instance
+        ttl: Seconds cached accounts are trusted
+        refresh: Ignore cached accounts and download them again
+    """
+    global _registry
+
+    async def fetch():
+        accounts = await call_client(client.get_accounts) or []
+        return [{field: account.get(field) for field in ACCOUNT_FIELDS if field in account} for account in accounts]
+
+    entry = await metadata_cache.load('accounts', '', fetch, ttl, refresh)
+    if _registry is None or _registry.version != entry.version:
+        _registry = AccountRegistry(entry.value, entry.fetched_at, entry.version)
+    return _registry
+
+
+async def load_balances(client, account_id, max_age=BALANCE_TTL, refresh=False):
+    """
+    Snapshot of an account's free balances ({currency: amount})
+
+    Snapshots are kept in memory only and refreshed once older than max_age
+    or when refresh is set.
+    """
+    cached = _balances.get(account_id)
+    if not refresh and cached is not None and time.time() - cached[0] <= max_age:
+        return cached[1]
+    rows = await call_client(client.get_account_balances, account_id)
+    balances = available_balances(rows)
+    _balances[account_id] = (time.time(), balances)
+    return balances
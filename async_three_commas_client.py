@@ -0,0 +1,586 @@
+import asyncio
+import hashlib
+import hmac
+import inspect
+import json
+import time
+from functools import partial
+from urllib.parse import urlencode, quote_plus
+
+import aiohttp
+
+from config import (API_BASE_URL, API_KEY, API_SECRET, ASYNC_POOL_SIZE, ASYNC_KEEPALIVE_TIMEOUT,
+                    PRICE_RESOLUTION_MODE, PRICE_HEDGE_DELAY, PRICE_RESOLUTION_DEADLINE, BINANCE_API_URL,
+                    RETRY_MAX_ATTEMPTS)
+from three_commas_client import fallback_rate
+from price_cache import PriceCache
+from price_graph import PriceGraph
+from dca_ladder import validate_ladder
+from pair_catalog import split_pair, alternate_format
+from pagination import apaginate, updated_since
+from rate_limiter import rate_limiter, backoff_delay, RETRY_STATUS_CODES
+from metrics import metrics
+from circuit_breaker import circuit_breakers
+from singleflight import coalesced
+
+API_PREFIX = '/public/api/ver1/'
+
+# (entity, action) -> (HTTP method, path relative to API_PREFIX), mirroring the calls made by ThreeCommasClient
+ENDPOINTS = {
+    ('accounts', ''): ('GET', 'accounts'),
+    ('accounts', 'market_pairs'): ('GET', 'accounts/market_pairs'),
+    ('accounts', 'currency_rates'): ('GET', 'accounts/currency_rates'),
+    ('accounts', 'market_info'): ('GET', 'accounts/market_info'),
+    ('accounts', 'account_table_data'): ('POST', 'accounts/{id}/account_table_data'),
+    ('bots', ''): ('GET', 'bots'),
+    ('bots', 'create_bot'): ('POST', 'bots/create_bot'),
+    ('bots', 'enable'): ('POST', 'bots/{id}/enable'),
+    ('bots', 'disable'): ('POST', 'bots/{id}/disable'),
+    ('deals', ''): ('GET', 'deals'),
+    ('grid_bots', ''): ('GET', 'grid_bots'),
+    ('grid_bots', 'enable'): ('POST', 'grid_bots/{id}/enable'),
+    ('grid_bots', 'disable'): ('POST', 'grid_bots/{id}/disable'),
+    ('grid_bots', 'create'): ('POST', 'grid_bots/manual'),
+    ('grid_bots', 'manual_creation_params'): ('GET', 'grid_bots/manual_creation_params'),
+}
+
+
+async def iter_client(method, *args, **kwargs):
+    """
+    Iterate a client paging method (iter_bots, iter_deals) from async code
+
+    Async generators are iterated directly, blocking generators are advanced
+    in a worker thread so the event loop keeps running.
+    """
+    if inspect.isasyncgenfunction(method):
+        async for item in method(*args, **kwargs):
+            yield item
+        return
+
+    iterator = method(*args, **kwargs)
+    done = object()
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                break
+            yield item
+    finally:
+        iterator.close()
+
+
+async def call_client(method, *args, **kwargs):
+    """
+    Call a client method from async code without blocking the event loop
+
+    Coroutine methods (AsyncThreeCommasClient) are awaited directly, blocking
+    methods (ThreeCommasClient) are run in a worker thread.
+    """
+    if asyncio.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await asyncio.to_thread(method, *args, **kwargs)
+
+
+class AsyncThreeCommasClient:
+    def __init__(self, base_url=None, pool_size=ASYNC_POOL_SIZE, request_timeout=30, nr_of_retries=RETRY_MAX_ATTEMPTS):
+        """
+        Initialize the async 3Commas client
+
+        Args:
+            base_url: 3Commas API base URL (defaults to API_BASE_URL from config)
+            pool_size: Maximum number of pooled keep-alive connections
+            request_timeout: Timeout in seconds for a single request
+            nr_of_retries: Number of retries on 429 / 5xx responses and connection errors
+        """
+        if not API_KEY or not API_SECRET:
+            raise ValueError('Please set 3COMMAS_API_KEY and 3COMMAS_SECRET in your .env file')
+        self.base_url = (base_url or API_BASE_URL).rstrip('/')
+        self.pool_size = pool_size
+        self.request_timeout = request_timeout
+        self.nr_of_retries = nr_of_retries
+        self.session = None
+        self.price_cache = PriceCache()
+        self.price_graph = PriceGraph()
+        self._price_graph_lock = asyncio.Lock()
+        self._background_tasks = set()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Create the pooled HTTP session (must be called from a running event loop)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=ASYNC_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self.session
+
+    async def close(self):
+        """Close the HTTP session and release pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def _sign(self, relative_url, body):
+        """Generate the HMAC-SHA256 signature 3Commas expects for a request"""
+        message = (relative_url + body).encode()
+        return hmac.new(API_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+    async def request(self, entity, action='', action_id=None, payload=None):
+        """
+        Make a signed request to the 3Commas API
+
+        Returns an (error, data) tuple in the same shape as Py3CW.request.
+        """
+        if (entity, action) not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint: {entity}/{action}")
+        method, path = ENDPOINTS[(entity, action)]
+        if '{id}' in path:
+            if not action_id:
+                raise ValueError(f"Missing ID for {entity}/{action}")
+            path = path.replace('{id}', str(action_id))
+
+        relative_url = API_PREFIX + path
+        body = ''
+        if method == 'GET':
+            if payload:
+                relative_url += '?' + urlencode(payload, quote_via=quote_plus)
+        elif payload:
+            body = json.dumps(payload)
+
+        headers = {
+            'APIKEY': API_KEY,
+            'Signature': self._sign(relative_url, body),
+        }
+        if body:
+            headers['Content-Type'] = 'application/json'
+
+        endpoint = f"{entity}/{action}" if action else entity
+        session = await self.open()
+        attempt = 0
+        while True:
+            await rate_limiter.acquire_async('3commas', endpoint)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, self.base_url + relative_url,
+                                           data=body or None, headers=headers) as response:
+                    text = await response.text(errors='replace')
+                    status = response.status
+                    rate_limiter.update('3commas', status, response.headers)
+                metrics.observe('threecommas_request_duration_seconds', time.perf_counter() - start, (endpoint,))
+                metrics.inc('threecommas_requests_total', (endpoint, 'ok' if status < 400 else str(status)))
+                if status in RETRY_STATUS_CODES and rate_limiter.should_retry('3commas', status, attempt, self.nr_of_retries):
+                    metrics.inc('threecommas_retries_total', (endpoint,))
+                    await asyncio.sleep(backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                try:
+                    data = json.loads(text) if text else {}
+                except ValueError as e:
+                    # A malformed body does not heal on retry, report it instead of spending the retry budget
+                    metrics.inc('threecommas_errors_total', (endpoint, str(status)))
+                    return {'error': True, 'msg': f"Invalid JSON in response: {e}", 'status_code': status}, {}
+                if status >= 400 or (isinstance(data, dict) and 'error' in data):
+                    error = data if isinstance(data, dict) else {'error': True, 'msg': text}
+                    error['status_code'] = status
+                    metrics.inc('threecommas_errors_total', (endpoint, str(status)))
+                    return error, {}
+                return {}, data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.observe('threecommas_request_duration_seconds', time.perf_counter() - start, (endpoint,))
+                metrics.inc('threecommas_requests_total', (endpoint, 'error'))
+                if rate_limiter.should_retry('3commas', None, attempt, self.nr_of_retries):
+                    metrics.inc('threecommas_retries_total', (endpoint,))
+                    await asyncio.sleep(backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                metrics.inc('threecommas_errors_total', (endpoint, 'error'))
+                return {'error': True, 'msg': f"Other error occurred: {e}", 'status_code': None}, {}
+
+    @coalesced()
+    async def get_accounts(self):
+        """Get all accounts (exchanges) connected to 3Commas"""
+        error, accounts = await self.request(entity='accounts', action='')
+        if error:
+            raise Exception(f"Error getting accounts: {error}")
+        return accounts
+
+    @coalesced()
+    async def get_market_pairs(self, market_code):
+        """Get all available pairs for a specific market"""
+        error, pairs = await self.request(
+            entity='accounts',
+            action='market_pairs',
+            payload={'market_code': market_code}
+        )
+        if error:
+            raise Exception(f"Error getting market pairs: {error}")
+        return pairs
+
+    @coalesced()
+    async def get_available_pairs(self, market_code):
+        """Get all available pairs for a specific market"""
+        error, pairs = await self.request(
+            entity='accounts',
+            action='market_pairs',
+            payload={'market_code': market_code}
+        )
+        if error:
+            raise Exception(f"Error getting market pairs for {market_code}: {error}")
+        return pairs
+
+    async def get_currency_rate(self, pair, max_age=None):
+        """
+        Get current rate for a currency pair
+
+        Served from the price cache like ThreeCommasClient.get_currency_rate,
+        with stale rates refreshed by a background task.
+        """
+        entry, state = self.price_cache.get(pair)
+        if entry is not None and (max_age is None or entry.age <= max_age):
+            metrics.inc('price_cache_hits_total', (state,))
+            if state == 'stale' and self.price_cache.begin_refresh(pair):
+                task = asyncio.create_task(self._refresh_currency_rate(pair))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return entry.as_rate()
+
+        rate, source = await self._fetch_currency_rate(pair)
+        if source == 'hardcoded':
+            return dict(rate, source=source, age=0.0)
+        return self.price_cache.put(pair, rate, source).as_rate()
+
+    async def _refresh_currency_rate(self, pair):
+        """Background refresh of a stale cached rate"""
+        try:
+            rate, source = await self._fetch_currency_rate(pair)
+        except Exception as e:
+            print(f"Background price refresh failed for {pair}: {str(e)}")
+            self.price_cache.end_refresh(pair)
+            return
+        if source == 'hardcoded':
+            self.price_cache.end_refresh(pair)
+        else:
+            self.price_cache.put(pair, rate, source)
+
+    @coalesced('get_currency_rate')
+    async def _fetch_currency_rate(self, pair):
+        """Fetch the rate for a pair from the network, returns (rate, source)"""
+        if PRICE_RESOLUTION_MODE == 'hedged':
+            result = await self._resolve_hedged(pair)
+        else:
+            result = None
+            for source in self._price_sources(pair):
+                result = await source()
+                if result:
+                    break
+        if result:
+            metrics.inc('price_source_hits_total', (result[1],))
+            return result
+        metrics.inc('price_source_hits_total', ('hardcoded',))
+        return fallback_rate(pair), 'hardcoded'
+
+    def _price_sources(self, pair):
+        """Price source coroutine factories in priority order, each behind its circuit breaker"""
+        alt_pair = alternate_format(pair)
+        sources = [
+            ('currency_rates', partial(self._rate_from_endpoint, 'currency_rates', pair, 'currency_rates')),
+            ('market_info', partial(self._rate_from_endpoint, 'market_info', pair, 'market_info')),
+            ('currency_rates_alt', partial(self._rate_from_endpoint, 'currency_rates', alt_pair, 'currency_rates_alt')),
+            ('binance', partial(self._rate_from_binance, pair)),
+        ]
+        return [partial(self._try_source, name, pair, fetch) for name, fetch in sources]
+
+    async def _try_source(self, name, pair, fetch):
+        """Run a price source through its circuit breaker, skipped sources return None at once"""
+        breaker = circuit_breakers.get(name, pair)
+        if not breaker.allow():
+            print(f"⏭️ Skipping {name} for {pair} (circuit {breaker.state.replace('_', '-')})")
+            return None
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            # Lost a hedged race, there is no outcome to record
+            breaker.cancel()
+            raise
+        except Exception as e:
+            print(f"Price source {name} failed for {pair}: {str(e)}")
+            result = None
+        breaker.record(bool(result))
+        return result
+
+    async def _resolve_hedged(self, pair):
+        """
+        Race the price sources against a hard deadline
+
+        Same semantics as ThreeCommasClient._resolve_hedged: the fallbacks start
+        after PRICE_HEDGE_DELAY, the first valid rate wins and the rest are cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + PRICE_RESOLUTION_DEADLINE
+        sources = self._price_sources(pair)
+        primary = asyncio.ensure_future(sources[0]())
+        tasks = {primary: 0}
+
+        await asyncio.wait([primary], timeout=PRICE_HEDGE_DELAY)
+        if primary.done() and primary.result():
+            return primary.result()
+
+        for priority, source in enumerate(sources[1:], start=1):
+            tasks[asyncio.ensure_future(source())] = priority
+
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    print(f"⏱️ Price resolution deadline of {PRICE_RESOLUTION_DEADLINE}s reached for {pair}")
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                valid = sorted((tasks[t], t.result()) for t in done if t.result())
+                if valid:
+                    return valid[0][1]
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _rate_from_endpoint(self, action, request_pair, source):
+        """Rate from a 3Commas accounts endpoint"""
+        error, rate = await self.request(entity='accounts', action=action, payload={'pair': request_pair})
+        if not error and rate and 'last' in rate:
+            print(f"✅ Got rate from {action} ({request_pair}): {rate['last']}")
+            return rate, source
+        print(f"Could not get rate from {action} ({request_pair}): {error}")
+        return None
+
+    async def _rate_from_binance(self, pair):
+        """Rate from the bulk Binance ticker snapshot, directly or through a hub currency"""
+        if self.price_graph.is_stale():
+            await self._refresh_price_graph()
+        route = self.price_graph.get_rate(*split_pair(pair), refresh=False)
+        if not route:
+            return None
+        price, path = route
+        print(f"✅ Got price from Binance for {pair} via {' -> '.join(path)}: {price}")
+        return {'last': price}, 'binance' if len(path) == 1 else 'binance_derived'
+
+    async def _refresh_price_graph(self):
+        """Download the bulk ticker set once, however many lookups are waiting on it"""
+        async with self._price_graph_lock:
+            if not self.price_graph.is_stale():
+                return
+            session = await self.open()
+            await rate_limiter.acquire_async('binance', 'ticker/bookTicker')
+            try:
+                async with session.get(f"{BINANCE_API_URL}/api/v3/ticker/bookTicker") as response:
+                    rate_limiter.update('binance', response.status, response.headers)
+                    if response.status == 200:
+                        self.price_graph.load(await response.json())
+                    else:
+                        print(f"Binance ticker snapshot failed with status {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error downloading Binance ticker snapshot: {str(e)}")
+
+    async def create_grid_bot(self, account_id, config):
+        """Create a Grid Bot with the specified configuration"""
+        required_params = ['name', 'pair', 'upper_price', 'lower_price', 'quantity_per_grid', 'grids_count']
+        for param in required_params:
+            if param not in config or config[param] is None:
+                raise Exception(f"Missing required parameter for grid bot: {param}")
+
+        payload = {
+            'account_id': account_id,
+            'name': config['name'],
+            'pair': config['pair'],
+            'upper_price': config['upper_price'],
+            'lower_price': config['lower_price'],
+            'quantity_per_grid': config['quantity_per_grid'],
+            'grids_count': config['grids_count'],
+            'leverage_type': config.get('leverage_type', 'spot'),
+            'leverage_custom_value': config.get('leverage_custom_value', 1),
+        }
+
+        print(f"📡 Sending request to create grid bot with params: {payload}")
+        error, bot = await self.request(entity='grid_bots', action='create', payload=payload)
+        if error:
+            print(f"❌ API Error: {error}")
+            message = error.get('msg') or error.get('error') or error
+            raise Exception(f"Failed to create grid bot: Error creating grid bot: {message}")
+
+        print(f"✅ Grid bot created successfully: {bot.get('id', 'Unknown ID')}")
+        return bot
+
+    @coalesced()
+    async def get_grid_creation_params(self, account_id, pair):
+        """Get the exchange limits (prices, steps, grid count) for a manual grid bot on a pair"""
+        payload = {'account_id': account_id, 'pair': pair}
+        error, params = await self.request(entity='grid_bots', action='manual_creation_params', payload=payload)
+        if error:
+            raise Exception(f"Error getting grid bot parameters: {error}")
+        return params
+
+    async def create_dca_bot(self, account_id, config):
+        """Create a DCA Bot with the specified configuration"""
+        required_params = ['name', 'pair', 'base_order_volume', 'safety_order_volume',
+                          'max_safety_orders', 'take_profit', 'safety_order_step_percentage']
+        for param in required_params:
+            if param not in config or config[param] is None:
+                raise Exception(f"Missing required parameter for DCA bot: {param}")
+
+        problems = validate_ladder(config)
+        if problems:
+            raise Exception(f"Invalid DCA bot configuration: {'; '.join(problems)}")
+
+        payload = {
+            'account_id': account_id,
+            'name': config['name'],
+            'pair': config['pair'],
+            'base_order_volume': config['base_order_volume'],
+            'safety_order_volume': config['safety_order_volume'],
+            'max_safety_orders': config['max_safety_orders'],
+            'max_active_safety_orders': config.get('max_active_safety_orders', 3),
+            'martingale_volume_coefficient': config.get('martingale_volume_coefficient', 1.5),
+            'martingale_step_coefficient': config.get('martingale_step_coefficient', 1.0),
+            'take_profit': config['take_profit'],
+            'safety_order_step_percentage': config['safety_order_step_percentage'],
+            'strategy': config.get('strategy', 'long'),
+            'active': True
+        }
+
+        print(f"📡 Sending request to create DCA bot with params: {payload}")
+        error, bot = await self.request(entity='bots', action='create_bot', payload=payload)
+        if error:
+            print(f"❌ API Error: {error}")
+            message = error.get('msg') or error.get('error') or error
+            raise Exception(f"Failed to create DCA bot: Error creating DCA bot: {message}")
+
+        print(f"✅ DCA bot created successfully: {bot.get('id', 'Unknown ID')}")
+        return bot
+
+    async def start_bot(self, bot_id):
+        """Start a bot by ID"""
+        error, response = await self.request(entity='bots', action='enable', action_id=str(bot_id))
+        if error:
+            raise Exception(f"Error starting bot: {error}")
+        return response
+
+    async def stop_bot(self, bot_id):
+        """Stop a bot by ID"""
+        error, response = await self.request(entity='bots', action='disable', action_id=str(bot_id))
+        if error:
+            raise Exception(f"Error stopping bot: {error}")
+        return response
+
+    async def start_grid_bot(self, bot_id):
+        """Start a grid bot by ID"""
+        error, response = await self.request(entity='grid_bots', action='enable', action_id=str(bot_id))
+        if error:
+            raise Exception(f"Error starting grid bot: {error}")
+        return response
+
+    async def stop_grid_bot(self, bot_id):
+        """Stop a grid bot by ID"""
+        error, response = await self.request(entity='grid_bots', action='disable', action_id=str(bot_id))
+        if error:
+            raise Exception(f"Error stopping grid bot: {error}")
+        return response
+
+    @coalesced()
+    async def get_bot_deals(self, bot_id, limit=50, offset=0, order=None, order_direction=None):
+        """Get deals for a specific bot (see ThreeCommasClient.get_bot_deals)"""
+        payload = {'limit': limit}
+        if bot_id is not None:
+            payload['bot_id'] = bot_id
+        if offset:
+            payload['offset'] = offset
+        if order:
+            payload['order'] = order
+        if order_direction:
+            payload['order_direction'] = order_direction
+        error, deals = await self.request(entity='deals', action='', payload=payload)
+        if error:
+            raise Exception(f"Error getting bot deals: {error}")
+        return deals
+
+    @coalesced()
+    async def get_account_balances(self, account_id):
+        """Get the balance table of an account (one row per currency)"""
+        error, rows = await self.request(entity='accounts', action='account_table_data', action_id=str(account_id))
+        if error:
+            raise Exception(f"Error getting account balances: {error}")
+        return rows
+
+    @coalesced()
+    async def get_market_info(self, pair):
+        """Get market information for a pair"""
+        error, info = await self.request(entity='accounts', action='market_info', payload={'pair': pair})
+        if error:
+            raise Exception(f"Error getting market info: {error}")
+        return info
+
+    @coalesced()
+    async def get_bots(self, scope=None, limit=100, offset=0):
+        """Get one page of bots (see ThreeCommasClient.get_bots)"""
+        payload = {'limit': limit}
+        if scope:
+            payload['scope'] = scope
+        if offset:
+            payload['offset'] = offset
+        error, bots = await self.request(entity='bots', action='', payload=payload)
+        if error:
+            raise Exception(f"Error getting bots: {error}")
+        return bots
+
+    @coalesced()
+    async def get_grid_bots(self, limit=100, offset=0):
+        """Get one page of grid bots (see ThreeCommasClient.get_grid_bots)"""
+        payload = {'limit': limit}
+        if offset:
+            payload['offset'] = offset
+        error, bots = await self.request(entity='grid_bots', action='', payload=payload)
+        if error:
+            raise Exception(f"Error getting grid bots: {error}")
+        return bots
+
+    async def iter_bots(self, scope=None, page_size=100):
+        """Lazily iterate over all bots in a scope, prefetching the next page"""
+        async for bot in apaginate(lambda offset: self.get_bots(scope, page_size, offset), page_size):
+            yield bot
+
+    async def iter_grid_bots(self, page_size=100):
+        """Lazily iterate over all grid bots, prefetching the next page"""
+        async for bot in apaginate(lambda offset: self.get_grid_bots(page_size, offset), page_size):
+            yield bot
+
+    async def iter_deals(self, bot_id, since=None, page_size=50):
+        """Lazily iterate over a bot's deals, most recently updated first (see ThreeCommasClient.iter_deals)"""
+        pages = apaginate(
+            lambda offset: self.get_bot_deals(bot_id, page_size, offset, order='updated_at', order_direction='desc'),
+            page_size
+        )
+        try:
+            async for deal in pages:
+                if not updated_since(deal, since):
+                    break
+                yield deal
+        finally:
+            await pages.aclose()
+
+    async def get_active_bots(self):
+        """Get all active bots"""
+        try:
+            return [bot async for bot in self.iter_bots(scope='enabled')]
+        except Exception as e:
+            raise Exception(f"Error getting active bots: {e}")
@@ -0,0 +1,101 @@
+# 3Commas Client Benchmark
+# Compares wall-clock time for many calls through the blocking ThreeCommasClient
+# and the pooled AsyncThreeCommasClient against a local stand-in server.
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+# The stand-in server does not check signatures, so dummy credentials are fine
+os.environ.setdefault('3COMMAS_API_KEY', 'benchmark')
+os.environ.setdefault('3COMMAS_SECRET', 'benchmark')
+
+from aiohttp import web
+
+from three_commas_client import ThreeCommasClient
+from async_three_commas_client import AsyncThreeCommasClient
+from rate_limiter import rate_limiter
+from singleflight import singleflight
+
+ACCOUNTS = [{'id': 1, 'name': 'Binance', 'market_code': 'binance', 'type': 'binance'}]
+
+
+def start_stand_in_server(latency):
+    """Start a local stand-in for the 3Commas API in a background thread and return its base URL"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def handle(request):
+        await asyncio.sleep(latency)
+        return web.json_response(ACCOUNTS)
+
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/public/api/{tail:.*}', handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        state['port'] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(run()), loop.run_forever()), daemon=True)
+    thread.start()
+    ready.wait()
+    return f"http://127.0.0.1:{state['port']}"
+
+
+def bench_sync(base_url, calls):
+    """Time sequential calls through the blocking client"""
+    client = ThreeCommasClient(base_url=base_url)
+    start = time.perf_counter()
+    for _ in range(calls):
+        client.get_accounts()
+    return time.perf_counter() - start
+
+
+async def bench_async(base_url, calls):
+    """Time concurrent calls through the async client"""
+    async with AsyncThreeCommasClient(base_url=base_url) as client:
+        await client.get_accounts()  # Warm up the connection pool
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get_accounts() for _ in range(calls)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sync vs async 3Commas client')
+    parser.add_argument('--calls', type=int, default=200, help='Number of calls to make')
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated server latency in seconds')
+    parser.add_argument('--rate-limited', action='store_true',
+                        help='Keep the 3Commas client-side rate limit (off by default, the stand-in has no limit)')
+    parser.add_argument('--coalesce', action='store_true',
+                        help='Keep request coalescing (off by default, it would turn the concurrent calls into one request)')
+    args = parser.parse_args()
+
+    if not args.rate_limited:
+        rate_limiter.set_limit('3commas', 1e6, 1e6)
+    if not args.coalesce:
+        singleflight.keys['get_accounts'] = None
+
+    base_url = start_stand_in_server(args.latency)
+    print(f"\n⏱️ Benchmarking {args.calls} get_accounts calls against {base_url} ({args.latency * 1000:.0f}ms latency)")
+
+    sync_time = bench_sync(base_url, args.calls)
+    print(f"Sync client (ThreeCommasClient):       {sync_time:.3f}s ({args.calls / sync_time:.0f} calls/s)")
+
+    async_time = asyncio.run(bench_async(base_url, args.calls))
+    print(f"Async client (AsyncThreeCommasClient): {async_time:.3f}s ({args.calls / async_time:.0f} calls/s)")
+
+    print(f"Speedup: {sync_time / async_time:.1f}x")
+    if singleflight.shared:
+        print(f"Coalesced: {singleflight.shared} of {singleflight.calls} calls shared an in-flight request")
+    for line in rate_limiter.format_stats():
+        print(f"Rate limiter {line}")
+
+
+if __name__ == "__main__":
+    main()
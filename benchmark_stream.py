@@ -0,0 +1,62 @@
+# Price Stream Benchmark
+# Measures MarketStream throughput (messages/s) and recovery after dropped connections
+# against a local stand-in for the Binance WebSocket and REST ticker endpoints.
+
+import argparse
+import asyncio
+import time
+
+from market_stream import MarketStream, stream_symbol
+from rate_limiter import rate_limiter
+from tests.stream_server import start_stand_in_server
+
+
+async def bench_stream(ws_url, rest_url, state, pairs, duration):
+    """Stream the pairs for duration seconds and return the stream"""
+    state['symbols'] = [stream_symbol(pair) for pair in pairs]
+    stream = MarketStream(url=ws_url, rest_url=rest_url)
+    try:
+        await stream.subscribe(pairs)
+        if not await stream.wait_connected(5):
+            raise Exception("Stream did not connect to the stand-in server")
+        await asyncio.sleep(duration)
+        # Every pair must be fresh again after the last reconnect
+        resubscribe_start = time.perf_counter()
+        while any(stream.get(pair, max_age=0.5) is None for pair in pairs):
+            if time.perf_counter() - resubscribe_start > 5:
+                missing = [pair for pair in pairs if stream.get(pair, max_age=0.5) is None]
+                raise Exception(f"{len(missing)} pairs stopped updating, e.g. {missing[:3]}")
+            await asyncio.sleep(0.05)
+        return stream
+    finally:
+        await stream.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the WebSocket price stream')
+    parser.add_argument('--pairs', type=int, default=100, help='Number of pairs to subscribe to')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds to stream')
+    parser.add_argument('--drop-after', type=int, default=50000,
+                        help='Messages after which the stand-in drops the connection (0 never drops)')
+    parser.add_argument('--batch', type=int, default=100, help='Messages the stand-in sends between yields')
+    args = parser.parse_args()
+
+    rate_limiter.set_limit('binance', 1e6, 1e6)
+    ws_url, rest_url, state = start_stand_in_server(args.drop_after, args.batch)
+    pairs = [f"COIN{i}_USDT" for i in range(args.pairs)]
+    drops = f"connection dropped every {args.drop_after} messages" if args.drop_after else "connection never dropped"
+    print(f"\n⏱️ Streaming {args.pairs} pairs from {ws_url} for {args.duration:.0f}s ({drops})")
+
+    try:
+        stream = asyncio.run(bench_stream(ws_url, rest_url, state, pairs, args.duration))
+    except Exception as e:
+        print(f"❌ {e}")
+        return
+
+    print(f"Messages received: {stream.messages} of {state['sent']} sent ({stream.rate():.0f} messages/s)")
+    print(f"Connections:       {state['connections']} ({stream.reconnects} reconnects)")
+    print(f"✅ All {len(pairs)} pairs were streaming again after every reconnect")
+
+
+if __name__ == "__main__":
+    main()
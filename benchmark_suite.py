@@ -0,0 +1,192 @@
+# Offline Benchmark Suite
+# Replays synthetic cassettes through ThreeCommasClient (no network, no credentials) and
+# tracks wall-clock time and request counts against a saved baseline.
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+# Replayed requests are never sent, so dummy credentials are fine
+os.environ.setdefault('3COMMAS_API_KEY', 'benchmark')
+os.environ.setdefault('3COMMAS_SECRET', 'benchmark')
+
+from three_commas_client import ThreeCommasClient
+from cassette import Cassette, use_cassette
+from monitor_bots import monitor_bots
+from rate_limiter import rate_limiter
+from config import CACHE_DIR, GRID_BOT_CONFIG, DCA_BOT_CONFIG, BINANCE_API_URL
+
+API = 'https://api.3commas.io/public/api/ver1/'
+BASELINE_FILE = os.path.join(CACHE_DIR, 'benchmark_baseline.json')
+FLEET_SIZES = (10, 100, 1000)
+RATE_PAIRS = 20
+CREATE_COUNT = 20
+# Slowdowns below this many seconds are treated as noise
+NOISE_FLOOR = 0.05
+
+
+def fleet_cassette(bots):
+    """Enabled DCA bots (paged like the API) with three deals each"""
+    cassette = Cassette()
+    fleet = [{
+        'id': i, 'name': f"Bot {i}", 'pairs': ['BTC_USDT'], 'type': 'Bot::SingleBot',
+        'profit': {'usd': round(i * 0.37, 2), 'percent': 1.5}, 'active_deals_count': 1, 'finished_deals_count': i % 7,
+    } for i in range(1, bots + 1)]
+    for offset in range(0, bots + 1, 100):
+        params = {'limit': 100, 'scope': 'enabled'}
+        if offset:
+            params['offset'] = offset
+        cassette.add('GET', API + 'bots', fleet[offset:offset + 100], params=params)
+    for bot in fleet:
+        deals = [{'id': bot['id'] * 10 + k, 'bot_id': bot['id'], 'status': 'completed' if k else 'bought',
+                  'final_profit': '0.5', 'updated_at': '2024-01-01T00:00:00Z'} for k in range(3)]
+        cassette.add('GET', API + 'deals', deals, params={'limit': 50, 'bot_id': bot['id']})
+    return cassette
+
+
+def rate_cassette(pairs):
+    """Every 3Commas rate endpoint failing, so each price comes from the Binance fallback"""
+    cassette = Cassette()
+    for pair in pairs:
+        for request_pair in (pair, pair.replace('_', '')):
+            cassette.add('GET', API + 'accounts/currency_rates', {'error': 'record_invalid'}, status=422,
+                         params={'pair': request_pair})
+    tickers = [{'symbol': pair.replace('_', ''), 'bidPrice': '99.9', 'askPrice': '100.1'} for pair in pairs]
+    cassette.add('GET', BINANCE_API_URL + '/api/v3/ticker/bookTicker', tickers)
+    return cassette
+
+
+def create_cassette():
+    """Successful grid and DCA bot creation"""
+    cassette = Cassette()
+    cassette.add('POST', API + 'grid_bots/manual', {'id': 1, 'name': GRID_BOT_CONFIG['name']})
+    cassette.add('POST', API + 'bots/create_bot', {'id': 2, 'name': DCA_BOT_CONFIG['name']})
+    return cassette
+
+
+def bench_currency_rates(client):
+    for i in range(RATE_PAIRS):
+        rate = client.get_currency_rate(f"COIN{i}_USDT")
+        if rate['source'] == 'hardcoded':
+            raise Exception(f"COIN{i}_USDT fell through to the hardcoded price")
+
+
+def bench_create_bots(client):
+    grid_config = dict(GRID_BOT_CONFIG, upper_price=110, lower_price=90)
+    for _ in range(CREATE_COUNT):
+        client.create_grid_bot(1, grid_config)
+        client.create_dca_bot(1, DCA_BOT_CONFIG)
+
+
+def bench_monitor(client):
+    asyncio.run(monitor_bots(client, refresh_interval=0, iterations=1))
+
+
+def scenarios():
+    """name -> (cassette factory, benchmark taking a client)"""
+    rate_pairs = [f"COIN{i}_USDT" for i in range(RATE_PAIRS)]
+    result = {
+        'currency_rate_fallback': (lambda: rate_cassette(rate_pairs), bench_currency_rates),
+        'create_bots': (create_cassette, bench_create_bots),
+    }
+    for size in FLEET_SIZES:
+        result[f"monitor_refresh_{size}"] = (lambda size=size: fleet_cassette(size), bench_monitor)
+    return result
+
+
+def run_scenario(make_cassette, bench, latency=0.0, error_rate=0.0, seed=0):
+    """Run one benchmark against a fresh client, returns seconds, requests and misses"""
+    client = ThreeCommasClient()
+    adapter = use_cassette(client, make_cassette(), latency=latency, error_rate=error_rate, seed=seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        bench(client)
+        elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 4), 'requests': adapter.requests, 'misses': adapter.misses,
+            'latency': latency, 'error_rate': error_rate}
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against baseline runs with the same latency and error rate, as printable lines"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        settings = ('latency', 'error_rate')
+        if not previous or any(previous.get(setting) != result[setting] for setting in settings):
+            continue
+        if result['requests'] > previous['requests']:
+            regressions.append(f"{name}: {previous['requests']} -> {result['requests']} requests")
+        slower = result['seconds'] - previous['seconds']
+        if slower > NOISE_FLOOR and result['seconds'] > previous['seconds'] * (1 + tolerance):
+            regressions.append(f"{name}: {previous['seconds']:.3f}s -> {result['seconds']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks over replayed cassettes')
+    parser.add_argument('--only', action='append', help='Run only these scenarios (repeatable)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every replayed response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for injected errors')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before a regression (0.2 = 20%%)')
+    parser.add_argument('--save-cassettes', metavar='DIR', help='Write the synthetic cassettes to this directory')
+    parser.add_argument('--rate-limited', action='store_true',
+                        help='Keep the client-side rate limits (off by default, replays have no limit)')
+    args = parser.parse_args()
+
+    if not args.rate_limited:
+        rate_limiter.set_limit('3commas', 1e6, 1e6)
+        rate_limiter.set_limit('binance', 1e6, 1e6)
+
+    selected = {name: scenario for name, scenario in scenarios().items() if not args.only or name in args.only}
+    if args.save_cassettes:
+        os.makedirs(args.save_cassettes, exist_ok=True)
+        for name, (make_cassette, _) in selected.items():
+            make_cassette().save(os.path.join(args.save_cassettes, f"{name}.jsonl.gz"))
+        print(f"💾 Wrote {len(selected)} cassettes to {args.save_cassettes}")
+
+    print(f"\n⏱️ Running {len(selected)} scenarios ({args.latency * 1000:.0f}ms latency, "
+          f"{args.error_rate:.0%} injected errors)")
+    results = {}
+    for name, (make_cassette, bench) in selected.items():
+        try:
+            results[name] = run_scenario(make_cassette, bench, args.latency, args.error_rate, args.seed)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            continue
+        result = results[name]
+        misses = f", {result['misses']} unrecorded" if result['misses'] else ""
+        print(f"{name:<26} {result['seconds']:8.3f}s {result['requests']:6d} requests{misses}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if baseline:
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+        else:
+            print(f"\n✅ No regressions against {args.baseline}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(dict(baseline, **results), f, indent=2)
+        print(f"💾 Saved baseline to {args.baseline}")
+
+    if regressions or len(results) < len(selected):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from collections import deque
+
+from config import MONITOR_PROFIT_DELTA, MONITOR_HISTORY_SIZE, MONITOR_TRACKED_DEALS
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class BotState:
+    """Last reported state of one bot"""
+    __slots__ = ('bot_id', 'name', 'profit', 'active_deals', 'finished_deals', 'deals', 'error', 'seen', 'history')
+
+    def __init__(self, bot_id, name, profit, active_deals, finished_deals, deals, error, seen, history_size):
+        self.bot_id = bot_id
+        self.name = name
+        self.profit = profit  # USD profit when last reported
+        self.active_deals = active_deals
+        self.finished_deals = finished_deals
+        self.deals = deals  # deal ID -> status of the most recent deals, None when they could not be fetched
+        self.error = error
+        self.seen = seen  # Refresh the bot was last listed in
+        self.history = deque([profit], maxlen=history_size)  # USD profit at each refresh
+
+
+class BotStateTracker:
+    def __init__(self, profit_delta=MONITOR_PROFIT_DELTA, history_size=MONITOR_HISTORY_SIZE,
+                 tracked_deals=MONITOR_TRACKED_DEALS):
+        """
+        Per-bot state between monitor refreshes, reporting only what changed
+
+        Each bot keeps a few scalars and the statuses of its most recent deals,
+        so comparing a refresh costs the same for every bot and the output only
+        grows with the number of changes.
+
+        Args:
+            profit_delta: USD change in a bot's profit that is reported
+            history_size: Refreshes of profit history kept per bot
+            tracked_deals: Most recent deals per bot checked for new deals and status changes
+        """
+        self.profit_delta = profit_delta
+        self.history_size = history_size
+        self.tracked_deals = tracked_deals
+        self.states = {}
+        self.refresh = 0
+
+    def begin_refresh(self):
+        """Start a new refresh; bots not updated before the next one are reported as removed"""
+        self.refresh += 1
+
+    def update(self, bot, deals=None, error=None):
+        """
+        Record a bot's latest state
+
+        Returns (state, changes) where changes lists what differs from the
+        previous refresh as printable lines (the bot's summary when it is new).
+        """
+        bot_id = bot.get('id')
+        profit = _number((bot.get('profit') or {}).get('usd'))
+        active_deals = int(_number(bot.get('active_deals_count')))
+        finished_deals = int(_number(bot.get('finished_deals_count')))
+        recent = None
+        if error is None and deals is not None:
+            recent = {deal.get('id'): deal.get('status') for deal in deals[:self.tracked_deals]}
+
+        state = self.states.get(bot_id)
+        if state is None:
+            state = BotState(bot_id, bot.get('name', 'Unknown'), profit, active_deals, finished_deals, recent, error,
+                             self.refresh, self.history_size)
+            self.states[bot_id] = state
+            summary = (f"➕ {bot.get('pairs', 'Unknown')}, profit ${profit:.2f}, "
+                       f"{active_deals} active / {finished_deals} finished deals")
+            return state, [summary] + ([f"⚠️ Could not get deals: {error}"] if error else [])
+
+        state.seen = self.refresh
+        state.history.append(profit)
+        changes = []
+        if abs(profit - state.profit) >= self.profit_delta:
+            trend = ""
+            if len(state.history) > 2:
+                trend = f", {profit - state.history[0]:+.2f} over {len(state.history)} refreshes"
+            changes.append(f"💰 Profit ${state.profit:.2f} -> ${profit:.2f} ({profit - state.profit:+.2f}{trend})")
+            state.profit = profit
+        if (active_deals, finished_deals) != (state.active_deals, state.finished_deals):
+            changes.append(f"📈 Deals: {state.active_deals} -> {active_deals} active, "
+                           f"{state.finished_deals} -> {finished_deals} finished")
+            state.active_deals = active_deals
+            state.finished_deals = finished_deals
+        if error != state.error:
+            changes.append(f"⚠️ Could not get deals: {error}" if error else "✅ Deals available again")
+            state.error = error
+        if recent is not None and state.deals is None:
+            state.deals = recent  # First successful fetch is the baseline
+        elif recent is not None and recent != state.deals:
+            previous = state.deals
+            for deal_id, status in recent.items():
+                if deal_id not in previous:
+                    changes.append(f"🆕 Deal {deal_id}: {status}")
+                elif previous[deal_id] != status:
+                    changes.append(f"🔄 Deal {deal_id}: {previous[deal_id]} -> {status}")
+            state.deals = recent
+        return state, changes
+
+    def remove_missing(self):
+        """Drop and return the states of bots that were not updated during the current refresh"""
+        missing = [state for state in self.states.values() if state.seen < self.refresh]
+        for state in missing:
+            del self.states[state.bot_id]
+        return missing
+
+    def __len__(self):
+        return len(self.states)
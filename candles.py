@@ -0,0 +1,85 @@
+import numpy as np
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+# Header names accepted for the time column
+TIME_COLUMNS = ('time', 'open_time', 'timestamp', 'date')
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def load_candles(path):
+    """
+    Load OHLCV candles from a CSV or .npy file
+
+    CSV files either have a header naming the time/open/high/low/close/volume
+    columns (in any order, extra columns are ignored) or no header and the
+    Binance kline layout (open time, open, high, low, close, volume, ...).
+    .npy files hold a 2-D array with the columns of COLUMNS, or the same
+    without the time column; they load much faster than CSV, see save_candles.
+
+    Returns a dict of float arrays keyed by COLUMNS, oldest candle first.
+    """
+    if path.lower().endswith('.npy'):
+        data = np.load(path)
+        if data.ndim != 2 or data.shape[1] < 5:
+            raise Exception(f"Expected a 2-D array with at least 5 columns in {path}, got shape {data.shape}")
+        if data.shape[1] == 5:
+            data = np.column_stack([np.arange(len(data), dtype=float), data])
+        columns = list(range(6))
+    else:
+        with open(path) as f:
+            first_line = f.readline().strip()
+        names = [name.strip().lower() for name in first_line.split(',')]
+        # Headerless rows may use scientific notation (1e-05, np.savetxt's default), so parse instead of looking for letters
+        has_header = not all(_is_number(name) for name in names)
+        if has_header:
+            time_column = next((names.index(name) for name in TIME_COLUMNS if name in names), None)
+            missing = [name for name in COLUMNS[1:5] if name not in names]
+            if missing:
+                raise Exception(f"Missing columns {missing} in {path}")
+            columns = [time_column] + [names.index(name) for name in COLUMNS[1:5]]
+            columns.append(names.index('volume') if 'volume' in names else None)
+        else:
+            columns = list(range(6))
+        used = [column for column in columns if column is not None]
+        data = np.loadtxt(path, delimiter=',', skiprows=1 if has_header else 0, usecols=used, ndmin=2)
+        positions = {column: i for i, column in enumerate(used)}
+        rows = len(data)
+        data = np.column_stack([
+            data[:, positions[column]] if column is not None else
+            (np.arange(rows, dtype=float) if name == 'time' else np.zeros(rows))
+            for name, column in zip(COLUMNS, columns)
+        ])
+        columns = list(range(6))
+
+    candles = {name: np.ascontiguousarray(data[:, column], dtype=float) for name, column in zip(COLUMNS, columns)}
+    if len(candles['time']) > 1 and candles['time'][0] > candles['time'][-1]:
+        candles = {name: values[::-1].copy() for name, values in candles.items()}
+    return candles
+
+
+def save_candles(path, candles):
+    """Save candles as a .npy array for fast reloading with load_candles"""
+    np.save(path, np.column_stack([candles[name] for name in COLUMNS]))
+
+
+def price_path(candles):
+    """
+    Intra-candle price path: open, low, high, close for up candles and
+    open, high, low, close for down candles, which is the usual assumption
+    when only OHLC is known. Returns an array of 4 prices per candle.
+    """
+    up = candles['close'] >= candles['open']
+    path = np.empty((len(candles['open']), 4))
+    path[:, 0] = candles['open']
+    path[:, 1] = np.where(up, candles['low'], candles['high'])
+    path[:, 2] = np.where(up, candles['high'], candles['low'])
+    path[:, 3] = candles['close']
+    return path.ravel()
@@ -0,0 +1,216 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import CASSETTE_PATH, CASSETTE_MODE
+
+# Query parameters never written to a cassette or used for matching
+SECRET_PARAMS = {'apikey', 'api_key', 'signature', 'secret', 'timestamp', 'recvwindow'}
+
+# Response headers kept in a cassette (rate limit headers drive the shared rate limiter)
+KEPT_HEADERS = {'content-type', 'retry-after', 'ratelimit-limit', 'ratelimit-remaining', 'ratelimit-reset',
+                'x-ratelimit-limit', 'x-ratelimit-remaining', 'x-ratelimit-reset', 'x-mbx-used-weight-1m'}
+
+
+def _canonical(method, url, body=None):
+    """(method, path, query, body) with secrets removed and parameters sorted, so equal requests match"""
+    parts = urlsplit(url)
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if name.lower() not in SECRET_PARAMS))
+    if isinstance(body, bytes):
+        body = body.decode()
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+        except ValueError:
+            pass
+    return method.upper(), parts.path, query, body or ''
+
+
+class Cassette:
+    def __init__(self, interactions=None):
+        """
+        Recorded HTTP interactions, matched by method, path, query and body
+
+        Repeated requests replay their recorded responses in order and then
+        keep returning the last one. Requests without an exact match fall back
+        to the responses recorded for the same method and path.
+        """
+        self.interactions = []
+        self._exact = {}
+        self._routes = {}
+        self._lock = threading.Lock()
+        for interaction in interactions or []:
+            self._index(interaction)
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def _index(self, interaction):
+        self.interactions.append(interaction)
+        key = (interaction['method'], interaction['path'], interaction['query'], interaction['body'])
+        self._exact.setdefault(key, deque()).append(interaction)
+        self._routes.setdefault(key[:2], deque()).append(interaction)
+
+    def add(self, method, url, response, status=200, params=None, body=None, headers=None):
+        """
+        Add an interaction
+
+        Args:
+            method: HTTP method
+            url: Request URL (scheme and host are ignored when matching)
+            response: Response body, JSON-encoded unless it is already a string
+            status: HTTP status code
+            params: Query parameters, merged into the URL
+            body: Request body (a dict is JSON-encoded)
+            headers: Response headers
+        """
+        if params:
+            url += ('&' if '?' in url else '?') + urlencode(params)
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+        method, path, query, body = _canonical(method, url, body)
+        self._index({
+            'method': method, 'path': path, 'query': query, 'body': body, 'status': status,
+            'headers': headers or {'Content-Type': 'application/json'},
+            'response': response if isinstance(response, str) else json.dumps(response),
+        })
+
+    def match(self, method, url, body=None):
+        """Recorded interaction for a request, or None"""
+        key = _canonical(method, url, body)
+        with self._lock:
+            for candidates in (self._exact.get(key), self._routes.get(key[:2])):
+                if candidates:
+                    return candidates.popleft() if len(candidates) > 1 else candidates[0]
+        return None
+
+    @classmethod
+    def load(cls, path):
+        """Read a gzip-compressed JSON lines cassette"""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def save(self, path):
+        """Write every interaction to a gzip-compressed JSON lines file"""
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for interaction in self.interactions:
+                f.write(json.dumps(interaction, separators=(',', ':')) + '\n')
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(self, cassette=None, mode='replay', path=None, latency=0.0, error_rate=0.0, error_status=503,
+                 seed=None):
+        """
+        requests transport that records to or replays from a Cassette
+
+        In 'record' mode requests go to the network and each response is
+        appended to the cassette (and to path, when given, as it arrives).
+        Request headers, where the APIKEY and Signature live, are never
+        stored. In 'replay' mode nothing touches the network.
+
+        Args:
+            cassette: Cassette to replay or record into (a new one by default)
+            mode: 'record' or 'replay'
+            path: File recordings are appended to
+            latency: Seconds added to every replayed response
+            error_rate: Fraction of replayed requests answered with an injected error
+            error_status: HTTP status of injected errors, or 0 for connection errors
+            seed: Seed for the injected errors, for reproducible runs
+        """
+        super().__init__()
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.cassette = cassette if cassette is not None else Cassette()
+        self.mode = mode
+        self.path = path
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.misses = 0
+        self.errors_injected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests += 1
+        if self.mode == 'record':
+            response = super().send(request, **kwargs)
+            self._record(request, response)
+            return response
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            with self._lock:
+                self.errors_injected += 1
+            if not self.error_status:
+                raise requests.ConnectionError(f"Injected connection error for {request.url}", request=request)
+            return self._response(request, self.error_status,
+                                  json.dumps({'error': 'injected', 'error_description': 'Injected by cassette'}))
+
+        interaction = self.cassette.match(request.method, request.url, request.body)
+        if interaction is None:
+            with self._lock:
+                self.misses += 1
+            return self._response(request, 404, json.dumps({'error': 'not_recorded',
+                                                             'error_description': f"No recording for {request.url}"}))
+        return self._response(request, interaction['status'], interaction['response'], interaction['headers'])
+
+    def _record(self, request, response):
+        method, path, query, body = _canonical(request.method, request.url, request.body)
+        interaction = {
+            'method': method, 'path': path, 'query': query, 'body': body, 'status': response.status_code,
+            'headers': {name: value for name, value in response.headers.items() if name.lower() in KEPT_HEADERS},
+            'response': response.text,
+        }
+        with self._lock:
+            self.cassette._index(interaction)
+            if self.path:
+                # Each append is a gzip member of its own, Cassette.load reads them as one stream
+                with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                    f.write(json.dumps(interaction, separators=(',', ':')) + '\n')
+
+    def _response(self, request, status, text, headers=None):
+        response = requests.Response()
+        response.status_code = status
+        response._content = text.encode()
+        response.headers.update(headers or {'Content-Type': 'application/json'})
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if status < 400 else 'Error'
+        return response
+
+
+def use_cassette(client, cassette=None, mode='replay', **options):
+    """
+    Route every HTTP request of a ThreeCommasClient (3Commas and Binance) through a CassetteAdapter
+
+    Returns the adapter, which counts the requests made.
+    """
+    adapter = CassetteAdapter(cassette, mode, **options)
+    for session in (client.client.session, client.price_graph.session):
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+    return adapter
+
+
+def cassette_from_config(client):
+    """Attach the cassette configured by CASSETTE_MODE / CASSETTE_PATH, if any"""
+    if not CASSETTE_MODE:
+        return None
+    if CASSETTE_MODE == 'replay':
+        return use_cassette(client, Cassette.load(CASSETTE_PATH), 'replay')
+    os.makedirs(os.path.dirname(CASSETTE_PATH) or '.', exist_ok=True)
+    return use_cassette(client, mode='record', path=CASSETTE_PATH)
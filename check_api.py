@@ -1,12 +1,24 @@
 # 3Commas API Check Script
 # This script validates your 3Commas API connection and checks if your trading pairs are valid.
 
+import argparse
 import asyncio
 import requests  # Added import for HTTP requests
 from three_commas_client import ThreeCommasClient
-from config import GRID_BOT_CONFIG, DCA_BOT_CONFIG, DEFAULT_EXCHANGE
+from pair_catalog import load_pair_catalog
+from account_registry import load_accounts
+from circuit_breaker import circuit_breakers
+from metadata_cache import metadata_cache
+from config import GRID_BOT_CONFIG, DCA_BOT_CONFIG, DEFAULT_EXCHANGE, BINANCE_API_URL
 
 async def main():
+    parser = argparse.ArgumentParser(description='3Commas API Connection Checker')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='Download pair catalogs again instead of using the metadata cache')
+    args = parser.parse_args()
+    if args.refresh_cache:
+        metadata_cache.expire()
+    
     print("\n🔍 3Commas API Connection Checker")
     print("================================\n")
     
@@ -16,7 +28,9 @@ async def main():
         
         # Test API connection
         try:
-            accounts = client.get_accounts()
+            # Always download the accounts here, this is the connection test
+            registry = await load_accounts(client, refresh=True)
+            accounts = registry.accounts
             print(f"✅ API Connection successful! Found {len(accounts)} connected exchanges.")
             
             if len(accounts) == 0:
@@ -35,14 +49,10 @@ async def main():
             
             # Get exchange from config
             print(f"\n🔍 Checking exchange: {DEFAULT_EXCHANGE}")
-            exchange_found = False
-            for account in accounts:
-                if account['market_code'].lower() == DEFAULT_EXCHANGE.lower():
-                    exchange_found = True
-                    print(f"✅ Exchange '{DEFAULT_EXCHANGE}' found with account ID: {account['id']}")
-                    break
-            
-            if not exchange_found:
+            account = registry.for_exchange(DEFAULT_EXCHANGE)
+            if account:
+                print(f"✅ Exchange '{DEFAULT_EXCHANGE}' found with account ID: {account['id']}")
+            else:
                 print(f"❌ Exchange '{DEFAULT_EXCHANGE}' not found among your connected exchanges!")
                 print(f"Please update DEFAULT_EXCHANGE in config.py to one of: {', '.join([a['market_code'] for a in accounts])}")
             
@@ -57,21 +67,21 @@ async def main():
                 print(f"\nChecking pairs on {exchange}...")
                 
                 try:
-                    available_pairs = client.get_available_pairs(exchange)
-                    if available_pairs:
-                        print(f"Found {len(available_pairs)} available pairs on {exchange}")
+                    catalog = await load_pair_catalog(client, exchange)
+                    if catalog:
+                        print(f"Found {len(catalog)} available pairs on {exchange}")
                         
                         for pair in unique_pairs:
-                            if pair in available_pairs:
-                                print(f"✅ Pair '{pair}' is valid on {exchange}")
+                            exchange_pair = catalog.normalize(pair)
+                            if exchange_pair:
+                                print(f"✅ Pair '{pair}' is valid on {exchange}" + (f" (listed as '{exchange_pair}')" if exchange_pair != pair else ""))
                             else:
                                 print(f"❌ Pair '{pair}' NOT FOUND on {exchange}")
                                 # Try to find similar pairs
-                                if '_' in pair:
-                                    base_currency = pair.split('_')[0]
-                                    similar_pairs = [p for p in available_pairs if p.startswith(f"{base_currency}_")][:5]
-                                    if similar_pairs:
-                                        print(f"   Similar pairs you could use: {', '.join(similar_pairs)}")
+                                base_currency, _ = catalog.split(pair)
+                                similar_pairs = catalog.by_base.get(base_currency, [])[:5] or catalog.suggest(pair)
+                                if similar_pairs:
+                                    print(f"   Similar pairs you could use: {', '.join(similar_pairs)}")
                 except Exception as e:
                     print(f"Error checking pairs on {exchange}: {e}")
             
@@ -82,7 +92,7 @@ async def main():
                     print(f"Fetching price for {pair}...")
                     rate_data = client.get_currency_rate(pair)
                     if rate_data and 'last' in rate_data:
-                        print(f"✅ Price for {pair}: {rate_data['last']}")
+                        print(f"✅ Price for {pair}: {rate_data['last']} (source: {rate_data.get('source', 'unknown')}, age: {rate_data.get('age', 0):.1f}s)")
                         
                         # For BTC_ETH, also check if we can calculate it from BTC/USDT and ETH/USDT
                         if pair in ['BTC_ETH', 'BTCETH']:
@@ -91,8 +101,8 @@ async def main():
                                 headers = {
                                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                                 }
-                                btc_response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT", headers=headers)
-                                eth_response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT", headers=headers)
+                                btc_response = requests.get(f"{BINANCE_API_URL}/api/v3/ticker/price?symbol=BTCUSDT", headers=headers)
+                                eth_response = requests.get(f"{BINANCE_API_URL}/api/v3/ticker/price?symbol=ETHUSDT", headers=headers)
                                 
                                 if btc_response.status_code == 200 and eth_response.status_code == 200:
                                     btc_data = btc_response.json()
@@ -132,8 +142,8 @@ async def main():
                             headers = {
                                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                             }
-                            btc_response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT", headers=headers)
-                            eth_response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT", headers=headers)
+                            btc_response = requests.get(f"{BINANCE_API_URL}/api/v3/ticker/price?symbol=BTCUSDT", headers=headers)
+                            eth_response = requests.get(f"{BINANCE_API_URL}/api/v3/ticker/price?symbol=ETHUSDT", headers=headers)
                             
                             if btc_response.status_code == 200 and eth_response.status_code == 200:
                                 btc_data = btc_response.json()
@@ -156,6 +166,12 @@ async def main():
                             print("   ℹ️ Using default price estimate for BTC_ETH: 15.0")
                             print("      This is just an approximation - please verify current market price")
             
+            circuit_lines = circuit_breakers.format_states(include_closed=True)
+            if circuit_lines:
+                print("\n🔌 Price source circuits:")
+                for line in circuit_lines:
+                    print(f"   {line}")
+            
             print("\n✅ API check completed!")
             
         except Exception as e:
@@ -167,6 +183,8 @@ async def main():
         
     except Exception as e:
         print(f"❌ Fatal error: {e}")
+    finally:
+        await metadata_cache.drain()
 
 if __name__ == "__main__":
     asyncio.run(main())
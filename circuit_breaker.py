@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+
+from config import (CIRCUIT_WINDOW, CIRCUIT_MIN_REQUESTS, CIRCUIT_FAILURE_RATE, CIRCUIT_OPEN_TIME,
+                    CIRCUIT_MAX_OPEN_TIME, CIRCUIT_PROBES, CIRCUIT_PAIR_CLASS)
+from pair_catalog import split_pair
+from metrics import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+# Gauge values of circuit_breaker_state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+STATE_ICONS = {CLOSED: '🟢', HALF_OPEN: '🟡', OPEN: '🔴'}
+
+
+def pair_class(pair, mode=CIRCUIT_PAIR_CLASS):
+    """Breaker key for a pair: the pair itself ('pair'), its quote currency ('quote') or one class ('all')"""
+    if mode == 'pair':
+        return pair.upper()
+    if mode == 'quote':
+        return split_pair(pair.upper())[1]
+    return 'all'
+
+
+class CircuitBreaker:
+    def __init__(self, source, pair_class, window=CIRCUIT_WINDOW, min_requests=CIRCUIT_MIN_REQUESTS,
+                 failure_rate=CIRCUIT_FAILURE_RATE, open_time=CIRCUIT_OPEN_TIME, max_open_time=CIRCUIT_MAX_OPEN_TIME,
+                 probes=CIRCUIT_PROBES):
+        """
+        Closed / open / half-open breaker for one price source and pair class
+
+        Closed, every call goes through and outcomes are kept for window
+        seconds. Once at least min_requests calls in the window failed at
+        failure_rate or more, the breaker opens and calls are skipped. After
+        open_time it lets up to probes calls through (half-open): a success
+        closes it, a failure opens it again for twice as long, up to max_open_time.
+
+        Args:
+            source: Price source name (e.g. 'currency_rates')
+            pair_class: Pairs sharing this breaker (see pair_class)
+            window: Seconds of outcomes the failure rate is computed over
+            min_requests: Outcomes needed in the window before the breaker can open
+            failure_rate: Fraction of failed calls that opens the breaker
+            open_time: Seconds skipped before the first probe
+            max_open_time: Upper bound in seconds for the time between probes
+            probes: Calls let through at once while half-open
+        """
+        self.source = source
+        self.pair_class = pair_class
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.base_open_time = open_time
+        self.max_open_time = max_open_time
+        self.probes = probes
+        self.state = CLOSED
+        self.open_time = open_time
+        self.opened_until = 0.0
+        self.probing = 0
+        self.skipped = 0
+        self.outcomes = deque()  # (monotonic time, succeeded)
+        self._lock = threading.Lock()
+
+    def _transition(self, state, reason):
+        # Called with the lock held
+        self.state = state
+        labels = (self.source, self.pair_class)
+        metrics.set('circuit_breaker_state', STATE_VALUES[state], labels)
+        metrics.inc('circuit_breaker_transitions_total', labels + (state,))
+        print(f"{STATE_ICONS[state]} Circuit {self.source} [{self.pair_class}] {state.replace('_', '-')}: {reason}")
+
+    def _trim(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > self.window:
+            self.outcomes.popleft()
+
+    def allow(self):
+        """
+        True when a call may go through
+
+        Every allowed call must be followed by record(), or by cancel() when
+        it ends without an outcome, so half-open probes are released.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self.opened_until:
+                    self.skipped += 1
+                    metrics.inc('circuit_breaker_skipped_total', (self.source, self.pair_class))
+                    return False
+                self._transition(HALF_OPEN, "probing")
+            if self.state == HALF_OPEN:
+                if self.probing >= self.probes:
+                    self.skipped += 1
+                    metrics.inc('circuit_breaker_skipped_total', (self.source, self.pair_class))
+                    return False
+                self.probing += 1
+            return True
+
+    def record(self, succeeded):
+        """Record the outcome of an allowed call"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self.probing = max(0, self.probing - 1)
+                if succeeded:
+                    self.outcomes.clear()
+                    self.open_time = self.base_open_time
+                    self._transition(CLOSED, "probe succeeded")
+                else:
+                    self.open_time = min(self.max_open_time, self.open_time * 2)
+                    self.opened_until = now + self.open_time
+                    self._transition(OPEN, f"probe failed, next probe in {self.open_time:g}s")
+                return
+            if self.state == OPEN:
+                return  # A call allowed before the breaker opened
+            self.outcomes.append((now, succeeded))
+            self._trim(now)
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            if len(self.outcomes) >= self.min_requests and failures >= self.failure_rate * len(self.outcomes):
+                self.opened_until = now + self.open_time
+                self._transition(OPEN, f"{failures}/{len(self.outcomes)} calls failed in the last "
+                                       f"{self.window:g}s, next probe in {self.open_time:g}s")
+
+    def cancel(self):
+        """Release an allowed call that ended without an outcome (e.g. cancelled by a hedged race)"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probing = max(0, self.probing - 1)
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            return {
+                'source': self.source,
+                'pair_class': self.pair_class,
+                'state': self.state,
+                'calls': len(self.outcomes),
+                'failures': failures,
+                'skipped': self.skipped,
+                'next_probe': max(0.0, self.opened_until - now) if self.state == OPEN else None,
+            }
+
+
+class CircuitBreakers:
+    def __init__(self, mode=CIRCUIT_PAIR_CLASS, **options):
+        """
+        Circuit breakers per (price source, pair class), created on first use
+
+        Args:
+            mode: How pairs are grouped into classes, see pair_class
+            **options: CircuitBreaker settings shared by every breaker
+        """
+        self.mode = mode
+        self.options = options
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, source, pair):
+        key = (source, pair_class(pair, self.mode))
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.get(key)
+                if breaker is None:
+                    breaker = self.breakers[key] = CircuitBreaker(*key, **self.options)
+        return breaker
+
+    def states(self):
+        """Snapshot of every breaker"""
+        return [breaker.snapshot() for breaker in list(self.breakers.values())]
+
+    def format_states(self, include_closed=False):
+        """One line per breaker that is not closed (or every breaker), for printing"""
+        lines = []
+        for state in self.states():
+            if state['state'] == CLOSED and not include_closed:
+                continue
+            line = (f"{STATE_ICONS[state['state']]} {state['source']} [{state['pair_class']}]: "
+                    f"{state['state'].replace('_', '-')}, {state['failures']}/{state['calls']} recent calls failed, "
+                    f"{state['skipped']} skipped")
+            if state['next_probe'] is not None:
+                line += f", next probe in {state['next_probe']:.0f}s"
+            lines.append(line)
+        return lines
+
+
+# Shared by every client in the process, so a dead source is skipped everywhere
+circuit_breakers = CircuitBreakers()
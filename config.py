@@ -9,6 +9,115 @@ API_URL = os.getenv('3COMMAS_API_URL')
 API_KEY = os.getenv('3COMMAS_API_KEY')
 API_SECRET = os.getenv('3COMMAS_SECRET')
 
+# Base URL of every 3Commas transport, e.g. a local mock_server.py (tolerates values with or without the /public/api suffix)
+API_BASE_URL = API_URL[API_URL.find('http'):] if API_URL and 'http' in API_URL else 'https://api.3commas.io'
+API_BASE_URL = API_BASE_URL.split('/public/api')[0].rstrip('/')
+
+# Async client configuration
+ASYNC_POOL_SIZE = 100  # Maximum number of pooled keep-alive connections
+ASYNC_KEEPALIVE_TIMEOUT = 30  # Seconds an idle connection is kept open for reuse
+
+# Price cache configuration
+PRICE_CACHE_TTL = 10  # Seconds a cached price is served as fresh
+PRICE_CACHE_STALE_TTL = 50  # Extra seconds a stale price is served while it is refreshed in the background
+PRICE_CACHE_SIZE = 256  # Maximum number of pairs kept in the cache (least recently used are evicted)
+
+# Price resolution configuration
+PRICE_RESOLUTION_MODE = 'hedged'  # 'hedged' races the fallbacks against the primary source, 'sequential' tries them in order
+PRICE_HEDGE_DELAY = 0.5  # Seconds to wait for the primary source before launching the fallbacks
+PRICE_RESOLUTION_DEADLINE = 10  # Hard limit in seconds before falling back to hardcoded prices
+
+# Request coalescing: identical concurrent calls of these read-only client methods share one request
+SINGLEFLIGHT_KEYS = {  # method -> arguments that identify a call, None (or leaving a method out) disables coalescing
+    'get_accounts': (),
+    'get_market_pairs': ('market_code',),
+    'get_available_pairs': ('market_code',),
+    'get_currency_rate': ('pair',),  # The network fetch behind the price cache
+    'get_market_info': ('pair',),
+    'get_grid_creation_params': ('account_id', 'pair'),
+    'get_account_balances': None,  # e.g. ('account_id',)
+    'get_bots': None,  # e.g. ('scope', 'limit', 'offset')
+    'get_grid_bots': None,  # e.g. ('limit', 'offset')
+    'get_bot_deals': None,  # e.g. ('bot_id', 'limit', 'offset', 'order', 'order_direction')
+}
+
+# Price source circuit breakers
+CIRCUIT_PAIR_CLASS = 'quote'  # Pairs sharing a breaker per source: 'pair', 'quote' (currency) or 'all'
+CIRCUIT_WINDOW = 300  # Seconds of call outcomes the failure rate is computed over
+CIRCUIT_MIN_REQUESTS = 3  # Calls needed in the window before a breaker can open
+CIRCUIT_FAILURE_RATE = 0.8  # Fraction of failed calls that opens a breaker and skips the source
+CIRCUIT_OPEN_TIME = 60  # Seconds a source is skipped before a probe call, doubled after each failed probe
+CIRCUIT_MAX_OPEN_TIME = 30 * 60  # Upper bound in seconds between probe calls
+CIRCUIT_PROBES = 1  # Probe calls let through at once while a breaker is half-open
+
+# Binance public market data
+BINANCE_API_URL = os.getenv('BINANCE_API_URL', 'https://api.binance.com').rstrip('/')  # REST base URL, e.g. a local mock_server.py
+BINANCE_TIMEOUT = 10  # Seconds to wait for the public Binance API
+PRICE_GRAPH_TTL = 5  # Seconds a bulk ticker snapshot is reused before the next lookup refreshes it
+BINANCE_STREAM_URL = 'wss://stream.binance.com:9443/ws'  # Raw WebSocket stream endpoint
+STREAM_MAX_AGE = 30  # Seconds a streamed price is trusted before falling back to REST
+STREAM_HEARTBEAT = 20  # Seconds between WebSocket pings; a missing pong triggers a reconnect
+STREAM_SUBSCRIBE_BATCH = 200  # Streams per SUBSCRIBE message (Binance allows 5 messages per second)
+STREAM_RECONNECT_MAX_DELAY = 30  # Upper bound in seconds for the delay between reconnect attempts
+STREAM_CONNECT_TIMEOUT = 10  # Seconds to wait for the stream before falling back to REST prices
+
+# Rate limiting configuration
+RATE_LIMITS = {
+    '3commas': (5, 20),  # (requests per second, burst size)
+    'binance': (100, 1200),  # Binance allows 6000 request weight per minute
+}
+ENDPOINT_WEIGHTS = {
+    'binance:ticker/bookTicker': 4,  # All symbols at once
+    'binance:ticker/price': 2,
+}
+RETRY_MAX_ATTEMPTS = 3  # Retries per request on 429 / 5xx / connection errors
+RETRY_BASE_DELAY = 0.25  # Seconds; retries wait a random time up to base * 2^attempt (full jitter)
+RETRY_MAX_DELAY = 10  # Upper bound in seconds for a single retry delay
+RETRY_BUDGET_RATIO = 0.2  # Retries allowed per request made, shared by the whole process
+
+# Metrics configuration
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0')) or None  # Port for the /metrics endpoint, None keeps metrics off
+METRICS_HOST = '127.0.0.1'  # Interface the metrics endpoint listens on
+METRICS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Latency histogram bucket bounds in seconds
+
+# Local cache configuration
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+PAIR_CATALOG_TTL = 24 * 60 * 60  # Seconds a downloaded pair catalog is reused before downloading it again
+ACCOUNT_REGISTRY_TTL = 60 * 60  # Seconds the connected accounts are reused (memory and disk) before downloading them again
+METADATA_CACHE_PATH = os.path.join(CACHE_DIR, 'metadata.bin')  # Memory-mapped cache of accounts, pair catalogs and grid limits
+METADATA_REVALIDATE_AFTER = 10 * 60  # Seconds after which a cached entry is still served but downloaded again in the background
+METADATA_DRAIN_TIMEOUT = 5  # Seconds scripts wait at exit for background revalidations to be saved
+BALANCE_TTL = 60  # Seconds an account balance snapshot is reused
+DEAL_STORE_PATH = os.path.join(CACHE_DIR, 'deals.sqlite3')  # Local SQLite copy of bot deals
+DEAL_SYNC_PAGE_SIZE = 50  # Deals requested per page when syncing
+DEAL_BACKFILL_PAGES = 2  # History pages fetched per bot and refresh until the backfill is complete
+
+# HTTP cassette configuration (ThreeCommasClient only)
+CASSETTE_MODE = os.getenv('CASSETTE_MODE') or None  # 'record' saves every response, 'replay' serves them offline
+CASSETTE_PATH = os.getenv('CASSETTE_PATH', os.path.join(CACHE_DIR, 'cassette.jsonl.gz'))  # Gzip JSON lines file
+
+# Monitor configuration
+MONITOR_CONCURRENCY = 10  # Maximum number of deal requests in flight during a refresh
+MONITOR_REQUEST_TIMEOUT = 15  # Deadline in seconds for each bot's deal request
+MONITOR_BATCH_SIZE = 100  # Bots held in memory at once while streaming a refresh
+MONITOR_PRICE_MOVE = 1.0  # Percent move of a streamed price that triggers an early refresh
+MONITOR_PROFIT_DELTA = 1.0  # USD change in a bot's profit that is reported
+MONITOR_HISTORY_SIZE = 120  # Refreshes of profit history kept per bot
+MONITOR_TRACKED_DEALS = 10  # Most recent deals per bot checked for new deals and status changes
+
+# Grid planner configuration (percentages)
+GRID_MAKER_FEE = 0.1  # Fee paid by the grid's limit orders
+GRID_TAKER_FEE = 0.1  # Fee paid when buying the base currency for the initial sell orders
+GRID_MIN_NET_PROFIT = 0.1  # Minimum profit per grid after fees; grids below it are rejected before creation
+GRID_PARAMS_TTL = 60 * 60  # Seconds the exchange limits from manual_creation_params are reused per account and pair
+
+# DCA backtest fees (percentages)
+DCA_MAKER_FEE = 0.1  # Safety orders and take profit (limit orders)
+DCA_TAKER_FEE = 0.1  # Base order (market order)
+
+# Provisioning configuration
+PROVISION_CONCURRENCY = 10  # Maximum number of bots created and started at once by provision.py
+
 # Bot configuration
 DEFAULT_EXCHANGE = 'binance'  # Change this to your preferred exchange (e.g., 'kucoin', 'ftx', 'bybit')
 DEFAULT_MARKET_CODE = 'BTC_ETH'  # Default trading pair - Using format with underscore (BTC_ETH) based on available pairs
@@ -23,6 +132,7 @@ GRID_BOT_CONFIG = {
     'grids_count': 20,
     'leverage_type': 'spot',  # 'spot', 'cross', or 'isolated'
     'leverage_custom_value': 1,
+    'max_price_age': 60,  # Reject cached prices older than this many seconds when calculating the grid
 }
 
 # DCA Bot configuration
@@ -0,0 +1,197 @@
+# DCA Bot Backtester
+# Replays OHLCV candles from a local file through the safety-order strategy that DCABot
+# deploys and reports how the deals would have played out.
+
+import argparse
+import time
+
+import numpy as np
+
+from candles import load_candles, price_path
+from dca_ladder import dca_ladder, validate_ladder
+from config import DCA_BOT_CONFIG, DCA_MAKER_FEE, DCA_TAKER_FEE
+
+# Path points looked at first when searching for a deal's take profit, doubled until it is found
+DEAL_WINDOW = 256
+
+
+def direction_sign(short):
+    """+1 when safety orders sit above the entry price (short deals), -1 below it (long deals)"""
+    return 1 if short else -1
+
+
+def backtest_dca(candles, config=None, maker_fee=DCA_MAKER_FEE, taker_fee=DCA_TAKER_FEE):
+    """
+    Simulate a DCA bot over a candle series
+
+    A deal opens at a candle's open with a market base order, safety orders
+    fill as the price moves against it and the whole position closes with a
+    limit order take_profit percent beyond the average entry. The next deal
+    opens on the following candle. Each deal is simulated with array
+    operations over the intra-candle price path: the running low (high for
+    short deals) gives the number of filled safety orders at every point,
+    which gives the take-profit price to compare against.
+
+    Returns a dict with per-deal arrays (start, end in candles, duration,
+    safety_orders, profit, invested, max_capital, drawdown) and summary
+    values: deals, closed, total_profit, max_capital (quote in orders
+    plus quote reserved for active safety orders), max_drawdown,
+    stuck_deals (closed or open deals that used every safety order),
+    open_deal (bool), open_profit and equity (per candle).
+    """
+    config = config or DCA_BOT_CONFIG
+    short = config.get('strategy', 'long') == 'short'
+    maker = maker_fee / 100
+    taker = taker_fee / 100
+    problems = validate_ladder(config)
+    if problems:
+        raise Exception(f"Invalid DCA configuration: {'; '.join(problems)}")
+    ladder = dca_ladder(config)
+    deviations = ladder['deviation']
+    volumes = ladder['volume']
+    max_safety_orders = len(volumes)
+    max_active = int(config.get('max_active_safety_orders', max_safety_orders) or max_safety_orders)
+    base_volume = config['base_order_volume']
+    take_profit = config['take_profit'] / 100
+
+    # Quote paid (long) or received (short) after k safety orders, including fees
+    invested = np.concatenate(([base_volume], ladder['total_volume']))
+    volume_sums = invested - base_volume
+    fee_sums = np.concatenate(([0.0], np.cumsum(volumes * maker)))
+    settled = invested - direction_sign(short) * (base_volume * taker + fee_sums)
+    # The ladder is relative to the entry price, so it is shared by every deal
+    average_prices = np.concatenate(([1.0], ladder['average_price']))
+    take_profit_prices = np.concatenate(([1 - direction_sign(short) * take_profit], ladder['take_profit_price']))
+    # Quote still held back for the next max_active_safety_orders safety orders after k fills
+    reserved = volume_sums[np.minimum(np.arange(max_safety_orders + 1) + max_active, max_safety_orders)] - volume_sums
+
+    path = price_path(candles)
+    points = len(path)
+    unrealized = np.zeros(points)
+    realized = np.zeros(points)
+    deals = {name: [] for name in ('start', 'end', 'safety_orders', 'profit', 'invested', 'max_capital', 'drawdown')}
+    open_deal = False
+    open_profit = 0.0
+
+    start = 0
+    while start < points:
+        entry = path[start]
+        prices = entry * (1 + direction_sign(short) * deviations / 100)
+        # Base bought (long) or sold (short) after k safety orders, and the take-profit price
+        base = invested / (entry * average_prices)
+        targets = entry * take_profit_prices
+
+        window = DEAL_WINDOW
+        while True:
+            end = min(start + window, points)
+            segment = path[start:end]
+            if short:
+                filled = np.searchsorted(prices, np.maximum.accumulate(segment), side='right')
+                hit = segment <= targets[filled]
+            else:
+                filled = np.searchsorted(-prices, -np.minimum.accumulate(segment), side='right')
+                hit = segment >= targets[filled]
+            if hit.any() or end == points:
+                break
+            window *= 2
+
+        closed = bool(hit.any())
+        last = int(np.argmax(hit)) if closed else len(segment) - 1
+        filled = filled[:last + 1]
+        count = int(filled[-1])
+        exit_prices = segment[:last + 1].copy()
+        if closed:
+            exit_prices[-1] = targets[count]  # The take-profit limit order fills at its own price
+        if short:
+            value = settled[filled] - base[filled] * exit_prices * (1 + maker)
+        else:
+            value = base[filled] * exit_prices * (1 - maker) - settled[filled]
+        deal_profit = float(value[-1])
+        if closed:
+            unrealized[start:start + last] = value[:-1]
+            realized[start + last] = deal_profit
+        else:
+            unrealized[start:start + last + 1] = value
+            open_deal = True
+            open_profit = deal_profit
+
+        deals['start'].append(start // 4)
+        deals['end'].append((start + last) // 4)
+        deals['safety_orders'].append(count)
+        deals['profit'].append(deal_profit)
+        deals['invested'].append(float(invested[count]))
+        deals['max_capital'].append(float(invested[count] + reserved[count]))
+        deals['drawdown'].append(float(max(0.0, -value.min())))
+        if not closed:
+            break
+        start = ((start + last) // 4 + 1) * 4
+
+    deals = {name: np.array(values) for name, values in deals.items()}
+    candle_end = np.arange(3, points, 4)
+    equity = (np.cumsum(realized) + unrealized)[candle_end]
+    peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    closed_deals = len(deals['profit']) - int(open_deal)
+    return {
+        **deals,
+        'duration': deals['end'] - deals['start'] + 1,
+        'deals': len(deals['profit']),
+        'closed': closed_deals,
+        'total_profit': float(deals['profit'][:closed_deals].sum()),
+        'max_capital': float(deals['max_capital'].max()) if len(deals['max_capital']) else 0.0,
+        'max_drawdown': float((peak - equity).max()) if len(equity) else 0.0,
+        'stuck_deals': int((deals['safety_orders'] == max_safety_orders).sum()) if max_safety_orders else 0,
+        'open_deal': open_deal,
+        'open_profit': open_profit,
+        'equity': equity,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest a DCA bot configuration on local candle data')
+    parser.add_argument('candles', help='CSV or .npy file with OHLCV candles')
+    parser.add_argument('--strategy', choices=['long', 'short'], default=DCA_BOT_CONFIG['strategy'])
+    parser.add_argument('--base-order-volume', type=float, default=DCA_BOT_CONFIG['base_order_volume'])
+    parser.add_argument('--safety-order-volume', type=float, default=DCA_BOT_CONFIG['safety_order_volume'])
+    parser.add_argument('--max-safety-orders', type=int, default=DCA_BOT_CONFIG['max_safety_orders'])
+    parser.add_argument('--max-active-safety-orders', type=int, default=DCA_BOT_CONFIG['max_active_safety_orders'])
+    parser.add_argument('--martingale-volume-coefficient', type=float,
+                        default=DCA_BOT_CONFIG['martingale_volume_coefficient'])
+    parser.add_argument('--martingale-step-coefficient', type=float,
+                        default=DCA_BOT_CONFIG['martingale_step_coefficient'])
+    parser.add_argument('--safety-order-step-percentage', type=float,
+                        default=DCA_BOT_CONFIG['safety_order_step_percentage'])
+    parser.add_argument('--take-profit', type=float, default=DCA_BOT_CONFIG['take_profit'])
+    args = parser.parse_args()
+
+    candles = load_candles(args.candles)
+    print(f"\n📈 Loaded {len(candles['close'])} candles from {args.candles}")
+
+    config = dict(DCA_BOT_CONFIG, **{key: value for key, value in vars(args).items() if key != 'candles'})
+    start = time.perf_counter()
+    result = backtest_dca(candles, config)
+    elapsed = time.perf_counter() - start
+
+    ladder = dca_ladder(config)
+    deviations, volumes = ladder['deviation'], ladder['volume']
+    sign = '+' if config['strategy'] == 'short' else '-'
+    print(f"Safety orders at {', '.join(f'{sign}{d:.2f}' for d in deviations)}% "
+          f"({config['strategy']}, volumes {', '.join(f'{v:.2f}' for v in volumes)})")
+    duration = result['duration'][:result['closed']]
+    print(f"Deals:              {result['deals']} ({result['closed']} closed)")
+    print(f"Total profit:       {result['total_profit']:.8g}")
+    if len(duration):
+        print(f"Deal duration:      median {np.median(duration):.0f}, mean {duration.mean():.1f}, "
+              f"max {duration.max()} candles")
+        print(f"Safety orders used: mean {result['safety_orders'][:result['closed']].mean():.2f}")
+    print(f"Max capital:        {result['max_capital']:.8g}")
+    print(f"Max drawdown:       {result['max_drawdown']:.8g}")
+    print(f"Stuck deals:        {result['stuck_deals']} used every safety order")
+    if result['open_deal']:
+        print(f"Open deal:          {result['duration'][-1]} candles old, "
+              f"{result['safety_orders'][-1]} safety orders, unrealized {result['open_profit']:.8g}")
+    rate = result['deals'] / elapsed if elapsed else 0
+    print(f"⏱️ Backtest took {elapsed * 1000:.0f}ms ({rate:.0f} deals/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import time
 from three_commas_client import ThreeCommasClient
+from async_three_commas_client import call_client
+from account_registry import load_accounts, load_balances
+from dca_ladder import dca_ladder, check_capital
 from config import DCA_BOT_CONFIG, DEFAULT_EXCHANGE
 
 class DCABot:
@@ -8,7 +11,7 @@ class DCABot:
         Initialize the DCA Bot
         
         Args:
-            client: ThreeCommasClient instance
+            client: ThreeCommasClient or AsyncThreeCommasClient instance
             account_id: 3Commas account ID
             config: DCA bot configuration
         """
@@ -19,28 +22,47 @@ class DCABot:
     async def setup_account(self):
         """Find and set account ID if not provided"""
         if not self.account_id:
-            accounts = self.client.get_accounts()
-            # Find account with the specified exchange
-            for account in accounts:
-                if account['market_code'].lower() == DEFAULT_EXCHANGE.lower():
-                    self.account_id = account['id']
-                    break
-            if not self.account_id and accounts:
-                # If no account found for DEFAULT_EXCHANGE but accounts exist, use the first one
-                self.account_id = accounts[0]['id']
-                print(f"No account found for exchange {DEFAULT_EXCHANGE}, using account: {accounts[0]['name']}")
-            if not self.account_id:
+            registry = await load_accounts(self.client)
+            account = registry.default(DEFAULT_EXCHANGE)
+            if not account:
                 raise Exception(f"No account found for exchange {DEFAULT_EXCHANGE}")
+            if account['market_code'].lower() != DEFAULT_EXCHANGE.lower():
+                # If no account found for DEFAULT_EXCHANGE but accounts exist, use the first one
+                print(f"No account found for exchange {DEFAULT_EXCHANGE}, using account: {account['name']}")
+            self.account_id = account['id']
+    
+    async def check_capital(self):
+        """Refuse configurations the account cannot fund before sending anything to the API"""
+        try:
+            balances = await load_balances(self.client, self.account_id)
+        except Exception as e:
+            print(f"⚠️ Could not load balances, skipping capital check: {e}")
+            return
+        
+        price = None
+        if self.config.get('strategy') == 'short':
+            rate_data = await call_client(self.client.get_currency_rate, self.config['pair'])
+            price = float(rate_data.get('last', 0)) or None
+        
+        problems = check_capital(self.config, balances, price)
+        if problems:
+            raise Exception(f"Insufficient funds for DCA bot: {'; '.join(problems)}")
+        
+        ladder = dca_ladder(self.config)
+        deviations = ', '.join(f"{d:.2f}%" for d in ladder['deviation'])
+        print(f"Safety orders at {deviations}, up to {ladder['max_volume']:.8g} in orders per deal")
     
     async def create_bot(self):
         """Create and start the DCA Bot"""
         if not self.account_id:
             await self.setup_account()
         
+        await self.check_capital()
+        
         print(f"Creating DCA Bot with config: {self.config}")
         
         try:
-            bot = self.client.create_dca_bot(self.account_id, self.config)
+            bot = await call_client(self.client.create_dca_bot, self.account_id, self.config)
             print(f"DCA Bot created: {bot.get('id')}")
             return bot
         except Exception as e:
@@ -54,17 +76,17 @@ class DCABot:
     
     async def start_bot(self, bot_id):
         """Start the DCA Bot"""
-        result = self.client.start_bot(bot_id)
+        result = await call_client(self.client.start_bot, bot_id)
         print(f"DCA Bot started: {result}")
         return result
     
     async def stop_bot(self, bot_id):
         """Stop the DCA Bot"""
-        result = self.client.stop_bot(bot_id)
+        result = await call_client(self.client.stop_bot, bot_id)
         print(f"DCA Bot stopped: {result}")
         return result
     
     async def get_deals(self, bot_id):
         """Get deals for the DCA Bot"""
-        deals = self.client.get_bot_deals(bot_id)
+        deals = await call_client(self.client.get_bot_deals, bot_id)
         return deals
\ No newline at end of file
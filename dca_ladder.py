@@ -0,0 +1,133 @@
+import numpy as np
+
+from pair_catalog import split_pair
+
+
+def _geometric_sums(first, ratio, count):
+    """first * (1 + ratio + ... + ratio^(k-1)) for k = 1..count"""
+    k = np.arange(1, count + 1)
+    if ratio == 1:
+        return first * k
+    return first * (ratio ** k - 1) / (ratio - 1)
+
+
+def dca_ladder(config):
+    """
+    Safety order ladder of a DCA configuration
+
+    Safety order k (1-based) spends safety_order_volume * martingale_volume_coefficient^(k-1)
+    and sits safety_order_step_percentage * martingale_step_coefficient^(k-1) further from the
+    previous one, so volumes and deviations are geometric series with closed-form sums.
+
+    Returns a dict of arrays with one value per safety order:
+        volume: Quote currency spent by the order
+        deviation: Distance from the base order price in percent
+        total_volume: Base order plus every safety order up to this one
+        average_price: Average entry price after this order, relative to a base order price of 1
+        take_profit_price: Price that closes the deal after this order, relative to the base order price
+    and the scalars base_order_volume and max_volume (a fully filled deal).
+    """
+    count = int(config['max_safety_orders'])
+    short = config.get('strategy', 'long') == 'short'
+    base_volume = config['base_order_volume']
+    volume_coefficient = config.get('martingale_volume_coefficient', 1.0)
+    step_coefficient = config.get('martingale_step_coefficient', 1.0)
+
+    k = np.arange(count)
+    volume = config['safety_order_volume'] * volume_coefficient ** k
+    deviation = _geometric_sums(config['safety_order_step_percentage'], step_coefficient, count)
+    total_volume = base_volume + _geometric_sums(config['safety_order_volume'], volume_coefficient, count)
+
+    direction = 1 if short else -1
+    price = 1 + direction * deviation / 100
+    amount = base_volume + np.cumsum(volume / price)  # Base currency bought or sold, at a base order price of 1
+    average_price = total_volume / amount
+    take_profit_price = average_price * (1 - direction * config['take_profit'] / 100)
+
+    return {
+        'volume': volume,
+        'deviation': deviation,
+        'total_volume': total_volume,
+        'average_price': average_price,
+        'take_profit_price': take_profit_price,
+        'base_order_volume': float(base_volume),
+        'max_volume': float(total_volume[-1]) if count else float(base_volume),
+    }
+
+
+def validate_ladder(config):
+    """Problems with a DCA configuration that the API would reject, empty when the ladder is fine"""
+    problems = []
+    for param in ('base_order_volume', 'safety_order_volume', 'take_profit', 'safety_order_step_percentage',
+                  'martingale_volume_coefficient', 'martingale_step_coefficient'):
+        if config.get(param) is not None and config[param] <= 0:
+            problems.append(f"{param} must be positive, got {config[param]}")
+    if config.get('max_safety_orders', 0) < 0:
+        problems.append(f"max_safety_orders must not be negative, got {config['max_safety_orders']}")
+    if problems:
+        return problems
+
+    with np.errstate(divide='ignore', invalid='ignore'):  # Orders at or past -100% are reported below
+        ladder = dca_ladder(config)
+    if config.get('strategy', 'long') != 'short' and len(ladder['deviation']) and ladder['deviation'][-1] >= 100:
+        last = int(np.argmax(ladder['deviation'] >= 100)) + 1
+        problems.append(f"safety order {last} would be {ladder['deviation'][last - 1]:.2f}% below the entry price, "
+                        f"lower max_safety_orders or the step coefficients")
+    active = config.get('max_active_safety_orders')
+    if active is not None and not 0 <= active <= config['max_safety_orders']:
+        problems.append(f"max_active_safety_orders must be between 0 and max_safety_orders ({config['max_safety_orders']}), "
+                        f"got {active}")
+    return problems
+
+
+def available_balances(rows):
+    """Free amount per currency from an account balance table (position minus amount on orders)"""
+    balances = {}
+    for row in rows or []:
+        try:
+            free = float(row.get('position') or 0) - float(row.get('on_orders') or 0)
+        except (TypeError, ValueError):
+            continue
+        balances[row.get('currency_code')] = free
+    return balances
+
+
+def required_funds(config, price=None):
+    """
+    Currency and amount needed to fill every order of one deal
+
+    Long deals spend the quote currency, short deals sell the base currency,
+    which needs the current price; returns (currency, None) for short deals
+    without one.
+    """
+    base, quote = split_pair(config['pair'])
+    with np.errstate(divide='ignore', invalid='ignore'):  # Orders at or past -100% are reported below
+        ladder = dca_ladder(config)
+    if config.get('strategy', 'long') != 'short':
+        return quote, ladder['max_volume']
+    if not price:
+        return base, None
+    amount = ladder['max_volume'] / ladder['average_price'][-1] if len(ladder['volume']) else ladder['max_volume']
+    return base, amount / price
+
+
+def check_capital(config, balances, price=None, committed=0):
+    """
+    Problems when the account cannot fund every order of a deal, empty when it can
+
+    Args:
+        config: DCA bot configuration
+        balances: {currency: free amount}, see available_balances
+        price: Current price of the pair, needed for short deals
+        committed: Amount of the same currency already promised to other bots
+    """
+    currency, needed = required_funds(config, price)
+    if needed is None:
+        return []
+    available = balances.get(currency, 0.0) - committed
+    if needed <= available:
+        return []
+    ladder = dca_ladder(config)
+    return [f"a fully filled deal needs {needed:.8g} {currency} (base order {ladder['base_order_volume']:g} + "
+            f"{len(ladder['volume'])} safety orders {ladder['max_volume'] - ladder['base_order_volume']:.8g} in quote), "
+            f"only {max(available, 0):.8g} {currency} is available"]
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import DEAL_STORE_PATH, DEAL_SYNC_PAGE_SIZE, DEAL_BACKFILL_PAGES
+from async_three_commas_client import call_client
+
+
+class DealStore:
+    def __init__(self, path=DEAL_STORE_PATH):
+        """
+        Local SQLite (WAL mode) copy of bot deals with per-bot and account-wide sync cursors
+
+        Args:
+            path: Database file, or ':memory:'
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS deals (
+                    bot_id INTEGER NOT NULL,
+                    deal_id INTEGER NOT NULL,
+                    status TEXT,
+                    created_at TEXT,
+                    updated_at TEXT,
+                    final_profit REAL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (bot_id, deal_id)
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS deals_by_update ON deals (bot_id, updated_at DESC)')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    scope TEXT PRIMARY KEY,
+                    last_updated_at TEXT,
+                    last_deal_id INTEGER,
+                    backfill_offset INTEGER,
+                    synced_at REAL
+                )
+            ''')
+
+    def close(self):
+        self.conn.close()
+
+    def upsert_deals(self, bot_id, deals):
+        """Insert or replace deals for a bot"""
+        rows = []
+        for deal in deals:
+            try:
+                final_profit = float(deal.get('final_profit'))
+            except (TypeError, ValueError):
+                final_profit = None
+            rows.append((bot_id, deal['id'], deal.get('status'), deal.get('created_at'),
+                         deal.get('updated_at'), final_profit, json.dumps(deal)))
+        with self._lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO deals VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def get_recent_deals(self, bot_id, limit=50):
+        """Most recently updated deals for a bot, newest first"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT data FROM deals WHERE bot_id = ? ORDER BY updated_at DESC, deal_id DESC LIMIT ?',
+                (bot_id, limit)
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def get_cursor(self, scope):
+        """Sync state for a scope ('bot:<id>' or 'all') as a dict, or None if it was never synced"""
+        with self._lock:
+            row = self.conn.execute('SELECT * FROM sync_state WHERE scope = ?', (scope,)).fetchone()
+        return dict(row) if row else None
+
+    def set_cursor(self, scope, last_updated_at, last_deal_id, backfill_offset):
+        """Store the high-water mark and backfill position for a scope"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)',
+                (scope, last_updated_at, last_deal_id, backfill_offset, time.time())
+            )
+
+    def summary(self):
+        """Per-bot deal counts and realized profit from the local store"""
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT bot_id, COUNT(*) AS deals,
+                       SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed,
+                       COALESCE(SUM(CASE WHEN status = 'completed' THEN final_profit END), 0) AS realized_profit
+                FROM deals GROUP BY bot_id
+            ''').fetchall()
+        return {row['bot_id']: dict(row) for row in rows}
+
+
+class DealSync:
+    def __init__(self, client, store, page_size=DEAL_SYNC_PAGE_SIZE, backfill_pages=DEAL_BACKFILL_PAGES):
+        """
+        Incremental deal sync between the API and a DealStore
+
+        Each sync pages through deals ordered by updated_at (newest first) only
+        until it reaches the high-water mark, so a quiet account costs a single
+        request per refresh through sync_all. Per-bot syncs additionally spend
+        at most backfill_pages requests walking older history by offset.
+
+        Args:
+            client: ThreeCommasClient or AsyncThreeCommasClient instance
+            store: DealStore to write to
+            page_size: Deals per request
+            backfill_pages: Maximum history pages fetched per sync until backfill is complete
+        """
+        self.client = client
+        self.store = store
+        self.page_size = page_size
+        self.backfill_pages = backfill_pages
+        self.requests_made = 0
+
+    async def _fetch_page(self, bot_id, offset):
+        """One page of deals ordered by updated_at, newest first (bot_id None for every bot)"""
+        self.requests_made += 1
+        return await call_client(self.client.get_bot_deals, bot_id, limit=self.page_size, offset=offset,
+                                 order='updated_at', order_direction='desc')
+
+    def needs_sync(self, bot_id):
+        """True when a bot was never synced or its backfill is still running"""
+        cursor = self.store.get_cursor(f"bot:{bot_id}")
+        return cursor is None or cursor['backfill_offset'] is not None
+
+    async def sync_all(self):
+        """
+        Fetch deals changed since the account-wide high-water mark, for every bot
+
+        The first call only records the high-water mark, history is loaded per bot by sync_bot.
+        Returns the number of deals stored.
+        """
+        cursor = self.store.get_cursor('all') or {}
+        high_water = cursor.get('last_updated_at')
+        newest = None
+        stored = 0
+        offset = 0
+        while True:
+            page = await self._fetch_page(None, offset)
+            fresh = [deal for deal in page if not high_water or (deal.get('updated_at') or '') >= high_water]
+            if newest is None and page:
+                newest = page[0]
+            if high_water:
+                by_bot = {}
+                for deal in fresh:
+                    by_bot.setdefault(deal.get('bot_id'), []).append(deal)
+                for bot_id, deals in by_bot.items():
+                    self.store.upsert_deals(bot_id, deals)
+                stored += len(fresh)
+            offset += len(page)
+            if not high_water or len(fresh) < len(page) or len(page) < self.page_size:
+                break
+
+        if newest is not None:
+            self.store.set_cursor('all', newest.get('updated_at'), newest.get('id'), None)
+        return stored
+
+    async def sync_bot(self, bot_id):
+        """Fetch new or changed deals for a bot, returns the number of deals stored"""
+        scope = f"bot:{bot_id}"
+        cursor = self.store.get_cursor(scope) or {}
+        high_water = cursor.get('last_updated_at')
+        backfill_offset = cursor.get('backfill_offset', 0)
+        newest = None
+        stored = 0
+
+        # New or changed deals, newest first, until the high-water mark is reached
+        offset = 0
+        while True:
+            page = await self._fetch_page(bot_id, offset)
+            fresh = [deal for deal in page if not high_water or (deal.get('updated_at') or '') >= high_water]
+            if fresh:
+                self.store.upsert_deals(bot_id, fresh)
+                stored += len(fresh)
+                if newest is None:
+                    newest = fresh[0]
+            offset += len(page)
+            if not high_water:
+                # First sync: the rest of the history is picked up by the backfill below
+                backfill_offset = offset if len(page) == self.page_size else None
+                break
+            if len(fresh) < len(page) or len(page) < self.page_size:
+                break
+
+        # Older history by offset, a few pages per sync
+        pages = 0
+        while backfill_offset is not None and pages < self.backfill_pages:
+            page = await self._fetch_page(bot_id, backfill_offset)
+            pages += 1
+            if page:
+                self.store.upsert_deals(bot_id, page)
+                stored += len(page)
+            backfill_offset = backfill_offset + len(page) if len(page) == self.page_size else None
+
+        if newest is not None:
+            self.store.set_cursor(scope, newest.get('updated_at'), newest.get('id'), backfill_offset)
+        else:
+            self.store.set_cursor(scope, high_water, cursor.get('last_deal_id'), backfill_offset)
+        return stored
@@ -1,6 +1,13 @@
 import time
 from three_commas_client import ThreeCommasClient
-from config import GRID_BOT_CONFIG, DEFAULT_EXCHANGE
+from async_three_commas_client import call_client
+from account_registry import load_accounts
+from pair_catalog import split_pair, alternate_format
+from grid_planner import plan_grid, validate_grid
+from grid_params import load_grid_params, creation_limits, apply_creation_limits
+from market_stream import market_stream
+from metrics import metrics
+from config import GRID_BOT_CONFIG, DEFAULT_EXCHANGE, STREAM_MAX_AGE
 
 class GridBot:
     def __init__(self, client, account_id=None, config=None):
@@ -8,48 +15,50 @@ class GridBot:
         Initialize the Grid Bot
         
         Args:
-            client: ThreeCommasClient instance
+            client: ThreeCommasClient or AsyncThreeCommasClient instance
             account_id: 3Commas account ID
             config: Grid bot configuration
         """
         self.client = client
         self.account_id = account_id
         self.config = config or GRID_BOT_CONFIG.copy()
+        self.current_price = None
         
     async def setup_account(self):
         """Find and set account ID if not provided"""
         if not self.account_id:
-            accounts = self.client.get_accounts()
-            # Find account with the specified exchange
-            for account in accounts:
-                if account['market_code'].lower() == DEFAULT_EXCHANGE.lower():
-                    self.account_id = account['id']
-                    break
-            if not self.account_id and accounts:
-                # If no account found for DEFAULT_EXCHANGE but accounts exist, use the first one
-                self.account_id = accounts[0]['id']
-                print(f"No account found for exchange {DEFAULT_EXCHANGE}, using account: {accounts[0]['name']}")
-            if not self.account_id:
+            registry = await load_accounts(self.client)
+            account = registry.default(DEFAULT_EXCHANGE)
+            if not account:
                 raise Exception(f"No account found for exchange {DEFAULT_EXCHANGE}")
+            if account['market_code'].lower() != DEFAULT_EXCHANGE.lower():
+                # If no account found for DEFAULT_EXCHANGE but accounts exist, use the first one
+                print(f"No account found for exchange {DEFAULT_EXCHANGE}, using account: {account['name']}")
+            self.account_id = account['id']
     
     async def calculate_grid_prices(self, margin_percent=5):
         """Calculate grid prices based on current market price"""
         try:
             print(f"Fetching current price for {self.config['pair']}...")
+            max_age = self.config.get('max_price_age')
             
-            # Try to get rate with current pair format
+            # Live price from the WebSocket stream when it is running, otherwise the REST sources
+            rate_data = market_stream.get_rate(self.config['pair'], max_age if max_age is not None else STREAM_MAX_AGE)
+            if rate_data is not None:
+                metrics.inc('price_source_hits_total', ('stream',))
             try:
-                rate_data = self.client.get_currency_rate(self.config['pair'])
+                if rate_data is None:
+                    rate_data = await call_client(self.client.get_currency_rate, self.config['pair'], max_age=max_age)
                 current_price = float(rate_data.get('last', 0))
             except Exception as rate_error:
                 print(f"Error with initial rate fetch: {str(rate_error)}")
                 
                 # Try alternative pair format
-                alt_pair = self.config['pair'].replace('_', '') if '_' in self.config['pair'] else f"{self.config['pair'][:3]}_{self.config['pair'][3:]}"
+                alt_pair = alternate_format(self.config['pair'])
                 print(f"Trying alternative pair format: {alt_pair}")
                 
                 try:
-                    rate_data = self.client.get_currency_rate(alt_pair)
+                    rate_data = await call_client(self.client.get_currency_rate, alt_pair, max_age=max_age)
                     current_price = float(rate_data.get('last', 0))
                 except Exception as alt_error:
                     print(f"Error with alternative rate fetch: {str(alt_error)}")
@@ -58,7 +67,8 @@ class GridBot:
             if not current_price:
                 raise Exception(f"Failed to get current price for {self.config['pair']}")
             
-            print(f"Current price for {self.config['pair']}: {current_price}")
+            print(f"Current price for {self.config['pair']}: {current_price} (source: {rate_data.get('source', 'unknown')})")
+            self.current_price = current_price
             
             # Calculate upper and lower prices with margin_percent above and below current price
             upper_price = current_price * (1 + margin_percent / 100)
@@ -75,17 +85,7 @@ class GridBot:
             print("Using default price range based on the trading pair")
             
             # Get the base and quote currency
-            pair = self.config['pair']
-            if '_' in pair:
-                base, quote = pair.split('_')
-            else:
-                # Try to split without underscore (like BTCETH)
-                if len(pair) >= 6:  # Most crypto symbols are 3 chars each
-                    base = pair[:3]
-                    quote = pair[3:6]
-                else:
-                    base = pair[:len(pair)//2]
-                    quote = pair[len(pair)//2:]
+            base, quote = split_pair(self.config['pair'])
             
             print(f"Base currency: {base}, Quote currency: {quote}")
             
@@ -109,6 +109,24 @@ class GridBot:
             print(f"Default grid price range: {self.config['lower_price']} - {self.config['upper_price']}")
             return False
     
+    async def apply_exchange_limits(self):
+        """Clamp and round the configuration to the pair's cached manual_creation_params"""
+        try:
+            params = await load_grid_params(self.client, self.account_id, self.config['pair'])
+        except Exception as e:
+            print(f"⚠️ Could not load grid bot parameters, sending the configuration as is: {e}")
+            return
+        
+        adjusted, changes = apply_creation_limits(self.config, creation_limits(params))
+        for change in changes:
+            print(f"Adjusted to exchange limits: {change}")
+        self.config.update(adjusted)
+    
+    def plan(self):
+        """Grid levels, per-grid profit after fees and capital needed for the current configuration"""
+        return plan_grid(self.config['lower_price'], self.config['upper_price'], self.config['grids_count'],
+                         self.config['quantity_per_grid'], current_price=self.current_price)
+    
     async def create_bot(self):
         """Create and start the Grid Bot"""
         if not self.account_id:
@@ -117,10 +135,21 @@ class GridBot:
         if not self.config['upper_price'] or not self.config['lower_price']:
             await self.calculate_grid_prices()
         
+        await self.apply_exchange_limits()
+        
+        # Reject grids that cannot make money before sending anything to the API
+        plan = self.plan()
+        problems = validate_grid(plan)
+        if problems:
+            raise Exception(f"Invalid grid configuration: {'; '.join(problems)}")
+        print(f"Grid plan: {len(plan['levels'])} lines, {plan['min_net_profit_pct']:.3f}% - {plan['max_net_profit_pct']:.3f}% "
+              f"profit per grid after fees, capital needed: {plan['quote_capital']:.8g} quote + {plan['base_capital']:.8g} base "
+              f"(~{plan['total_capital']:.8g} quote)")
+        
         print(f"Creating Grid Bot with config: {self.config}")
         
         try:
-            bot = self.client.create_grid_bot(self.account_id, self.config)
+            bot = await call_client(self.client.create_grid_bot, self.account_id, self.config)
             print(f"Grid Bot created: {bot.get('id')}")
             return bot
         except Exception as e:
@@ -134,12 +163,12 @@ class GridBot:
     
     async def start_bot(self, bot_id):
         """Start the Grid Bot"""
-        result = self.client.start_bot(bot_id)
+        result = await call_client(self.client.start_grid_bot, bot_id)
         print(f"Grid Bot started: {result}")
         return result
     
     async def stop_bot(self, bot_id):
         """Stop the Grid Bot"""
-        result = self.client.stop_bot(bot_id)
+        result = await call_client(self.client.stop_grid_bot, bot_id)
         print(f"Grid Bot stopped: {result}")
         return result
\ No newline at end of file
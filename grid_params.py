@@ -0,0 +1,120 @@
+import math
+
+from config import GRID_PARAMS_TTL
+from async_three_commas_client import call_client
+from metadata_cache import metadata_cache
+
+# Names tried for each limit in manual_creation_params responses, the first is the one mock_server returns.
+# creation_limits() reports limits none of them match, so a renamed field does not go unclamped silently.
+LIMIT_FIELDS = {
+    'min_price': ('min_price', 'price_min', 'lower_price_min'),
+    'max_price': ('max_price', 'price_max', 'upper_price_max'),
+    'price_step': ('price_step', 'step_price', 'tick_size', 'price_tick'),
+    'quantity_step': ('quantity_step', 'step_size', 'lot_step', 'quantity_per_grid_step'),
+    'min_quantity': ('min_quantity', 'quantity_per_grid_min', 'min_quantity_per_grid', 'min_lot_size'),
+    'max_quantity': ('max_quantity', 'quantity_per_grid_max', 'max_quantity_per_grid', 'max_lot_size'),
+    'min_grids': ('min_grids', 'min_grids_count', 'min_grids_quantity', 'grids_quantity_min'),
+    'max_grids': ('max_grids', 'max_grids_count', 'max_grids_quantity', 'grids_quantity_max'),
+}
+
+# Decimal places, used when a response gives precisions instead of steps
+PRECISION_FIELDS = {
+    'price_step': ('price_precision',),
+    'quantity_step': ('quantity_precision', 'lot_precision'),
+}
+
+def creation_limits(params):
+    """Exchange limits from a manual_creation_params response, None (and a warning) for limits it does not give"""
+    params = params if isinstance(params, dict) else {}
+    limits = {}
+    for limit, names in LIMIT_FIELDS.items():
+        limits[limit] = None
+        for name in names:
+            try:
+                limits[limit] = float(params[name])
+                break
+            except (KeyError, TypeError, ValueError):
+                continue
+    for limit, names in PRECISION_FIELDS.items():
+        if limits[limit] is None:
+            for name in names:
+                if params.get(name) is not None:
+                    limits[limit] = 10 ** -int(params[name])
+                    break
+    missing = [limit for limit, value in limits.items() if value is None]
+    if missing:
+        print(f"⚠️ No known field for {', '.join(missing)} in manual_creation_params "
+              f"(got: {', '.join(sorted(params)) or 'nothing'}), these limits are not applied")
+    return limits
+
+
+def _to_step(value, step, rounding):
+    """Round value to a multiple of step (rounding is math.floor or math.ceil) without float noise"""
+    if not step:
+        return value
+    decimals = max(0, -math.floor(math.log10(step))) + 2
+    return round(rounding(round(value / step, 9)) * step, decimals)
+
+
+def apply_creation_limits(config, limits):
+    """
+    Clamp and round a grid configuration to the exchange limits
+
+    The range is rounded inwards to the price step and clamped to the allowed
+    prices, grids_count is clamped to the allowed count, quantity_per_grid is
+    rounded down to the quantity step and raised to the minimum when below it.
+
+    Returns (adjusted copy of config, list of 'name: old -> new' changes).
+    """
+    adjusted = dict(config)
+    if adjusted.get('lower_price') is not None:
+        lower = _to_step(adjusted['lower_price'], limits['price_step'], math.ceil)
+        if limits['min_price'] is not None:
+            lower = max(lower, limits['min_price'])
+        adjusted['lower_price'] = lower
+    if adjusted.get('upper_price') is not None:
+        upper = _to_step(adjusted['upper_price'], limits['price_step'], math.floor)
+        if limits['max_price'] is not None:
+            upper = min(upper, limits['max_price'])
+        adjusted['upper_price'] = upper
+
+    grids = adjusted['grids_count']
+    if limits['min_grids'] is not None:
+        grids = max(grids, int(limits['min_grids']))
+    if limits['max_grids'] is not None:
+        grids = min(grids, int(limits['max_grids']))
+    adjusted['grids_count'] = grids
+
+    quantity = _to_step(adjusted['quantity_per_grid'], limits['quantity_step'], math.floor)
+    if limits['min_quantity'] is not None and quantity < limits['min_quantity']:
+        quantity = _to_step(limits['min_quantity'], limits['quantity_step'], math.ceil)
+    if limits['max_quantity'] is not None:
+        quantity = min(quantity, limits['max_quantity'])
+    adjusted['quantity_per_grid'] = quantity
+
+    changes = [f"{name}: {config[name]} -> {adjusted[name]}"
+               for name in ('lower_price', 'upper_price', 'grids_count', 'quantity_per_grid')
+               if config.get(name) != adjusted.get(name)]
+    return adjusted, changes
+
+
+async def load_grid_params(client, account_id, pair, ttl=GRID_PARAMS_TTL, refresh=False):
+    """
+    manual_creation_params for a pair from the metadata cache or the API
+
+    Responses are cached per (account, pair) for ttl seconds, and concurrent
+    callers for the same key share a single request, so creating many grid
+    bots on one pair costs one request.
+
+    Args:
+        client: ThreeCommasClient or AsyncThreeCommasClient instance
+        account_id: 3Commas account ID
+        pair: Trading pair
+        ttl: Seconds a response is reused
+        refresh: Ignore the cached response
+    """
+    async def fetch():
+        return await call_client(client.get_grid_creation_params, account_id, pair)
+
+    entry = await metadata_cache.load('grid_params', f"{account_id}:{pair}", fetch, ttl, refresh)
+    return entry.value
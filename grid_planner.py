@@ -0,0 +1,136 @@
+import numpy as np
+
+from config import GRID_MAKER_FEE, GRID_TAKER_FEE, GRID_MIN_NET_PROFIT
+
+
+def grid_levels(lower_price, upper_price, grids_count, grid_type='arithmetic'):
+    """
+    Price of every grid line, from lower_price to upper_price inclusive
+
+    Args:
+        lower_price: Bottom of the grid
+        upper_price: Top of the grid
+        grids_count: Number of grid lines
+        grid_type: 'arithmetic' (same price step) or 'geometric' (same percentage step)
+    """
+    if grid_type == 'geometric':
+        return np.geomspace(lower_price, upper_price, int(grids_count))
+    return np.linspace(lower_price, upper_price, int(grids_count))
+
+
+def break_even_step(maker_fee=GRID_MAKER_FEE):
+    """Smallest step between two lines, in percent of the buy price, that still covers both fees"""
+    fee = maker_fee / 100
+    return ((1 + fee) / (1 - fee) - 1) * 100
+
+
+def plan_grids(lower_price, upper_price, grids_count, quantity_per_grid, current_price=None,
+               grid_type='arithmetic', maker_fee=GRID_MAKER_FEE, taker_fee=GRID_TAKER_FEE):
+    """
+    Plan many grid configurations at once
+
+    Every argument may be a scalar or an array, arrays are broadcast against
+    each other so each position is one candidate configuration. All levels
+    are computed in a single (candidates x lines) matrix.
+
+    Each pair of neighbouring lines is one grid: a limit buy on the lower line
+    and a limit sell on the line above, both paying the maker fee. Lines below
+    the current price start as buy orders (quote capital), lines above it as
+    sell orders whose base currency is bought up front at the taker fee.
+
+    Args:
+        lower_price: Bottom of the grid
+        upper_price: Top of the grid
+        grids_count: Number of grid lines
+        quantity_per_grid: Base currency bought or sold on each line
+        current_price: Market price, defaults to the middle of the range
+        grid_type: 'arithmetic' or 'geometric'
+        maker_fee: Fee in percent paid by the grid's limit orders
+        taker_fee: Fee in percent paid when buying the base currency for the sell orders
+
+    Returns:
+        Dict of arrays, one value per candidate: levels (NaN past each
+        candidate's last line), min/max_net_profit_pct (per grid, after fees),
+        min_net_profit (quote currency per grid), quote_capital, base_capital,
+        total_capital (in quote currency) and valid (price range and line count
+        make sense).
+    """
+    lower, upper, quantity = (np.atleast_1d(np.asarray(value, dtype=float))
+                              for value in (lower_price, upper_price, quantity_per_grid))
+    count = np.atleast_1d(np.asarray(grids_count, dtype=int))
+    geometric = np.atleast_1d(np.asarray(grid_type) == 'geometric')
+    price = (lower + upper) / 2 if current_price is None else np.atleast_1d(np.asarray(current_price, dtype=float))
+    lower, upper, quantity, count, geometric, price = np.broadcast_arrays(lower, upper, quantity, count, geometric, price)
+
+    valid = (lower > 0) & (upper > lower) & (count >= 2) & (quantity > 0)
+    # Placeholders keep invalid candidates from producing warnings, their results are discarded
+    lower = np.where(valid, lower, 1.0)
+    upper = np.where(valid, upper, 2.0)
+    count = np.where(valid, count, 2)
+
+    lines = max(int(count.max()), 2) if count.size else 2
+    index = np.arange(lines)
+    mask = index[None, :] < count[:, None]
+    t = np.minimum(index[None, :] / (count[:, None] - 1), 1.0)
+    arithmetic = lower[:, None] + (upper - lower)[:, None] * t
+    geometric_levels = lower[:, None] * (upper / lower)[:, None] ** t
+    levels = np.where(geometric[:, None], geometric_levels, arithmetic)
+
+    maker = maker_fee / 100
+    taker = taker_fee / 100
+    buys = levels[:, :-1]
+    sells = levels[:, 1:]
+    grid_mask = mask[:, 1:]
+    net_profit_pct = (sells * (1 - maker) / (buys * (1 + maker)) - 1) * 100
+    net_profit = quantity[:, None] * (sells * (1 - maker) - buys * (1 + maker))
+
+    buy_orders = mask & (levels < price[:, None])
+    sell_orders = mask & (levels > price[:, None])
+    quote_capital = quantity * np.where(buy_orders, levels, 0).sum(axis=1) * (1 + maker)
+    base_capital = quantity * sell_orders.sum(axis=1)
+
+    return {
+        'levels': np.where(mask, levels, np.nan),
+        'min_net_profit_pct': np.where(valid, np.where(grid_mask, net_profit_pct, np.inf).min(axis=1), np.nan),
+        'max_net_profit_pct': np.where(valid, np.where(grid_mask, net_profit_pct, -np.inf).max(axis=1), np.nan),
+        'min_net_profit': np.where(valid, np.where(grid_mask, net_profit, np.inf).min(axis=1), np.nan),
+        'quote_capital': np.where(valid, quote_capital, np.nan),
+        'base_capital': np.where(valid, base_capital, np.nan),
+        'total_capital': np.where(valid, quote_capital + base_capital * price * (1 + taker), np.nan),
+        'valid': valid,
+    }
+
+
+def plan_grid(lower_price, upper_price, grids_count, quantity_per_grid, current_price=None,
+              grid_type='arithmetic', maker_fee=GRID_MAKER_FEE, taker_fee=GRID_TAKER_FEE):
+    """
+    Plan one grid configuration
+
+    Returns a dict with the grid levels, net_profit / net_profit_pct for every
+    grid, the summary values from plan_grids as floats, and break_even_step.
+    """
+    batch = plan_grids(lower_price, upper_price, grids_count, quantity_per_grid, current_price,
+                       grid_type, maker_fee, taker_fee)
+    plan = {key: (bool(value[0]) if key == 'valid' else float(value[0]))
+            for key, value in batch.items() if key != 'levels'}
+    levels = batch['levels'][0]
+    levels = levels[~np.isnan(levels)]
+    maker = maker_fee / 100
+    plan['levels'] = levels
+    plan['net_profit_pct'] = (levels[1:] * (1 - maker) / (levels[:-1] * (1 + maker)) - 1) * 100
+    plan['net_profit'] = quantity_per_grid * (levels[1:] * (1 - maker) - levels[:-1] * (1 + maker))
+    plan['break_even_step'] = break_even_step(maker_fee)
+    return plan
+
+
+def validate_grid(plan, min_net_profit=GRID_MIN_NET_PROFIT):
+    """Problems that would make a planned grid lose money or be rejected, empty when the grid is fine"""
+    if not plan['valid']:
+        return ["upper_price must be above lower_price, grids_count at least 2 and quantity_per_grid positive"]
+    problems = []
+    if plan['min_net_profit_pct'] < min_net_profit:
+        problems.append(
+            f"narrowest grid earns {plan['min_net_profit_pct']:.3f}% after fees, below the {min_net_profit}% minimum "
+            f"(each step needs at least {plan['break_even_step'] + min_net_profit:.3f}%, use fewer grids or a wider range)"
+        )
+    return problems
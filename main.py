@@ -1,6 +1,10 @@
 import asyncio
 import argparse
 from three_commas_client import ThreeCommasClient
+from async_three_commas_client import AsyncThreeCommasClient, iter_client
+from account_registry import load_accounts
+from pair_catalog import load_pair_catalog
+from metadata_cache import metadata_cache
 from grid_bot import GridBot
 from dca_bot import DCABot
 from config import GRID_BOT_CONFIG, DCA_BOT_CONFIG, DEFAULT_EXCHANGE
@@ -12,11 +16,16 @@ async def main():
     parser.add_argument('--pair', type=str, help='Trading pair (e.g. BTC_ETH)')
     parser.add_argument('--account-id', type=int, help='3Commas account ID')
     parser.add_argument('--test-mode', action='store_true', help='Run in test mode without creating actual bots')
+    parser.add_argument('--async-client', action='store_true', help='Use the asyncio client with pooled connections')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='Download accounts, pairs and grid limits again instead of using the metadata cache')
     
     args = parser.parse_args()
+    if args.refresh_cache:
+        metadata_cache.expire()
     
     print("\n🔄 Connecting to 3Commas API...")
-    client = ThreeCommasClient()
+    client = AsyncThreeCommasClient() if args.async_client else ThreeCommasClient()
     
     # Update configs if pair is provided
     if args.pair:
@@ -27,19 +36,22 @@ async def main():
         # Fetch and display available trading pairs for reference
         print("📋 Fetching available trading pairs...")
         try:
-            available_pairs = client.get_available_pairs('binance')
-            if available_pairs:
-                print(f"First 5 available pairs on Binance: {available_pairs[:5]}")
-                print(f"Total available pairs: {len(available_pairs)}")
+            catalog = await load_pair_catalog(client, 'binance')
+            if catalog:
+                print(f"First 5 available pairs on Binance: {catalog.pairs[:5]}")
+                print(f"Total available pairs: {len(catalog)}")
                 
                 # Check if the configured pair exists
                 configured_pair = GRID_BOT_CONFIG['pair']
-                if configured_pair in available_pairs:
+                exchange_pair = catalog.normalize(configured_pair)
+                if exchange_pair == configured_pair:
                     print(f"✅ Pair '{configured_pair}' is valid")
+                elif exchange_pair:
+                    print(f"✅ Pair '{configured_pair}' is valid (listed as '{exchange_pair}')")
                 else:
                     print(f"⚠️ Warning: Pair '{configured_pair}' was not found in available pairs")
                     # Try to find similar pairs
-                    similar_pairs = [p for p in available_pairs if configured_pair.split('_')[0] in p]
+                    similar_pairs = catalog.similar(configured_pair) or catalog.suggest(configured_pair)
                     if similar_pairs:
                         print(f"Similar pairs found: {similar_pairs[:5]}")
                         print(f"Consider using one of these instead")
@@ -48,10 +60,10 @@ async def main():
         
         # Get account information
         print("\n📊 Checking exchange accounts...")
-        accounts = client.get_accounts()
-        print(f"Available accounts: {len(accounts)}")
+        registry = await load_accounts(client)
+        print(f"Available accounts: {len(registry)}")
         
-        if len(accounts) == 0:
+        if len(registry) == 0:
             print("\n⚠️ No exchange accounts connected to 3Commas!")
             print("Please follow these steps:")
             print("1. Log in to your 3Commas account")
@@ -60,23 +72,19 @@ async def main():
             print("4. Come back and run this script again\n")
             return
         
-        for account in accounts:
+        for account in registry:
             account_type = account.get('type', 'Unknown')
             print(f"Account: {account['name']} ({account['market_code']}), Type: {account_type}, ID: {account['id']}")
         
         account_id = args.account_id
-        if not account_id and accounts:
-            # Try to find the account for the specified exchange
-            for account in accounts:
-                if account['market_code'].lower() == DEFAULT_EXCHANGE.lower():
-                    account_id = account['id']
-                    print(f"Found account for {DEFAULT_EXCHANGE}: {account['name']} (ID: {account_id})")
-                    break
-            
-            # If no account found for DEFAULT_EXCHANGE, use first account
-            if not account_id:
-                account_id = accounts[0]['id']
-                print(f"No account found for {DEFAULT_EXCHANGE}, using account: {accounts[0]['name']} (ID: {account_id})")
+        if not account_id:
+            # Try to find the account for the specified exchange, otherwise use the first account
+            account = registry.default(DEFAULT_EXCHANGE)
+            account_id = account['id']
+            if account['market_code'].lower() == DEFAULT_EXCHANGE.lower():
+                print(f"Found account for {DEFAULT_EXCHANGE}: {account['name']} (ID: {account_id})")
+            else:
+                print(f"No account found for {DEFAULT_EXCHANGE}, using account: {account['name']} (ID: {account_id})")
         
         # Test mode notification
         if args.test_mode:
@@ -141,16 +149,18 @@ async def main():
         if not args.test_mode:
             try:
                 print("\n📊 Checking active bots...")
-                active_bots = client.get_active_bots()
-                print(f"Active bots: {len(active_bots)}")
+                active_count = 0
+                async for bot in iter_client(client.iter_bots, scope='enabled'):
+                    if active_count == 0:
+                        print("\nCurrent active bots:")
+                    active_count += 1
+                    bot_type = bot.get('type', 'Unknown')
+                    bot_pairs = bot.get('pairs', 'Unknown')
+                    profit = bot.get('profit', {}).get('usd', 0)
+                    print(f"Bot: {bot['name']}, Type: {bot_type}, Pair: {bot_pairs}, Profit: ${profit}")
                 
-                if active_bots:
-                    print("\nCurrent active bots:")
-                    for bot in active_bots:
-                        bot_type = bot.get('type', 'Unknown')
-                        bot_pairs = bot.get('pairs', 'Unknown')
-                        profit = bot.get('profit', {}).get('usd', 0)
-                        print(f"Bot: {bot['name']}, Type: {bot_type}, Pair: {bot_pairs}, Profit: ${profit}")
+                if active_count:
+                    print(f"Active bots: {active_count}")
                 else:
                     print("No active bots found. The bots might still be initializing.")
             except Exception as bot_error:
@@ -163,6 +173,11 @@ async def main():
         print("2. Your internet connection")
         print("3. The 3Commas service status")
         print("4. Run with --test-mode flag to check configuration without creating bots")
+    finally:
+        # Background cache revalidations still use the client
+        await metadata_cache.drain()
+        if isinstance(client, AsyncThreeCommasClient):
+            await client.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,265 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from config import (BINANCE_API_URL, BINANCE_TIMEOUT, BINANCE_STREAM_URL, STREAM_MAX_AGE, STREAM_HEARTBEAT,
+                    STREAM_SUBSCRIBE_BATCH, STREAM_RECONNECT_MAX_DELAY)
+from pair_catalog import split_pair
+from price_graph import PriceGraph
+from rate_limiter import backoff_delay, rate_limiter
+
+
+class Quote:
+    """Best bid and ask of a pair, never modified once published"""
+    __slots__ = ('pair', 'bid', 'ask', 'received_at', 'source')
+
+    def __init__(self, pair, bid, ask, received_at, source):
+        self.pair = pair
+        self.bid = bid
+        self.ask = ask
+        self.received_at = received_at
+        self.source = source
+
+    @property
+    def mid(self):
+        return (self.bid + self.ask) / 2
+
+    @property
+    def age(self):
+        """Seconds since the quote was received"""
+        return time.monotonic() - self.received_at
+
+    def as_rate(self):
+        """Rate dict in the format returned by get_currency_rate"""
+        return {'last': self.mid, 'bid': self.bid, 'ask': self.ask, 'source': self.source, 'age': self.age}
+
+
+def stream_symbol(pair):
+    """Binance symbol of a pair (BTC_USDT -> BTCUSDT)"""
+    base, quote = split_pair(pair)
+    return f"{base}{quote}".upper()
+
+
+class MarketStream:
+    def __init__(self, url=BINANCE_STREAM_URL, rest_url=BINANCE_API_URL, price_graph=None):
+        """
+        Live best bid/ask prices from the Binance bookTicker WebSocket streams
+
+        One connection carries every subscribed pair. The connection is
+        re-established after errors with jittered backoff, every stream is
+        subscribed again, and prices missed while disconnected are backfilled
+        from a bulk REST ticker download.
+
+        Quotes are published by replacing immutable Quote objects in a dict,
+        so readers (GridBot, the monitor, other threads) never take a lock.
+
+        Args:
+            url: WebSocket endpoint
+            rest_url: REST base URL used for backfills
+            price_graph: PriceGraph loaded by backfills (a new one by default)
+        """
+        self.url = url
+        self.rest_url = rest_url.rstrip('/')
+        self.price_graph = price_graph or PriceGraph()
+        self.quotes = {}  # pair -> Quote
+        self.messages = 0
+        self.reconnects = 0
+        self.started_at = None
+        self._symbols = {}  # Binance symbol -> pair as subscribed
+        self._watchers = []  # (pairs, reference mids, percent, future) of wait_for_move callers
+        self._session = None
+        self._ws = None
+        self._task = None
+        self._next_id = 0
+
+    @property
+    def connected(self):
+        return self._ws is not None and not self._ws.closed
+
+    def get(self, pair, max_age=STREAM_MAX_AGE):
+        """Latest quote for a pair, or None when it is missing or older than max_age"""
+        quote = self.quotes.get(pair)
+        if quote is None or (max_age is not None and quote.age > max_age):
+            return None
+        return quote
+
+    def get_rate(self, pair, max_age=STREAM_MAX_AGE):
+        """Latest price of a pair as a rate dict, or None (see get)"""
+        quote = self.get(pair, max_age)
+        return quote.as_rate() if quote else None
+
+    def rate(self):
+        """Messages per second since the first connection was opened"""
+        if not self.started_at:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.messages / elapsed if elapsed else 0.0
+
+    async def subscribe(self, pairs):
+        """Add pairs to the stream, starting it when needed"""
+        new = {}
+        for pair in pairs:
+            symbol = stream_symbol(pair)
+            if symbol not in self._symbols:
+                self._symbols[symbol] = pair
+                new[symbol] = pair
+        if self._task is None or self._task.done():
+            self.start()
+        elif new and self.connected:
+            await self._send('SUBSCRIBE', list(new))
+
+    async def unsubscribe(self, pairs):
+        """Remove pairs from the stream"""
+        symbols = [stream_symbol(pair) for pair in pairs if stream_symbol(pair) in self._symbols]
+        for symbol in symbols:
+            self.quotes.pop(self._symbols.pop(symbol), None)
+        if symbols and self.connected:
+            await self._send('UNSUBSCRIBE', symbols)
+
+    def start(self):
+        """Run the connection loop in the background (must be called from a running event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        """Close the connection and stop reconnecting"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._ws = None
+
+    async def wait_connected(self, timeout=None):
+        """Wait until the stream is connected, returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.connected:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def wait_for_move(self, pairs, percent, timeout):
+        """
+        Wait until the price of any of the pairs moves more than percent
+
+        Moves are measured from the prices when the call started. Returns the
+        pair that moved, or None when timeout expires first.
+        """
+        pairs = set(pairs)
+        reference = {pair: self.quotes[pair].mid for pair in pairs if pair in self.quotes}
+        future = asyncio.get_running_loop().create_future()
+        watcher = (pairs, reference, percent / 100, future)
+        self._watchers.append(watcher)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._watchers.remove(watcher)
+
+    def _publish(self, quote):
+        self.quotes[quote.pair] = quote
+        for pairs, reference, threshold, future in self._watchers:
+            if quote.pair not in pairs or future.done():
+                continue
+            start = reference.setdefault(quote.pair, quote.mid)
+            if abs(quote.mid - start) > start * threshold:
+                future.set_result(quote.pair)
+
+    def handle(self, message):
+        """Publish one bookTicker message (raw or combined-stream format)"""
+        data = message.get('data', message)
+        pair = self._symbols.get(data.get('s'))
+        if pair is None:
+            return  # Subscription replies and pairs unsubscribed in the meantime
+        try:
+            bid = float(data['b'])
+            ask = float(data['a'])
+        except (KeyError, TypeError, ValueError):
+            return
+        if bid <= 0 or ask <= 0:
+            return
+        self.messages += 1
+        self._publish(Quote(pair, bid, ask, time.monotonic(), 'stream'))
+
+    async def _send(self, method, symbols):
+        """Send (UN)SUBSCRIBE in batches, paced below the Binance message limit"""
+        for i in range(0, len(symbols), STREAM_SUBSCRIBE_BATCH):
+            if i:
+                await asyncio.sleep(0.25)
+            self._next_id += 1
+            params = [f"{symbol.lower()}@bookTicker" for symbol in symbols[i:i + STREAM_SUBSCRIBE_BATCH]]
+            await self._ws.send_json({'method': method, 'params': params, 'id': self._next_id})
+
+    async def backfill(self):
+        """Fill in prices from one bulk REST download, keeping any newer streamed quote"""
+        started = time.monotonic()
+        await rate_limiter.acquire_async('binance', 'ticker/bookTicker')
+        try:
+            async with self._session.get(f"{self.rest_url}/api/v3/ticker/bookTicker",
+                                         timeout=aiohttp.ClientTimeout(total=BINANCE_TIMEOUT)) as response:
+                rate_limiter.update('binance', response.status, response.headers)
+                if response.status != 200:
+                    print(f"Price stream backfill failed with status {response.status}")
+                    return 0
+                snapshot = self.price_graph.load(await response.json())
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error backfilling price stream: {str(e)}")
+            return 0
+
+        filled = 0
+        for pair in list(self._symbols.values()):
+            current = self.quotes.get(pair)
+            rate = snapshot.rates.get(split_pair(pair))
+            if rate is None or (current is not None and current.received_at >= started):
+                continue
+            mid, spread = rate
+            self._publish(Quote(pair, mid * (1 - spread / 2), mid * (1 + spread / 2), started, 'backfill'))
+            filled += 1
+        return filled
+
+    async def _run(self):
+        """Connect, subscribe, backfill and read messages until stopped, reconnecting on errors"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        attempt = 0
+        while True:
+            try:
+                async with self._session.ws_connect(self.url, heartbeat=STREAM_HEARTBEAT) as ws:
+                    self._ws = ws
+                    self.started_at = self.started_at or time.monotonic()
+                    attempt = 0
+                    if self._symbols:
+                        await self._send('SUBSCRIBE', list(self._symbols))
+                    backfill = asyncio.create_task(self.backfill())
+                    try:
+                        async for message in ws:
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                self.handle(json.loads(message.data))
+                            elif message.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE):
+                                break
+                    finally:
+                        backfill.cancel()
+                print("Price stream disconnected, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Price stream error: {str(e)}")
+            finally:
+                self._ws = None
+            self.reconnects += 1
+            await asyncio.sleep(backoff_delay(attempt, cap=STREAM_RECONNECT_MAX_DELAY))
+            attempt += 1
+
+
+# Shared by every bot and the monitor in the process
+market_stream = MarketStream()
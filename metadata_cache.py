@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from config import METADATA_CACHE_PATH, METADATA_REVALIDATE_AFTER, METADATA_DRAIN_TIMEOUT
+
+MAGIC = b'3CMC'
+FORMAT_VERSION = 1
+# magic, format version, reserved, entry count, written at
+HEADER = struct.Struct('<4sHHId')
+# kind, key length, version stamp, fetched at, payload offset, payload length (followed by the key)
+INDEX_ENTRY = struct.Struct('<BHQdQI')
+KINDS = {'accounts': 1, 'pair_catalog': 2, 'grid_params': 3}
+KIND_NAMES = {number: kind for kind, number in KINDS.items()}
+# Kinds stored as newline-separated strings instead of JSON
+LINE_KINDS = {'pair_catalog'}
+
+
+def _encode(kind, value):
+    if kind in LINE_KINDS:
+        return '\n'.join(value).encode()
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def _decode(kind, payload):
+    if kind in LINE_KINDS:
+        return payload.decode().split('\n') if payload else []
+    return json.loads(payload)
+
+
+def _version(payload):
+    """Content stamp of a payload, equal stamps mean an unchanged value"""
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), 'little')
+
+
+class CachedEntry:
+    """A cached value with its version stamp and download time"""
+    __slots__ = ('kind', 'key', 'version', 'fetched_at', '_payload', '_value')
+
+    def __init__(self, kind, key, version, fetched_at, payload=None, value=None):
+        self.kind = kind
+        self.key = key
+        self.version = version
+        self.fetched_at = fetched_at
+        self._payload = payload  # Encoded bytes, None once only the decoded value is needed
+        self._value = value
+
+    @property
+    def value(self):
+        """Decoded value, decoded on first use"""
+        if self._value is None:
+            self._value = _decode(self.kind, self._payload)
+        return self._value
+
+    @property
+    def payload(self):
+        if self._payload is None:
+            self._payload = _encode(self.kind, self._value)
+        return self._payload
+
+    @property
+    def age(self):
+        """Seconds since the value was downloaded"""
+        return time.time() - self.fetched_at
+
+
+class MetadataCache:
+    def __init__(self, path=METADATA_CACHE_PATH, revalidate_after=METADATA_REVALIDATE_AFTER):
+        """
+        Accounts, pair catalogs and grid creation limits in one memory-mapped binary file
+
+        The file holds a small index (kind, key, version stamp, download time,
+        payload offset) followed by the payloads, so a cold start maps it and
+        decodes only the entries it asks for. Entries older than
+        revalidate_after are served immediately and downloaded again in the
+        background; the file is only rewritten when the version stamp changed.
+
+        Args:
+            path: Cache file
+            revalidate_after: Seconds after which a served entry is refreshed in the background
+        """
+        self.path = path
+        self.revalidate_after = revalidate_after
+        self.expired_before = 0.0  # Entries downloaded before this Unix time are ignored
+        self._entries = None  # (kind, key) -> CachedEntry, read on first use
+        self._pending = {}  # (kind, key) -> future of a download in flight
+        self._revalidating = {}  # (kind, key) -> background revalidation task
+        self._lock = threading.Lock()
+
+    def _read(self):
+        """Entries of the cache file, an empty dict when it is missing or unreadable"""
+        try:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < HEADER.size:
+                    return {}
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    return self._parse(view)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Ignoring unreadable metadata cache {self.path}: {e}")
+            return {}
+
+    def _parse(self, view):
+        magic, format_version, _, count, _ = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"unknown format {magic!r} v{format_version}")
+        entries = {}
+        position = HEADER.size
+        for _ in range(count):
+            kind_number, key_length, version, fetched_at, offset, length = INDEX_ENTRY.unpack_from(view, position)
+            position += INDEX_ENTRY.size
+            key = view[position:position + key_length].decode()
+            position += key_length
+            kind = KIND_NAMES.get(kind_number)
+            if kind is None or offset + length > len(view):
+                raise ValueError(f"bad index entry for {key}")
+            # Payloads are copied out of the mapping, so the file can be replaced while they are in use
+            entries[(kind, key)] = CachedEntry(kind, key, version, fetched_at, view[offset:offset + length])
+        return entries
+
+    def _load(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._read()
+        return self._entries
+
+    def _write(self):
+        """Merge newer entries written by other processes, then replace the file atomically"""
+        with self._lock:
+            on_disk = self._read()
+            for key, entry in on_disk.items():
+                current = self._entries.get(key)
+                if current is None or entry.fetched_at > current.fetched_at:
+                    self._entries[key] = entry
+            entries = list(self._entries.values())
+
+            index = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(entries), time.time()))
+            keys = [entry.key.encode() for entry in entries]
+            offset = len(index) + sum(INDEX_ENTRY.size + len(key) for key in keys)
+            for entry, key in zip(entries, keys):
+                index += INDEX_ENTRY.pack(KINDS[entry.kind], len(key), entry.version, entry.fetched_at, offset,
+                                          len(entry.payload))
+                index += key
+                offset += len(entry.payload)
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(index)
+                for entry in entries:
+                    f.write(entry.payload)
+            os.replace(tmp_file, self.path)
+
+    def get(self, kind, key):
+        """Cached entry, or None when missing or expired by expire()"""
+        entry = self._load().get((kind, str(key)))
+        if entry is None or entry.fetched_at < self.expired_before:
+            return None
+        return entry
+
+    def put(self, kind, key, value, fetched_at=None):
+        """Store and persist a downloaded value, returns its entry (empty values are not cached)"""
+        payload = _encode(kind, value)
+        entry = CachedEntry(kind, str(key), _version(payload), fetched_at or time.time(), payload, value)
+        if value:
+            self._load()[(kind, entry.key)] = entry
+            self._save()
+        return entry
+
+    def _save(self):
+        try:
+            self._write()
+        except OSError as e:
+            print(f"Could not write metadata cache: {e}")
+
+    def expire(self):
+        """Ignore every entry downloaded so far, e.g. for --refresh-cache"""
+        self.expired_before = time.time()
+
+    async def load(self, kind, key, fetch, ttl, refresh=False):
+        """
+        Entry for (kind, key) from the cache or from fetch(), a coroutine function
+
+        Entries younger than ttl are served without a request, and refreshed in
+        the background once older than revalidate_after. Concurrent callers
+        share a single download.
+        """
+        key = str(key)
+        entry = None if refresh else self.get(kind, key)
+        if entry is not None and entry.age <= ttl:
+            if entry.age > self.revalidate_after:
+                self._revalidate(kind, key, fetch)
+            return entry
+
+        pending = self._pending.get((kind, key))
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(kind, key)] = future
+        try:
+            entry = self.put(kind, key, await fetch())
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when nobody else was waiting
+            raise
+        finally:
+            self._pending.pop((kind, key), None)
+
+    def _revalidate(self, kind, key, fetch):
+        if (kind, key) in self._revalidating:
+            return
+        task = asyncio.get_running_loop().create_task(self._refresh(kind, key, fetch))
+        self._revalidating[(kind, key)] = task
+        task.add_done_callback(lambda _: self._revalidating.pop((kind, key), None))
+
+    async def _refresh(self, kind, key, fetch):
+        """Download an entry again, rewriting the file only when its version stamp changed"""
+        try:
+            value = await fetch()
+        except Exception as e:
+            print(f"Background refresh of {kind} {key} failed: {e}")
+            return
+        payload = _encode(kind, value)
+        current = self._load().get((kind, key))
+        if current is not None and current.version == _version(payload):
+            current.fetched_at = time.time()
+            self._save()
+        else:
+            self.put(kind, key, value)
+
+    async def drain(self, timeout=METADATA_DRAIN_TIMEOUT):
+        """Wait for background revalidations to finish, so short-lived scripts still persist them"""
+        tasks = list(self._revalidating.values())
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+
+# Shared by every loader in the process
+metadata_cache = MetadataCache()
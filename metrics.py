@@ -0,0 +1,153 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_HOST, METRICS_BUCKETS
+
+# name -> (type, help, label names)
+METRICS = {
+    'threecommas_requests_total': ('counter', '3Commas API requests by endpoint and status', ('endpoint', 'status')),
+    'threecommas_request_duration_seconds': ('histogram', '3Commas API request latency', ('endpoint',)),
+    'threecommas_retries_total': ('counter', '3Commas API requests retried', ('endpoint',)),
+    'threecommas_errors_total': ('counter', '3Commas API requests that failed after retries', ('endpoint', 'code')),
+    'price_source_hits_total': ('counter', 'Prices resolved per source, including hardcoded fallbacks', ('source',)),
+    'price_cache_hits_total': ('counter', 'Prices served from the price cache', ('state',)),
+    'singleflight_shared_total': ('counter', 'Client calls answered by an identical call already in flight', ('method',)),
+    'circuit_breaker_state': ('gauge', 'Price source circuit state (0 closed, 1 half-open, 2 open)',
+                              ('source', 'pair_class')),
+    'circuit_breaker_transitions_total': ('counter', 'Price source circuit state changes',
+                                          ('source', 'pair_class', 'state')),
+    'circuit_breaker_skipped_total': ('counter', 'Price source calls skipped by an open circuit', ('source', 'pair_class')),
+    'monitor_refresh_duration_seconds': ('histogram', 'Duration of a monitor refresh', ()),
+    'monitor_bots': ('gauge', 'Active bots in the last monitor refresh', ()),
+    'monitor_deals': ('gauge', 'Deals fetched in the last monitor refresh', ()),
+    'monitor_deal_errors': ('gauge', 'Bots whose deals could not be fetched in the last monitor refresh', ()),
+    'monitor_changes': ('gauge', 'Changes reported by the last monitor refresh', ()),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metrics:
+    def __init__(self, buckets=METRICS_BUCKETS):
+        """
+        In-process counters, gauges and histograms rendered in the Prometheus text format
+
+        Recording is a no-op until enable() (or start_server) is called, so
+        instrumented code costs a single attribute check when metrics are off.
+
+        Args:
+            buckets: Upper bounds in seconds of the histogram buckets
+        """
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self._values = {name: {} for name in METRICS}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def enable(self):
+        self.enabled = True
+
+    def inc(self, name, labels=(), value=1):
+        """Add value to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._values[name]
+            series[labels] = series.get(labels, 0) + value
+
+    def set(self, name, value, labels=()):
+        """Set a gauge"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values[name][labels] = value
+
+    def observe(self, name, value, labels=()):
+        """Record one histogram sample"""
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def get(self, name, labels=()):
+        """Current value of a counter or gauge (0 when never recorded)"""
+        with self._lock:
+            return self._values[name].get(labels, 0)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, label_names) in METRICS.items():
+                series = self._values[name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(series.items()):
+                    if kind != 'histogram':
+                        lines.append(f"{name}{_labels(label_names, labels)} {value}")
+                        continue
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                        cumulative += bucket_count
+                        le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                        lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(label_names, labels)} {total}")
+                    lines.append(f"{name}_count{_labels(label_names, labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self, port, host=METRICS_HOST):
+        """Enable recording and serve /metrics from a background thread, returns the bound port"""
+        self.enable()
+        if self._server is not None:
+            return self._server.server_address[1]
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console output
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='metrics').start()
+        return self._server.server_address[1]
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Shared by every client and script in the process
+metrics = Metrics()
@@ -0,0 +1,584 @@
+# Local 3Commas / Binance Mock Server
+# Serves the accounts, bots, grid_bots and deals endpoints of the 3Commas API and the Binance
+# ticker endpoints from an in-memory fleet, with deal churn, simulated latency, injected
+# 429 / 5xx responses and rate-limit headers. Point the clients at it with
+# 3COMMAS_API_URL and BINANCE_API_URL to load-test them without touching the real services.
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import islice
+
+from aiohttp import web
+
+API_PREFIX = '/public/api/ver1/'
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+LOGNORMAL_SIGMA = 1.0  # Spread of the lognormal latency distribution (its mean stays at --latency)
+TICK = 0.1  # Seconds between churn and price updates
+PRICE_DRIFT = 0.0005  # Standard deviation of each price's relative move per tick
+# Binance request weight: (one symbol, every symbol)
+BINANCE_WEIGHTS = {'price': (2, 4), 'bookTicker': (2, 4)}
+BASE_PRICES = {'BTC': 66000, 'ETH': 3500, 'BNB': 580, 'SOL': 150, 'XRP': 0.52, 'ADA': 0.45, 'DOGE': 0.15,
+               'LTC': 80, 'LINK': 14, 'DOT': 7}
+
+
+def _timestamp(seconds):
+    """ISO 8601 with milliseconds, which sorts as a string like the 3Commas timestamps"""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def _int(value, default, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    value = max(0, value)
+    return min(value, maximum) if maximum else value
+
+
+class WindowLimit:
+    def __init__(self, limit, window):
+        """Fixed-window request (or weight) counter, as reported by rate-limit headers"""
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.window_end = 0.0
+
+    def hit(self, weight, now):
+        """Count a request, True while the window's limit is not exceeded"""
+        if now >= self.window_end:
+            self.used = 0
+            self.window_end = now - now % self.window + self.window
+        self.used += weight
+        return self.used <= self.limit
+
+    def remaining(self):
+        return max(0, self.limit - self.used)
+
+    def reset_in(self, now):
+        return max(0.0, self.window_end - now)
+
+
+class Fleet:
+    def __init__(self, bots=1000, grid_bots=100, deals_per_bot=5, accounts=2, pairs=200, seed=None):
+        """
+        In-memory accounts, pairs, bots, grid bots and deals behind the mock server
+
+        Serialized responses are cached until the data behind them changes, so
+        repeated reads cost a dictionary lookup. Deals are also indexed by
+        update time, so paging by updated_at works like the real API.
+        """
+        self.random = random.Random(seed)
+        now = time.time()
+        self.accounts = [{'id': i, 'name': f"Mock Binance {i}", 'market_code': 'binance', 'exchange_name': 'Binance',
+                          'type': 'binance', 'created_at': _timestamp(now)} for i in range(1, accounts + 1)]
+
+        bases = list(BASE_PRICES) + [f"COIN{i}" for i in range(max(0, pairs - len(BASE_PRICES)))]
+        self.prices = {f"{base}_USDT": BASE_PRICES.get(base) or round(self.random.uniform(0.01, 500), 4)
+                       for base in bases[:pairs]}
+        self.prices['ETH_BTC'] = round(BASE_PRICES['ETH'] / BASE_PRICES['BTC'], 6)
+        self.symbols = {pair.replace('_', ''): pair for pair in self.prices}
+        pair_names = list(self.prices)
+
+        self.bots = {}
+        self.grid_bots = {}
+        self.deals = {}  # deal ID -> deal, in creation order
+        self.bot_deals = {}  # bot ID -> deal IDs in creation order
+        self.updated = OrderedDict()  # deal IDs, least recently updated first
+        self.bot_updated = {}  # bot ID -> deal IDs, least recently updated first
+        self.next_bot_id = 1
+        self.next_deal_id = 1
+        self.churned = 0
+        self._cache = {}  # Serialized responses of fleet-wide reads
+        self._deal_cache = {}  # bot ID -> serialized deal pages
+
+        for i in range(bots):
+            bot = self._add_bot(self.accounts[i % len(self.accounts)]['id'], f"Mock DCA {i + 1}",
+                                pair_names[i % len(pair_names)], is_enabled=i % 10 != 9)
+            started = now - deals_per_bot * 3600
+            for k in range(deals_per_bot):
+                active = k == deals_per_bot - 1
+                self._open_deal(bot, started + k * 3600)
+                if not active:
+                    self._close_deal(bot, self.bot_deals[bot['id']][-1], started + k * 3600 + 1800)
+        for i in range(grid_bots):
+            self._add_grid_bot(self.accounts[i % len(self.accounts)]['id'], f"Mock Grid {i + 1}",
+                               pair_names[i % len(pair_names)], is_enabled=True)
+        # History was added bot by bot, order it by update time across the fleet
+        self.updated = OrderedDict((deal_id, None) for deal_id in
+                                   sorted(self.updated, key=lambda deal_id: self.deals[deal_id]['updated_at']))
+
+    def _add_bot(self, account_id, name, pair, is_enabled, settings=None):
+        """Add a DCA bot trading pair (a pair or a list of pairs)"""
+        bot_id = self.next_bot_id
+        self.next_bot_id += 1
+        pairs = list(pair) if isinstance(pair, (list, tuple)) else [pair]
+        bot = dict(settings or {}, id=bot_id, account_id=account_id, name=name, pairs=pairs, is_enabled=is_enabled,
+                   type='Bot::SingleBot', active_deals_count=0, finished_deals_count=0,
+                   profit={'usd': 0.0, 'percent': 0.0}, created_at=_timestamp(time.time()))
+        self.bots[bot_id] = bot
+        self.bot_deals[bot_id] = []
+        self.bot_updated[bot_id] = OrderedDict()
+        self.changed()
+        return bot
+
+    def _add_grid_bot(self, account_id, name, pair, is_enabled, settings=None):
+        bot_id = self.next_bot_id
+        self.next_bot_id += 1
+        price = self.prices.get(pair, 100)
+        bot = dict({'upper_price': round(price * 1.1, 8), 'lower_price': round(price * 0.9, 8), 'grids_count': 20,
+                    'quantity_per_grid': 0.001}, **(settings or {}))
+        bot.update(id=bot_id, account_id=account_id, name=name, pair=pair, is_enabled=is_enabled,
+                   current_profit_usd=round(self.random.uniform(0, 50), 2), created_at=_timestamp(time.time()))
+        self.grid_bots[bot_id] = bot
+        self.changed()
+        return bot
+
+    def _touch(self, deal, now):
+        deal['updated_at'] = _timestamp(now)
+        self.updated[deal['id']] = None
+        self.updated.move_to_end(deal['id'])
+        recent = self.bot_updated[deal['bot_id']]
+        recent[deal['id']] = None
+        recent.move_to_end(deal['id'])
+
+    def _open_deal(self, bot, now):
+        deal = {'id': self.next_deal_id, 'bot_id': bot['id'], 'account_id': bot['account_id'], 'pair': bot['pairs'][0],
+                'status': 'bought', 'final_profit': '0.0', 'usd_final_profit': '0.0', 'created_at': _timestamp(now),
+                'closed_at': None}
+        self.next_deal_id += 1
+        self.deals[deal['id']] = deal
+        self.bot_deals[bot['id']].append(deal['id'])
+        bot['active_deals_count'] += 1
+        self._touch(deal, now)
+        return deal
+
+    def _close_deal(self, bot, deal_id, now):
+        deal = self.deals[deal_id]
+        profit = round(self.random.uniform(-0.5, 2.0), 2)
+        deal.update(status='completed', final_profit=str(profit), usd_final_profit=str(profit),
+                    closed_at=_timestamp(now))
+        bot['active_deals_count'] -= 1
+        bot['finished_deals_count'] += 1
+        bot['profit']['usd'] = round(bot['profit']['usd'] + profit, 2)
+        bot['profit']['percent'] = round(bot['profit']['usd'] / 10, 2)
+        self._touch(deal, now)
+
+    def changed(self, bot_id=None):
+        """Drop cached responses after a change (to one bot's deals when bot_id is given)"""
+        self._cache.clear()
+        if bot_id is not None:
+            self._deal_cache.pop(bot_id, None)
+
+    def churn(self, count):
+        """Close the active deal of count random enabled bots and open a new one in its place"""
+        enabled = [bot for bot in self.bots.values() if bot['is_enabled']]
+        if not enabled:
+            return
+        now = time.time()
+        for _ in range(count):
+            bot = self.random.choice(enabled)
+            active = [deal_id for deal_id in self.bot_deals[bot['id']][-3:] if self.deals[deal_id]['closed_at'] is None]
+            if active:
+                self._close_deal(bot, active[0], now)
+            self._open_deal(bot, now)
+            self.changed(bot['id'])
+            self.churned += 1
+
+    def drift_prices(self):
+        for pair, price in self.prices.items():
+            self.prices[pair] = price * (1 + self.random.gauss(0, PRICE_DRIFT))
+        self._cache.pop('price', None)
+        self._cache.pop('bookTicker', None)
+
+    def cached(self, key, build):
+        """Serialized response for a fleet-wide read"""
+        body = self._cache.get(key)
+        if body is None:
+            body = self._cache[key] = _dumps(build())
+        return body
+
+    def bots_page(self, scope, offset, limit):
+        bots = self.bots.values()
+        if scope in ('enabled', 'disabled'):
+            bots = (bot for bot in bots if bot['is_enabled'] == (scope == 'enabled'))
+        return list(islice(bots, offset, offset + limit))
+
+    def deals_page(self, bot_id, scope, order, direction, offset, limit):
+        if bot_id is None:
+            ids = self.updated if order == 'updated_at' else self.deals
+        else:
+            ids = self.bot_updated[bot_id] if order == 'updated_at' else self.bot_deals[bot_id]
+        ids = iter(ids) if direction == 'asc' else reversed(ids)
+        deals = (self.deals[deal_id] for deal_id in ids)
+        if scope == 'active':
+            deals = (deal for deal in deals if deal['closed_at'] is None)
+        elif scope in ('finished', 'completed'):
+            deals = (deal for deal in deals if deal['closed_at'] is not None)
+        return list(islice(deals, offset, offset + limit))
+
+    def deals_response(self, query):
+        """Serialized deals page, cached per bot until its deals change"""
+        bot_id = _int(query.get('bot_id'), None)
+        if bot_id is not None and bot_id not in self.bots:
+            return None
+        key = query.get('scope'), query.get('order'), query.get('order_direction'), query.get('offset'), query.get('limit')
+        cache = self._cache if bot_id is None else self._deal_cache.setdefault(bot_id, {})
+        body = cache.get(key)
+        if body is None:
+            body = cache[key] = _dumps(self.deals_page(bot_id, query.get('scope'), query.get('order'),
+                                                       query.get('order_direction', 'desc'),
+                                                       _int(query.get('offset'), 0), _int(query.get('limit'), 50, 1000)))
+        return body
+
+    def rate(self, pair):
+        """Current price of a pair in BTC_USDT or BTCUSDT form, None for unknown pairs"""
+        pair = self.symbols.get(pair.replace('_', '')) if pair else None
+        return self.prices[pair] if pair else None
+
+    def balances(self):
+        return [{'currency_code': 'USDT', 'position': '10000.0', 'on_orders': '0.0'},
+                {'currency_code': 'BTC', 'position': '0.5', 'on_orders': '0.0'},
+                {'currency_code': 'ETH', 'position': '5.0', 'on_orders': '0.0'}]
+
+    def creation_params(self, pair):
+        price = self.rate(pair) or 100
+        step = 10 ** math.floor(math.log10(price) - 4)
+        return {'min_price': step, 'max_price': round(price * 100, 8), 'price_step': step, 'quantity_step': 0.0001,
+                'min_quantity': 0.0001, 'max_quantity': 10000, 'min_grids': 2, 'max_grids': 200}
+
+
+class MockServer:
+    def __init__(self, fleet, churn=10.0, latency=0.0, latency_distribution='fixed', error_rate=0.0,
+                 error_status=503, throttle_rate=0.0, rate_limit=0, binance_weight=6000, seed=None):
+        """
+        aiohttp application serving a Fleet like the 3Commas and Binance APIs
+
+        Args:
+            fleet: Fleet to serve
+            churn: Deals closed (and replaced by a new one) per second
+            latency: Mean seconds added to every response
+            latency_distribution: 'fixed', 'uniform', 'exponential' or 'lognormal' (heavy tail)
+            error_rate: Fraction of requests answered with error_status
+            error_status: HTTP status of injected errors
+            throttle_rate: Fraction of requests answered with an injected 429
+            rate_limit: 3Commas requests allowed per second before answering 429 (0 for no limit)
+            binance_weight: Binance request weight allowed per minute before answering 429 (0 for no limit)
+            seed: Seed for latency and injected errors, for reproducible runs
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.fleet = fleet
+        self.churn = churn
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_rate = throttle_rate
+        self.limits = {'3commas': WindowLimit(rate_limit, 1) if rate_limit else None,
+                       'binance': WindowLimit(binance_weight, 60) if binance_weight else None}
+        self.random = random.Random(seed)
+        self.counts = {'requests': 0, 'throttled': 0, 'errors': 0}
+        self.base_url = None
+        self._runner = None
+        self._ticker = None
+
+    def sample_latency(self):
+        """One response delay from the configured distribution"""
+        mean = self.latency
+        if self.latency_distribution == 'uniform':
+            return self.random.uniform(0, 2 * mean)
+        if self.latency_distribution == 'exponential':
+            return self.random.expovariate(1 / mean)
+        if self.latency_distribution == 'lognormal':
+            return mean * math.exp(self.random.gauss(0, LOGNORMAL_SIGMA) - LOGNORMAL_SIGMA ** 2 / 2)
+        return mean
+
+    def _error(self, binance, status, message, headers=None):
+        body = {'code': -1003, 'msg': message} if binance else {'error': 'mock_error', 'error_description': message}
+        return web.Response(body=_dumps(body), status=status, headers=headers, content_type='application/json')
+
+    def create_app(self):
+        @web.middleware
+        async def middleware(request, handler):
+            if request.path.startswith('/mock/'):
+                return await handler(request)
+            binance = request.path.startswith('/api/')
+            self.counts['requests'] += 1
+            if self.latency:
+                await asyncio.sleep(self.sample_latency())
+
+            now = time.monotonic()
+            limit = self.limits['binance' if binance else '3commas']
+            headers = {}
+            if limit is not None:
+                allowed = limit.hit(self._weight(request) if binance else 1, now)
+                if binance:
+                    headers['X-MBX-USED-WEIGHT-1M'] = str(limit.used)
+                else:
+                    headers['X-RateLimit-Limit'] = str(limit.limit)
+                    headers['X-RateLimit-Remaining'] = str(limit.remaining())
+                    headers['X-RateLimit-Reset'] = str(math.ceil(limit.reset_in(now)))
+                if not allowed:
+                    self.counts['throttled'] += 1
+                    headers['Retry-After'] = str(max(1, math.ceil(limit.reset_in(now))))
+                    return self._error(binance, 429, 'Too many requests', headers)
+            if self.throttle_rate and self.random.random() < self.throttle_rate:
+                self.counts['throttled'] += 1
+                return self._error(binance, 429, 'Injected rate limit', dict(headers, **{'Retry-After': '1'}))
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.counts['errors'] += 1
+                return self._error(binance, self.error_status, 'Injected server error', headers)
+            if not binance and 'APIKEY' not in request.headers:
+                return self._error(False, 401, 'Missing APIKEY header', headers)
+
+            response = await handler(request)
+            response.headers.update(headers)
+            return response
+
+        app = web.Application(middlewares=[middleware])
+        routes = [
+            ('GET', 'accounts', self.accounts),
+            ('GET', 'accounts/market_pairs', self.market_pairs),
+            ('GET', 'accounts/currency_rates', self.currency_rates),
+            ('GET', 'accounts/market_info', self.currency_rates),
+            ('POST', 'accounts/{id}/account_table_data', self.account_table_data),
+            ('GET', 'bots', self.bots),
+            ('POST', 'bots/create_bot', self.create_bot),
+            ('POST', 'bots/{id}/{action:enable|disable}', self.toggle_bot),
+            ('GET', 'deals', self.deals),
+            ('GET', 'grid_bots', self.grid_bots),
+            ('POST', 'grid_bots/manual', self.create_grid_bot),
+            ('GET', 'grid_bots/manual_creation_params', self.creation_params),
+            ('POST', 'grid_bots/{id}/{action:enable|disable}', self.toggle_grid_bot),
+        ]
+        for method, path, handler in routes:
+            app.router.add_route(method, API_PREFIX + path, handler)
+        app.router.add_get('/api/v3/ticker/price', self.ticker)
+        app.router.add_get('/api/v3/ticker/bookTicker', self.ticker)
+        app.router.add_get('/mock/stats', self.stats)
+        return app
+
+    def _weight(self, request):
+        one, every = BINANCE_WEIGHTS.get(request.path.rsplit('/', 1)[-1], (1, 1))
+        return one if 'symbol' in request.query else every
+
+    @staticmethod
+    def _json(body, status=200):
+        return web.Response(body=body if isinstance(body, bytes) else _dumps(body), status=status,
+                            content_type='application/json')
+
+    async def accounts(self, request):
+        return self._json(self.fleet.cached('accounts', lambda: self.fleet.accounts))
+
+    async def market_pairs(self, request):
+        return self._json(self.fleet.cached('market_pairs', lambda: list(self.fleet.prices)))
+
+    async def currency_rates(self, request):
+        price = self.fleet.rate(request.query.get('pair'))
+        if price is None:
+            return self._json({'error': 'record_invalid', 'error_description': 'Unknown pair'}, 422)
+        return self._json({'last': f"{price:.8f}", 'bid': f"{price * 0.9999:.8f}", 'ask': f"{price * 1.0001:.8f}"})
+
+    async def account_table_data(self, request):
+        if _int(request.match_info['id'], None) not in {account['id'] for account in self.fleet.accounts}:
+            return self._json({'error': 'not_found', 'error_description': 'Unknown account'}, 404)
+        return self._json(self.fleet.balances())
+
+    async def bots(self, request):
+        query = request.query
+        return self._json(self.fleet.cached(('bots', query.get('scope'), query.get('offset'), query.get('limit')),
+                                            lambda: self.fleet.bots_page(query.get('scope'), _int(query.get('offset'), 0),
+                                                                         _int(query.get('limit'), 50, 1000))))
+
+    async def grid_bots(self, request):
+        query = request.query
+        offset, limit = _int(query.get('offset'), 0), _int(query.get('limit'), 50, 1000)
+        return self._json(self.fleet.cached(('grid_bots', offset, limit),
+                                            lambda: list(islice(self.fleet.grid_bots.values(), offset, offset + limit))))
+
+    async def deals(self, request):
+        body = self.fleet.deals_response(request.query)
+        if body is None:
+            return self._json({'error': 'not_found', 'error_description': 'Unknown bot'}, 404)
+        return self._json(body)
+
+    async def _payload(self, request):
+        try:
+            payload = await request.json() if request.can_read_body else {}
+        except ValueError:
+            payload = None
+        return payload if isinstance(payload, dict) else None
+
+    async def create_bot(self, request):
+        payload = await self._payload(request)
+        # The clients send 'pair', the API also accepts a 'pairs' list
+        pairs = payload and (payload.pop('pairs', None) or payload.pop('pair', None))
+        if not pairs or not payload.get('account_id'):
+            return self._json({'error': 'record_invalid', 'error_description': 'account_id and pair are required'}, 422)
+        bot = self.fleet._add_bot(payload.pop('account_id'), payload.pop('name', 'Mock DCA'), pairs, False, payload)
+        return self._json(bot, 201)
+
+    async def create_grid_bot(self, request):
+        payload = await self._payload(request)
+        if not payload or not payload.get('pair') or not payload.get('account_id'):
+            return self._json({'error': 'record_invalid', 'error_description': 'account_id and pair are required'}, 422)
+        bot = self.fleet._add_grid_bot(payload.pop('account_id'), payload.pop('name', 'Mock Grid'), payload.pop('pair'),
+                                       True, payload)
+        return self._json(bot, 201)
+
+    async def _toggle(self, request, bots):
+        bot = bots.get(_int(request.match_info['id'], None))
+        if bot is None:
+            return self._json({'error': 'not_found', 'error_description': 'Unknown bot'}, 404)
+        bot['is_enabled'] = request.match_info['action'] == 'enable'
+        self.fleet.changed()
+        return self._json(bot)
+
+    async def toggle_bot(self, request):
+        return await self._toggle(request, self.fleet.bots)
+
+    async def toggle_grid_bot(self, request):
+        return await self._toggle(request, self.fleet.grid_bots)
+
+    async def creation_params(self, request):
+        return self._json(self.fleet.creation_params(request.query.get('pair')))
+
+    async def ticker(self, request):
+        book = request.path.endswith('bookTicker')
+
+        def ticker(symbol, price):
+            if book:
+                return {'symbol': symbol, 'bidPrice': f"{price * 0.9999:.8f}", 'bidQty': '1.00000000',
+                        'askPrice': f"{price * 1.0001:.8f}", 'askQty': '1.00000000'}
+            return {'symbol': symbol, 'price': f"{price:.8f}"}
+
+        symbol = request.query.get('symbol')
+        if symbol is None:
+            return self._json(self.fleet.cached('bookTicker' if book else 'price', lambda: [
+                ticker(symbol, self.fleet.prices[pair]) for symbol, pair in self.fleet.symbols.items()]))
+        price = self.fleet.rate(symbol)
+        if price is None:
+            return self._json({'code': -1121, 'msg': 'Invalid symbol.'}, 400)
+        return self._json(ticker(symbol, price))
+
+    async def stats(self, request):
+        return self._json(dict(self.counts, churned=self.fleet.churned, bots=len(self.fleet.bots),
+                               grid_bots=len(self.fleet.grid_bots), deals=len(self.fleet.deals)))
+
+    async def _tick(self):
+        """Churn deals and move prices every TICK seconds"""
+        pending = 0.0
+        while True:
+            await asyncio.sleep(TICK)
+            pending += self.churn * TICK
+            if pending >= 1:
+                self.fleet.churn(int(pending))
+                pending -= int(pending)
+            self.fleet.drift_prices()
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start serving on the running loop, returns the base URL"""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.create_task(self._tick())
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def start_mock_server(fleet=None, host='127.0.0.1', port=0, **options):
+    """
+    Run a MockServer in a background thread with its own event loop
+
+    Used by benchmarks that drive the blocking client from the main thread.
+    Returns the running MockServer; its base_url is set.
+    """
+    server = MockServer(fleet or Fleet(), **options)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def run():
+        await server.start(host, port)
+        ready.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(run()), loop.run_forever()), daemon=True,
+                              name='mock-server')
+    thread.start()
+    ready.wait()
+    return server
+
+
+async def serve(server, host, port, report_interval):
+    base_url = await server.start(host, port)
+    fleet = server.fleet
+    print(f"\n🧪 Mock 3Commas / Binance API on {base_url}: {len(fleet.bots)} bots, {len(fleet.grid_bots)} grid bots, "
+          f"{len(fleet.deals)} deals, {len(fleet.prices)} pairs")
+    print(f"   export 3COMMAS_API_URL={base_url} BINANCE_API_URL={base_url}")
+    try:
+        last = dict(server.counts)
+        while True:
+            await asyncio.sleep(report_interval)
+            counts = dict(server.counts)
+            requests = counts['requests'] - last['requests']
+            if requests:
+                print(f"📊 {requests / report_interval:.0f} req/s, {counts['throttled'] - last['throttled']} throttled, "
+                      f"{counts['errors'] - last['errors']} injected errors, {fleet.churned} deals churned")
+            last = counts
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the 3Commas and Binance APIs for load testing')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--bots', type=int, default=1000, help='DCA bots in the fleet (90%% enabled)')
+    parser.add_argument('--grid-bots', type=int, default=100, help='Grid bots in the fleet')
+    parser.add_argument('--deals', type=int, default=5, help='Deals per DCA bot at start-up')
+    parser.add_argument('--accounts', type=int, default=2, help='Connected exchange accounts')
+    parser.add_argument('--pairs', type=int, default=200, help='Trading pairs (and Binance symbols)')
+    parser.add_argument('--churn', type=float, default=10, help='Deals closed and replaced per second')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean seconds added to every response')
+    parser.add_argument('--latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='fixed',
+                        help='Distribution of the added latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of injected errors')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with a 429')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help='3Commas requests per second before answering 429 (0 for no limit)')
+    parser.add_argument('--binance-weight', type=int, default=6000,
+                        help='Binance request weight per minute before answering 429 (0 for no limit)')
+    parser.add_argument('--seed', type=int, help='Seed for the fleet, latency and injected errors')
+    parser.add_argument('--report-interval', type=float, default=5, help='Seconds between throughput reports')
+    args = parser.parse_args()
+
+    fleet = Fleet(args.bots, args.grid_bots, args.deals, args.accounts, args.pairs, args.seed)
+    server = MockServer(fleet, args.churn, args.latency, args.latency_distribution, args.error_rate, args.error_status,
+                        args.throttle_rate, args.rate_limit, args.binance_weight, args.seed)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.report_interval))
+    except KeyboardInterrupt:
+        print("\n👋 Mock server stopped")
+
+
+if __name__ == "__main__":
+    main()
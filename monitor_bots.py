@@ -2,86 +2,281 @@
 # This script monitors the performance of your active bots on 3Commas
 
 import asyncio
+import argparse
 import time
 from three_commas_client import ThreeCommasClient
+from async_three_commas_client import AsyncThreeCommasClient, call_client, iter_client
+from config import (MONITOR_CONCURRENCY, MONITOR_REQUEST_TIMEOUT, MONITOR_BATCH_SIZE, MONITOR_PRICE_MOVE,
+                    METRICS_PORT, METRICS_HOST)
+from deal_store import DealStore, DealSync
+from account_registry import load_accounts
+from market_stream import market_stream
+from bot_state import BotStateTracker
+from metrics import metrics
+from rate_limiter import rate_limiter
+from circuit_breaker import circuit_breakers
 
 async def main():
+    parser = argparse.ArgumentParser(description='3Commas Bot Monitor')
+    parser.add_argument('--async-client', action='store_true', help='Use the asyncio client with pooled connections')
+    parser.add_argument('--refresh-interval', type=int, default=60, help='Seconds between refreshes')
+    parser.add_argument('--concurrency', type=int, default=MONITOR_CONCURRENCY, help='Maximum deal requests in flight at once')
+    parser.add_argument('--no-deal-store', action='store_true', help='Download recent deals every refresh instead of syncing a local store')
+    parser.add_argument('--full', action='store_true',
+                        help='Print every bot and its recent deals on every refresh instead of only changes')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                        help='Serve Prometheus metrics on this port (off by default)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Show live prices from the WebSocket stream and refresh early when they move')
+    args = parser.parse_args()
+
     print("\n📊 3Commas Bot Monitor")
     print("====================\n")
     
-    client = ThreeCommasClient()
+    if args.metrics_port:
+        port = metrics.start_server(args.metrics_port)
+        print(f"📈 Metrics at http://{METRICS_HOST}:{port}/metrics\n")
+    
+    client = AsyncThreeCommasClient() if args.async_client else ThreeCommasClient()
+    deal_store = None if args.no_deal_store else DealStore()
     
     try:
         # Get account information
-        accounts = client.get_accounts()
-        print(f"Connected accounts: {len(accounts)}")
+        registry = await load_accounts(client)
+        print(f"Connected accounts: {len(registry)}")
         
-        for account in accounts:
+        for account in registry:
             print(f"- {account['name']} ({account['market_code']})")
         
         # Monitor bots
-        await monitor_bots(client)
+        deal_sync = DealSync(client, deal_store) if deal_store else None
+        await monitor_bots(client, refresh_interval=args.refresh_interval, concurrency=args.concurrency,
+                           deal_sync=deal_sync, stream=market_stream if args.stream else None, full=args.full)
         
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        await market_stream.stop()
+        if isinstance(client, AsyncThreeCommasClient):
+            await client.close()
+        if deal_store:
+            deal_store.close()
+
+async def fetch_bot_deals(client, bot_ids, concurrency=MONITOR_CONCURRENCY, request_timeout=MONITOR_REQUEST_TIMEOUT,
+                          deal_sync=None, sync_every_bot=False):
+    """
+    Fetch deals for many bots concurrently
+    
+    Args:
+        client: ThreeCommasClient or AsyncThreeCommasClient instance
+        bot_ids: IDs of the bots to fetch deals for
+        concurrency: Maximum number of requests in flight at once
+        request_timeout: Deadline in seconds for each bot's request
+        deal_sync: Optional DealSync; when given, only new or changed deals are
+            downloaded and the returned deals are read from its local store
+        sync_every_bot: Sync every bot with deal_sync, also those kept current by
+            DealSync.sync_all (used when the account-wide sync failed)
+    
+    Returns:
+        (deals, errors, latencies) dicts keyed by bot ID. Bots that failed or
+        timed out appear in errors only, so partial results are kept.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    deals, errors, latencies = {}, {}, {}
+    
+    async def fetch(bot_id):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if deal_sync:
+                    await asyncio.wait_for(deal_sync.sync_bot(bot_id), request_timeout)
+                    deals[bot_id] = deal_sync.store.get_recent_deals(bot_id)
+                else:
+                    deals[bot_id] = await asyncio.wait_for(call_client(client.get_bot_deals, bot_id), request_timeout)
+            except asyncio.TimeoutError:
+                errors[bot_id] = f"timed out after {request_timeout}s"
+            except Exception as e:
+                errors[bot_id] = str(e)
+            finally:
+                latencies[bot_id] = time.perf_counter() - start
+    
+    if deal_sync and not sync_every_bot:
+        # Bots already synced are kept current by DealSync.sync_all, read them from the store
+        for bot_id in bot_ids:
+            if not deal_sync.needs_sync(bot_id):
+                deals[bot_id] = deal_sync.store.get_recent_deals(bot_id)
+        bot_ids = [bot_id for bot_id in bot_ids if bot_id not in deals]
+    
+    await asyncio.gather(*(fetch(bot_id) for bot_id in bot_ids))
+    return deals, errors, latencies
 
-async def monitor_bots(client, refresh_interval=60, iterations=None):
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def display_bot(bot, deals, error=None):
+    """Print a bot's performance and its most recent deals"""
+    bot_id = bot.get('id', 'Unknown')
+    bot_name = bot.get('name', 'Unknown')
+    bot_type = bot.get('type', 'Unknown')
+    bot_pair = bot.get('pairs', 'Unknown')
+    profit_usd = bot.get('profit', {}).get('usd', 0)
+    profit_percent = bot.get('profit', {}).get('percent', 0)
+    
+    print(f"\nBot: {bot_name} (ID: {bot_id})")
+    print(f"Type: {bot_type}")
+    print(f"Pair: {bot_pair}")
+    print(f"Profit: ${profit_usd} ({profit_percent}%)")
+    
+    if error:
+        print(f"  Could not get deals: {error}")
+        return
+    
+    print(f"Recent deals: {len(deals)}")
+    for i, deal in enumerate(deals[:3]):  # Show only last 3 deals
+        deal_id = deal.get('id', 'Unknown')
+        deal_status = deal.get('status', 'Unknown')
+        deal_profit = deal.get('final_profit', 'Unknown')
+        
+        print(f"  Deal {i+1}: ID {deal_id}, Status: {deal_status}, Profit: {deal_profit}")
+
+def display_changes(state, changes):
+    """Print what changed for a bot since the previous refresh"""
+    print(f"\n{state.name} (ID: {state.bot_id})")
+    for change in changes:
+        print(f"  {change}")
+
+async def monitor_bots(client, refresh_interval=60, iterations=None,
+                       concurrency=MONITOR_CONCURRENCY, request_timeout=MONITOR_REQUEST_TIMEOUT, deal_sync=None,
+                       stream=None, full=False):
     """
     Monitor active bots and display their performance
     
     Args:
-        client: ThreeCommasClient instance
+        client: ThreeCommasClient or AsyncThreeCommasClient instance
         refresh_interval: Time in seconds between refreshes
         iterations: Number of times to refresh (None for infinite)
+        concurrency: Maximum number of deal requests in flight at once
+        request_timeout: Deadline in seconds for each bot's deal request
+        deal_sync: Optional DealSync to sync deals incrementally into its local store
+        stream: Optional MarketStream; a move of more than MONITOR_PRICE_MOVE percent in
+            one of the bots' pairs starts the next refresh early
+        full: Print every bot and its recent deals instead of only what changed
     """
+    tracker = BotStateTracker()
     iteration = 0
     try:
         while iterations is None or iteration < iterations:
             iteration += 1
+            refresh_start = time.perf_counter()
             
             print("\n" + "="*70)
             print(f"📊 Bot Status (Refresh #{iteration}) - {time.strftime('%Y-%m-%d %H:%M:%S')}")
             print("="*70)
             
-            # Get active bots
-            active_bots = client.get_active_bots()
-            print(f"\nActive bots: {len(active_bots)}")
+            requests_before = deal_sync.requests_made if deal_sync else 0
+            sync_every_bot = False
+            if deal_sync:
+                # One account-wide request picks up deal changes for every bot that is already synced
+                try:
+                    await asyncio.wait_for(deal_sync.sync_all(), request_timeout)
+                except asyncio.TimeoutError:
+                    print(f"⚠️ Account-wide deal sync timed out after {request_timeout}s, syncing each bot instead")
+                    sync_every_bot = True
+                except Exception as e:
+                    print(f"⚠️ Account-wide deal sync failed ({e}), syncing each bot instead")
+                    sync_every_bot = True
+            
+            # Stream active bots page by page and fetch deals for each batch at once
+            bot_count = 0
+            failed_count = 0
+            deals_time = 0
+            latencies = {}
+            pairs = set()
+            changed_bots = 0
+            change_count = 0
+            deal_count = 0
+            tracker.begin_refresh()
+            batch = []
+            bots = iter_client(client.iter_bots, scope='enabled')
+            while True:
+                bot = await anext(bots, None)
+                if bot is not None:
+                    batch.append(bot)
+                    pairs.update(bot.get('pairs') or [])
+                if batch and (bot is None or len(batch) >= MONITOR_BATCH_SIZE):
+                    bot_ids = [bot.get('id', 'Unknown') for bot in batch]
+                    deals_start = time.perf_counter()
+                    all_deals, deal_errors, batch_latencies = await fetch_bot_deals(
+                        client, bot_ids, concurrency, request_timeout, deal_sync, sync_every_bot
+                    )
+                    deals_time += time.perf_counter() - deals_start
+                    deal_count += sum(len(deals) for deals in all_deals.values())
+                    for batch_bot in batch:
+                        bot_id = batch_bot.get('id', 'Unknown')
+                        state, changes = tracker.update(batch_bot, all_deals.get(bot_id), deal_errors.get(bot_id))
+                        if full:
+                            display_bot(batch_bot, all_deals.get(bot_id), deal_errors.get(bot_id))
+                        elif changes:
+                            display_changes(state, changes)
+                        changed_bots += bool(changes)
+                        change_count += len(changes)
+                    bot_count += len(batch)
+                    failed_count += len(deal_errors)
+                    latencies.update(batch_latencies)
+                    batch = []
+                if bot is None:
+                    break
+            
+            for state in tracker.remove_missing():
+                print(f"\n➖ {state.name} (ID: {state.bot_id}) is no longer active")
+                changed_bots += 1
+                change_count += 1
             
-            if not active_bots:
+            print(f"\nActive bots: {bot_count}, {change_count} changes across {changed_bots} bots")
+            if not bot_count:
                 print("No active bots found!")
-            else:
-                # Display bot information
-                for bot in active_bots:
-                    bot_id = bot.get('id', 'Unknown')
-                    bot_name = bot.get('name', 'Unknown')
-                    bot_type = bot.get('type', 'Unknown')
-                    bot_pair = bot.get('pairs', 'Unknown')
-                    profit_usd = bot.get('profit', {}).get('usd', 0)
-                    profit_percent = bot.get('profit', {}).get('percent', 0)
-                    
-                    print(f"\nBot: {bot_name} (ID: {bot_id})")
-                    print(f"Type: {bot_type}")
-                    print(f"Pair: {bot_pair}")
-                    print(f"Profit: ${profit_usd} ({profit_percent}%)")
-                    
-                    # Get recent deals for this bot
-                    try:
-                        deals = client.get_bot_deals(bot_id)
-                        print(f"Recent deals: {len(deals)}")
-                        
-                        for i, deal in enumerate(deals[:3]):  # Show only last 3 deals
-                            deal_id = deal.get('id', 'Unknown')
-                            deal_status = deal.get('status', 'Unknown')
-                            deal_profit = deal.get('final_profit', 'Unknown')
-                            deal_created_at = deal.get('created_at', 'Unknown')
-                            
-                            print(f"  Deal {i+1}: ID {deal_id}, Status: {deal_status}, Profit: {deal_profit}")
-                    except Exception as e:
-                        print(f"  Could not get deals: {e}")
+            
+            if stream and pairs:
+                await stream.subscribe(pairs)
+                if full:
+                    prices = [f"{pair} {quote.mid:.8g} ({quote.age:.1f}s)"
+                              for pair in sorted(pairs) for quote in [stream.get(pair)] if quote]
+                    print(f"📡 Live prices: {', '.join(prices) if prices else 'waiting for the stream...'}")
+            
+            # Refresh latency breakdown
+            refresh_time = time.perf_counter() - refresh_start
+            metrics.observe('monitor_refresh_duration_seconds', refresh_time)
+            metrics.set('monitor_bots', bot_count)
+            metrics.set('monitor_deals', deal_count)
+            metrics.set('monitor_deal_errors', failed_count)
+            metrics.set('monitor_changes', change_count)
+            print(f"\n⏱️ Refresh took {refresh_time:.2f}s "
+                  f"(deals: {deals_time:.2f}s for {bot_count} bots)")
+            if latencies:
+                call_times = list(latencies.values())
+                slowest_bot = max(latencies, key=latencies.get)
+                print(f"   Deal calls p50: {percentile(call_times, 50):.3f}s, p95: {percentile(call_times, 95):.3f}s, "
+                      f"slowest: bot {slowest_bot} ({latencies[slowest_bot]:.3f}s), failed: {failed_count}")
+            if deal_sync:
+                print(f"   Deal sync requests this refresh: {deal_sync.requests_made - requests_before}")
+            for line in rate_limiter.format_stats():
+                print(f"   Rate limiter {line}")
+            for line in circuit_breakers.format_states():
+                print(f"   Circuit {line}")
             
             if iterations is None or iteration < iterations:
                 print(f"\nRefreshing in {refresh_interval} seconds... (Press Ctrl+C to exit)")
-                await asyncio.sleep(refresh_interval)
+                if stream and pairs:
+                    moved = await stream.wait_for_move(pairs, MONITOR_PRICE_MOVE, refresh_interval)
+                    if moved:
+                        print(f"\n📡 {moved} moved more than {MONITOR_PRICE_MOVE}%, refreshing early")
+                else:
+                    await asyncio.sleep(refresh_interval)
     
     except KeyboardInterrupt:
         print("\nMonitoring stopped by user.")
@@ -0,0 +1,293 @@
+# Bot Configuration Optimizer
+# Sweeps parameter ranges for GRID_BOT_CONFIG or DCA_BOT_CONFIG against local candle data
+# on every core and prints the Pareto front of profit vs. drawdown vs. capital.
+
+import argparse
+import bisect
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from candles import COLUMNS, load_candles
+from grid_backtest import backtest_grid
+from grid_planner import plan_grids
+from dca_backtest import backtest_dca
+from dca_ladder import validate_ladder
+from config import GRID_BOT_CONFIG, DCA_BOT_CONFIG, GRID_MIN_NET_PROFIT
+
+# Extra grid parameters that are not part of GRID_BOT_CONFIG
+GRID_EXTRA_PARAMS = {'margin_percent': 5, 'grid_type': 'arithmetic'}
+
+# Candles of the worker process, views into the shared memory block
+_candles = None
+_shared = None
+
+
+def parse_param(spec):
+    """
+    Parse 'name=start:stop:step' (inclusive range) or 'name=a,b,c' into (name, values)
+    """
+    if '=' not in spec:
+        raise Exception(f"Expected name=values, got {spec!r}")
+    name, text = spec.split('=', 1)
+
+    def number(value):
+        value = value.strip()
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                pass
+        return value
+
+    if ':' in text:
+        start, stop, step = (number(part) for part in text.split(':'))
+        if all(isinstance(value, int) for value in (start, stop, step)):
+            values = list(range(start, stop + 1, step))
+        else:
+            values = np.round(np.arange(start, stop + step / 2, step), 10).tolist()
+    else:
+        values = [number(value) for value in text.split(',')]
+    return name.strip(), values
+
+
+def build_space(params, samples=None, seed=0):
+    """
+    Parameter combinations to evaluate
+
+    Returns the full Cartesian product of params ({name: values}), or samples
+    combinations drawn from it without replacement. The same seed always gives
+    the same combinations in the same order.
+    """
+    names = list(params)
+    sizes = [len(params[name]) for name in names]
+    total = int(np.prod(sizes)) if sizes else 1
+    if samples is None or samples >= total:
+        indexes = range(total)
+    else:
+        indexes = np.sort(np.random.default_rng(seed).choice(total, size=samples, replace=False))
+    combos = []
+    for index in indexes:
+        positions = np.unravel_index(int(index), sizes) if sizes else ()
+        combos.append({name: params[name][int(position)] for name, position in zip(names, positions)})
+    return combos
+
+
+def _attach(name, shape):
+    """Process pool initializer: map the shared candle array without copying it"""
+    global _candles, _shared
+    _shared = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=_shared.buf)
+    _candles = {column: data[:, i] for i, column in enumerate(COLUMNS)}
+
+
+def evaluate(task):
+    """Backtest one configuration in a worker, returns (profit, drawdown, capital)"""
+    bot_type, config = task
+    if bot_type == 'grid':
+        result = backtest_grid(_candles, config['lower_price'], config['upper_price'], config['grids_count'],
+                               config['quantity_per_grid'], config.get('grid_type', 'arithmetic'))
+        return result['total_profit'], result['max_drawdown'], result['capital']
+    result = backtest_dca(_candles, config)
+    # Open deals count at their current value so stuck deals are not hidden
+    return result['total_profit'] + result['open_profit'], result['max_drawdown'], result['max_capital']
+
+
+def grid_candidates(combos, start_price):
+    """
+    Full grid configurations for the combinations, dropping grids that cannot cover their fees
+
+    Price ranges missing from a combination are set margin_percent around
+    start_price, like GridBot does with the live price. All candidates are
+    checked in one plan_grids call before any backtest runs.
+    """
+    configs = []
+    for combo in combos:
+        config = {**GRID_BOT_CONFIG, **GRID_EXTRA_PARAMS, **combo}
+        margin = config['margin_percent'] / 100
+        config['upper_price'] = config['upper_price'] or start_price * (1 + margin)
+        config['lower_price'] = config['lower_price'] or start_price * (1 - margin)
+        configs.append(config)
+    if not configs:
+        return [], []
+    plans = plan_grids([c['lower_price'] for c in configs], [c['upper_price'] for c in configs],
+                       [c['grids_count'] for c in configs], [c['quantity_per_grid'] for c in configs],
+                       start_price, [c['grid_type'] for c in configs])
+    keep = plans['valid'] & (plans['min_net_profit_pct'] >= GRID_MIN_NET_PROFIT)
+    return ([config for config, ok in zip(configs, keep) if ok],
+            [combo for combo, ok in zip(combos, keep) if ok])
+
+
+def dca_candidates(combos):
+    """Full DCA configurations for the combinations, dropping ladders validate_ladder rejects"""
+    configs, kept = [], []
+    for combo in combos:
+        config = {**DCA_BOT_CONFIG, **combo}
+        if not validate_ladder(config):
+            configs.append(config)
+            kept.append(combo)
+    return configs, kept
+
+
+def _dominated(front, cost, drawdown, capital):
+    """True when a member of the front dominates a result sorted after all of them"""
+    costs, drawdowns, capitals = front
+    i = bisect.bisect_right(drawdowns, drawdown)
+    if i == 0:
+        return False
+    if capitals[i - 1] != capital:
+        return capitals[i - 1] < capital
+    # Equal on drawdown and capital only dominates when better on another objective
+    return drawdowns[i - 1] < drawdown or costs[i - 1] < cost
+
+
+def _add_to_front(front, cost, drawdown, capital):
+    costs, drawdowns, capitals = front
+    i = bisect.bisect_right(drawdowns, drawdown)
+    if i and capitals[i - 1] <= capital:
+        return  # A member already covers every result this one would dominate
+    start = end = bisect.bisect_left(drawdowns, drawdown)
+    while end < len(drawdowns) and capitals[end] >= capital:
+        end += 1
+    costs[start:end] = [cost]
+    drawdowns[start:end] = [drawdown]
+    capitals[start:end] = [capital]
+
+
+def pareto_ranks(profit, drawdown, capital):
+    """
+    Non-domination rank of every result (0 is the Pareto front)
+
+    A result dominates another when it has at least as much profit and no more
+    drawdown or capital, and is strictly better on one of them.
+
+    Results are sorted by profit (best first), so a result can only be
+    dominated by results before it and each one goes to the first front none
+    of whose members dominates it, found by binary search over the fronts.
+    Each front only keeps its staircase of (drawdown, capital) minima, sorted
+    by drawdown, so a result costs a few bisections instead of a comparison
+    with every other result, and memory is linear.
+    """
+    objectives = np.column_stack([-np.asarray(profit, dtype=float), np.asarray(drawdown, dtype=float),
+                                  np.asarray(capital, dtype=float)])
+    ranks = np.full(len(objectives), -1)
+    fronts = []  # Per rank: (costs, drawdowns, capitals) of its staircase, drawdown ascending, capital descending
+    for index in np.lexsort(objectives.T[::-1]):
+        point = objectives[index].tolist()
+        low, high = 0, len(fronts)
+        while low < high:
+            middle = (low + high) // 2
+            if _dominated(fronts[middle], *point):
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(fronts):
+            fronts.append(([], [], []))
+        _add_to_front(fronts[low], *point)
+        ranks[index] = low
+    return ranks
+
+
+def optimize(candles, bot_type, params, samples=None, seed=0, workers=None):
+    """
+    Evaluate a parameter space on every core
+
+    The candles are copied once into shared memory and mapped by each worker,
+    so tasks only carry their configuration. Returns a list of result dicts
+    (the combination plus profit, drawdown, capital and rank), ordered by
+    rank and then by profit.
+    """
+    combos = build_space(params, samples, seed)
+    if bot_type == 'grid':
+        configs, kept = grid_candidates(combos, float(candles['open'][0]))
+        reason = "invalid or below GRID_MIN_NET_PROFIT after fees"
+    else:
+        configs, kept = dca_candidates(combos)
+        reason = "rejected by the ladder checks"
+    if len(kept) < len(combos):
+        print(f"🧹 Dropped {len(combos) - len(kept)} of {len(combos)} {bot_type} configurations ({reason})")
+    combos = kept
+    if not configs:
+        return []
+
+    data = np.column_stack([candles[column] for column in COLUMNS])
+    shared = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=shared.buf)[:] = data
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(configs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shared.name, data.shape)) as executor:
+            metrics = list(executor.map(evaluate, [(bot_type, config) for config in configs], chunksize=chunksize))
+    finally:
+        shared.close()
+        shared.unlink()
+
+    profit, drawdown, capital = (np.array(values) for values in zip(*metrics))
+    ranks = pareto_ranks(profit, drawdown, capital)
+    results = [dict(combo, profit=float(p), drawdown=float(d), capital=float(c), rank=int(r))
+               for combo, p, d, c, r in zip(combos, profit, drawdown, capital, ranks)]
+    # Stable sort keeps the space order for ties, so output only depends on the seed
+    results.sort(key=lambda result: (result['rank'], -result['profit']))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep bot parameters against local candle data')
+    parser.add_argument('candles', help='CSV or .npy file with OHLCV candles')
+    parser.add_argument('--bot-type', choices=['grid', 'dca'], default='grid')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help="Values to try, 'start:stop:step' or 'a,b,c' (repeat for each parameter)")
+    parser.add_argument('--samples', type=int, help='Evaluate this many random combinations instead of all of them')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for --samples')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--top', type=int, default=10, help='Results to print')
+    parser.add_argument('--output', help='Write every result to this CSV file')
+    args = parser.parse_args()
+
+    defaults = {**GRID_BOT_CONFIG, **GRID_EXTRA_PARAMS} if args.bot_type == 'grid' else DCA_BOT_CONFIG
+    try:
+        params = dict(parse_param(spec) for spec in args.param)
+    except Exception as e:
+        print(f"❌ {e}")
+        return
+    unknown = [name for name in params if name not in defaults]
+    if unknown:
+        print(f"❌ Unknown {args.bot_type} parameters: {unknown}")
+        return
+
+    candles = load_candles(args.candles)
+    space = int(np.prod([len(values) for values in params.values()])) if params else 1
+    count = min(space, args.samples) if args.samples else space
+    print(f"\n📈 Loaded {len(candles['close'])} candles from {args.candles}")
+    print(f"🔍 Evaluating {count} of {space} {args.bot_type} configurations on {args.workers} workers...")
+
+    start = time.perf_counter()
+    results = optimize(candles, args.bot_type, params, args.samples, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    if not results:
+        print("No configuration left to evaluate (every combination was dropped)")
+        return
+
+    front = [result for result in results if result['rank'] == 0]
+    print(f"⏱️ {len(results)} backtests in {elapsed:.1f}s ({len(results) / elapsed:.0f}/s), "
+          f"{len(front)} on the Pareto front\n")
+    for result in results[:args.top]:
+        settings = ', '.join(f"{name}={result[name]}" for name in params)
+        print(f"[rank {result['rank']}] profit {result['profit']:.8g}, drawdown {result['drawdown']:.8g}, "
+              f"capital {result['capital']:.8g}: {settings}")
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(params) + ['profit', 'drawdown', 'capital', 'rank'])
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"\n💾 Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import asyncio
+
+
+def paginate(fetch_page, page_size, executor):
+    """
+    Lazily yield items from an offset-paged endpoint
+
+    The next page is fetched in the background while the current one is being
+    consumed. Closing the generator early cancels the pending prefetch.
+
+    Args:
+        fetch_page: Callable taking an offset and returning a list of items
+        page_size: Items per page; a shorter page ends the iteration
+        executor: Executor used for the prefetch requests
+    """
+    offset = 0
+    future = executor.submit(fetch_page, offset)
+    try:
+        while future is not None:
+            page = future.result()
+            offset += len(page)
+            # Prefetch the next page while this one is consumed
+            future = executor.submit(fetch_page, offset) if len(page) >= page_size else None
+            yield from page
+    finally:
+        if future is not None:
+            future.cancel()
+
+
+async def apaginate(fetch_page, page_size):
+    """
+    Async version of paginate
+
+    Args:
+        fetch_page: Coroutine function taking an offset and returning a list of items
+        page_size: Items per page; a shorter page ends the iteration
+    """
+    offset = 0
+    task = asyncio.ensure_future(fetch_page(offset))
+    try:
+        while task is not None:
+            page = await task
+            offset += len(page)
+            # Prefetch the next page while this one is consumed
+            task = asyncio.ensure_future(fetch_page(offset)) if len(page) >= page_size else None
+            for item in page:
+                yield item
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+def updated_since(deal, since):
+    """True when a deal was updated at or after since (an ISO 8601 string), or since is None"""
+    return since is None or (deal.get('updated_at') or '') >= since
@@ -0,0 +1,188 @@
+import time
+
+from config import PAIR_CATALOG_TTL
+from price_graph import split_symbol
+from metadata_cache import metadata_cache
+
+
+def split_pair(pair):
+    """
+    Split a pair into (base, quote)
+
+    Uses the underscore when present, otherwise the known quote currencies,
+    so 4-letter tickers like DOGEUSDT or BTCFDUSD split correctly.
+    """
+    if '_' in pair:
+        base, quote = pair.split('_', 1)
+        return base, quote
+    currencies = split_symbol(pair)
+    if currencies:
+        return currencies
+    return pair[:len(pair) // 2], pair[len(pair) // 2:]
+
+
+def alternate_format(pair):
+    """Convert between the BTC_ETH and BTCETH forms of a pair"""
+    if '_' in pair:
+        return pair.replace('_', '')
+    return '_'.join(split_pair(pair))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'pair')
+
+    def __init__(self):
+        self.children = {}
+        self.pair = None
+
+
+class PairCatalog:
+    def __init__(self, exchange, pairs, fetched_at=None, version=None):
+        """
+        Indexed pair list for one exchange
+
+        Args:
+            exchange: Market code the pairs belong to
+            pairs: Pairs as returned by get_available_pairs
+            fetched_at: Unix time the pairs were downloaded
+            version: Version stamp of the cached pairs the catalog was built from
+        """
+        self.exchange = exchange
+        self.pairs = list(pairs)
+        self.fetched_at = fetched_at or time.time()
+        self.version = version
+        self._pairs = set(self.pairs)
+        self._compact = {}
+        for pair in self.pairs:
+            self._compact.setdefault(pair.replace('_', '').upper(), pair)
+        self._by_base = None
+        self._by_quote = None
+        self._trie = None
+
+    def _index(self):
+        """Build the currency and prefix indexes on first use, validating a pair only needs normalize"""
+        if self._trie is not None:
+            return
+        by_base = {}
+        by_quote = {}
+        trie = _TrieNode()
+        for pair in self.pairs:
+            base, quote = split_pair(pair)
+            by_base.setdefault(base, []).append(pair)
+            by_quote.setdefault(quote, []).append(pair)
+            node = trie
+            for char in pair.upper():
+                node = node.children.setdefault(char, _TrieNode())
+            node.pair = pair
+        self._by_base, self._by_quote, self._trie = by_base, by_quote, trie
+
+    @property
+    def by_base(self):
+        """Pairs per base currency"""
+        self._index()
+        return self._by_base
+
+    @property
+    def by_quote(self):
+        """Pairs per quote currency"""
+        self._index()
+        return self._by_quote
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __contains__(self, pair):
+        return self.normalize(pair) is not None
+
+    @property
+    def age(self):
+        """Seconds since the catalog was downloaded"""
+        return time.time() - self.fetched_at
+
+    def normalize(self, pair):
+        """Exchange spelling of a pair given as BTC_ETH, BTCETH or btc_eth, or None if unknown"""
+        if pair in self._pairs:
+            return pair
+        return self._compact.get(pair.replace('_', '').upper())
+
+    def split(self, pair):
+        """Split a pair into (base, quote) using the exchange spelling when known"""
+        return split_pair(self.normalize(pair) or pair)
+
+    def similar(self, pair, limit=5):
+        """Pairs sharing the base currency (then the quote currency) with the given pair"""
+        base, quote = self.split(pair)
+        candidates = self.by_base.get(base, []) + self.by_quote.get(quote, [])
+        return list(dict.fromkeys(candidates))[:limit]
+
+    def suggest(self, text, limit=5, max_distance=2):
+        """
+        Prefix matches for text, or the closest pairs by edit distance when there are none
+
+        The fuzzy search walks the trie with one Levenshtein row per node, so
+        branches that are already too far away are never visited.
+        """
+        self._index()
+        text = text.upper()
+        node = self._trie
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                break
+        else:
+            matches = []
+            self._collect(node, matches, limit)
+            if matches:
+                return matches
+
+        results = []
+        first_row = list(range(len(text) + 1))
+        for char, child in self._trie.children.items():
+            self._fuzzy(child, char, text, first_row, max_distance, results)
+        results.sort()
+        return [pair for _, pair in results[:limit]]
+
+    def _collect(self, node, matches, limit):
+        if len(matches) >= limit:
+            return
+        if node.pair is not None:
+            matches.append(node.pair)
+        for char in sorted(node.children):
+            self._collect(node.children[char], matches, limit)
+
+    def _fuzzy(self, node, char, text, previous_row, max_distance, results):
+        row = [previous_row[0] + 1]
+        for i in range(1, len(text) + 1):
+            cost = 0 if text[i - 1] == char else 1
+            row.append(min(row[i - 1] + 1, previous_row[i] + 1, previous_row[i - 1] + cost))
+        if node.pair is not None and row[-1] <= max_distance:
+            results.append((row[-1], node.pair))
+        if min(row) <= max_distance:
+            for next_char, child in node.children.items():
+                self._fuzzy(child, next_char, text, row, max_distance, results)
+
+
+_catalogs = {}
+
+
+async def load_pair_catalog(client, exchange, ttl=PAIR_CATALOG_TTL, refresh=False):
+    """
+    Pair catalog for an exchange from the metadata cache or the API
+
+    Args:
+        client: ThreeCommasClient or AsyncThreeCommasClient instance
+        exchange: Market code (e.g. 'binance')
+        ttl: Seconds a cached catalog is trusted
+        refresh: Ignore cached catalogs and download a new one
+    """
+    # Imported here because the clients import this module for split_pair
+    from async_three_commas_client import call_client
+
+    async def fetch():
+        return list(await call_client(client.get_available_pairs, exchange) or [])
+
+    entry = await metadata_cache.load('pair_catalog', exchange, fetch, ttl, refresh)
+    catalog = _catalogs.get(exchange)
+    if catalog is None or catalog.version != entry.version:
+        catalog = _catalogs[exchange] = PairCatalog(exchange, entry.value, entry.fetched_at, entry.version)
+    return catalog
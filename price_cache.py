@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import PRICE_CACHE_TTL, PRICE_CACHE_STALE_TTL, PRICE_CACHE_SIZE
+
+
+class CachedPrice:
+    """A cached rate together with the source that produced it and when"""
+    __slots__ = ('pair', 'rate', 'source', 'fetched_at')
+
+    def __init__(self, pair, rate, source, fetched_at=None):
+        self.pair = pair
+        self.rate = rate
+        self.source = source
+        self.fetched_at = fetched_at if fetched_at is not None else time.monotonic()
+
+    @property
+    def age(self):
+        """Seconds since the price was fetched"""
+        return time.monotonic() - self.fetched_at
+
+    def as_rate(self):
+        """Copy of the rate dict annotated with its source and age"""
+        rate = dict(self.rate)
+        rate['source'] = self.source
+        rate['age'] = self.age
+        return rate
+
+
+class PriceCache:
+    def __init__(self, ttl=PRICE_CACHE_TTL, stale_ttl=PRICE_CACHE_STALE_TTL, max_size=PRICE_CACHE_SIZE):
+        """
+        Per-pair price cache with TTL, stale-while-revalidate and LRU eviction
+
+        Args:
+            ttl: Seconds a price is served as fresh
+            stale_ttl: Additional seconds a price is served as stale while it is refreshed
+            max_size: Maximum number of pairs kept before the least recently used is evicted
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, pair):
+        """
+        Look up a pair
+
+        Returns (entry, state) where state is 'fresh', 'stale' or None when
+        the pair is missing or too old to be served.
+        """
+        with self._lock:
+            entry = self._entries.get(pair)
+            if entry is None:
+                return None, None
+            age = entry.age
+            if age > self.ttl + self.stale_ttl:
+                del self._entries[pair]
+                return None, None
+            self._entries.move_to_end(pair)
+            return entry, 'fresh' if age <= self.ttl else 'stale'
+
+    def put(self, pair, rate, source):
+        """Store a rate for a pair, evicting the least recently used pair if full"""
+        entry = CachedPrice(pair, rate, source)
+        with self._lock:
+            self._entries[pair] = entry
+            self._entries.move_to_end(pair)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._refreshing.discard(pair)
+        return entry
+
+    def begin_refresh(self, pair):
+        """Claim the background refresh for a pair; False if one is already running"""
+        with self._lock:
+            if pair in self._refreshing:
+                return False
+            self._refreshing.add(pair)
+            return True
+
+    def end_refresh(self, pair):
+        """Release a refresh claim without storing a new price (e.g. after a failure)"""
+        with self._lock:
+            self._refreshing.discard(pair)
+
+    def invalidate(self, pair=None):
+        """Drop one pair, or every pair when none is given"""
+        with self._lock:
+            if pair is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(pair, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import requests
+
+from config import BINANCE_API_URL, BINANCE_TIMEOUT, PRICE_GRAPH_TTL
+from rate_limiter import rate_limiter
+
+# Quote assets used to split Binance symbols (longest match wins, e.g. FDUSD before USD)
+QUOTE_ASSETS = sorted([
+    'USDT', 'USDC', 'FDUSD', 'BUSD', 'TUSD', 'DAI', 'BTC', 'ETH', 'BNB', 'XRP', 'TRX', 'DOGE',
+    'EUR', 'GBP', 'TRY', 'BRL', 'AUD', 'ARS', 'JPY', 'RUB', 'UAH', 'ZAR', 'PLN', 'RON', 'IDRT',
+    'BIDR', 'MXN', 'COP', 'CZK', 'USDP', 'PAX', 'VAI',
+], key=len, reverse=True)
+
+# Currencies tried as the intermediate leg when a pair has no direct market
+HUB_ASSETS = ('USDT', 'BTC', 'ETH', 'BUSD')
+
+
+def split_symbol(symbol):
+    """Split a Binance symbol like BTCUSDT into (base, quote), or None if the quote is unknown"""
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return None
+
+
+class PriceSnapshot:
+    """Immutable index of one bulk ticker download"""
+    __slots__ = ('rates', 'built_at', 'routes')
+
+    def __init__(self, rates, built_at):
+        self.rates = rates  # (base, quote) -> (mid price, relative spread), both directions
+        self.built_at = built_at
+        self.routes = {}  # (base, quote) -> resolved (price, path), memoized per snapshot
+
+
+class PriceGraph:
+    def __init__(self, ttl=PRICE_GRAPH_TTL):
+        """
+        Currency graph built from a single bulk Binance bookTicker request
+
+        Any pair is answered directly, through the inverse market, or through one
+        of the HUB_ASSETS, preferring the route with the tightest combined spread.
+
+        Args:
+            ttl: Seconds a snapshot is used before the next lookup refreshes it
+        """
+        self.ttl = ttl
+        self.snapshot = None
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        """True when there is no snapshot or it is older than the TTL"""
+        snapshot = self.snapshot
+        return snapshot is None or time.monotonic() - snapshot.built_at > self.ttl
+
+    def refresh(self, force=False, timeout=BINANCE_TIMEOUT):
+        """Download every ticker in one request and rebuild the graph"""
+        with self._lock:
+            if not force and not self.is_stale():
+                return self.snapshot
+            rate_limiter.acquire('binance', 'ticker/bookTicker')
+            response = self.session.get(f"{BINANCE_API_URL}/api/v3/ticker/bookTicker", timeout=timeout)
+            rate_limiter.update('binance', response.status_code, response.headers)
+            response.raise_for_status()
+            return self.load(response.json())
+
+    def load(self, tickers):
+        """Build a snapshot from a list of bookTicker entries and make it current"""
+        rates = {}
+        for ticker in tickers:
+            pair = split_symbol(ticker.get('symbol', ''))
+            if not pair:
+                continue
+            try:
+                bid = float(ticker['bidPrice'])
+                ask = float(ticker['askPrice'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if bid <= 0 or ask <= 0:
+                continue  # Halted or delisted market
+            mid = (bid + ask) / 2
+            spread = (ask - bid) / mid
+            base, quote = pair
+            rates[(base, quote)] = (mid, spread)
+            rates.setdefault((quote, base), (1 / mid, spread))
+
+        self.snapshot = PriceSnapshot(rates, time.monotonic())
+        return self.snapshot
+
+    def get_rate(self, base, quote, refresh=True, timeout=BINANCE_TIMEOUT):
+        """
+        Price of base in quote currency
+
+        Returns (price, path) where path lists the markets used, or None when
+        no route exists through the hub currencies.
+        """
+        if refresh and self.is_stale():
+            self.refresh(timeout=timeout)
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+
+        key = (base, quote)
+        if key in snapshot.routes:
+            return snapshot.routes[key]
+
+        route = None
+        if key in snapshot.rates:
+            route = (snapshot.rates[key][0], [f"{base}/{quote}"])
+        else:
+            best_spread = None
+            for hub in HUB_ASSETS:
+                first = snapshot.rates.get((base, hub))
+                second = snapshot.rates.get((hub, quote))
+                if not first or not second:
+                    continue
+                spread = first[1] + second[1]
+                if best_spread is None or spread < best_spread:
+                    best_spread = spread
+                    route = (first[0] * second[0], [f"{base}/{hub}", f"{hub}/{quote}"])
+
+        snapshot.routes[key] = route
+        return route
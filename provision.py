@@ -0,0 +1,326 @@
+# 3Commas Bulk Bot Provisioning
+# Creates and starts a fleet of grid and DCA bots described in a YAML or CSV manifest.
+# Bots are matched to existing ones by name, so rerunning after a partial failure resumes
+# the deployment instead of creating duplicates.
+
+import argparse
+import asyncio
+import csv
+import time
+
+import yaml
+
+from three_commas_client import ThreeCommasClient
+from async_three_commas_client import AsyncThreeCommasClient, iter_client
+from pair_catalog import load_pair_catalog
+from grid_bot import GridBot
+from dca_bot import DCABot
+from grid_planner import plan_grid, validate_grid
+from dca_ladder import validate_ladder, required_funds, check_capital
+from account_registry import load_accounts, load_balances
+from market_stream import market_stream
+from metrics import metrics
+from config import (GRID_BOT_CONFIG, DCA_BOT_CONFIG, PROVISION_CONCURRENCY, STREAM_CONNECT_TIMEOUT, METRICS_PORT,
+                    METRICS_HOST)
+
+# Bot type -> (bot class, default configuration)
+BOT_TYPES = {
+    'grid': (GridBot, GRID_BOT_CONFIG),
+    'dca': (DCABot, DCA_BOT_CONFIG),
+}
+
+REQUIRED_PARAMS = {
+    'grid': ['name', 'pair', 'quantity_per_grid', 'grids_count'],
+    'dca': ['name', 'pair', 'base_order_volume', 'safety_order_volume', 'max_safety_orders',
+            'take_profit', 'safety_order_step_percentage'],
+}
+
+POSITIVE_PARAMS = ['quantity_per_grid', 'upper_price', 'lower_price', 'base_order_volume', 'safety_order_volume',
+                   'take_profit', 'safety_order_step_percentage', 'martingale_volume_coefficient',
+                   'martingale_step_coefficient', 'leverage_custom_value']
+
+
+def _parse_value(text):
+    """Convert a CSV cell to int or float when it looks like a number"""
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def load_manifest(path):
+    """
+    Read bot entries from a manifest file
+
+    YAML manifests are either a list of bots or a mapping with optional
+    'defaults' (applied to every bot) and a 'bots' list. CSV manifests have
+    one bot per row, empty cells fall back to the defaults from config.py.
+    Every entry needs a 'type' ('grid' or 'dca') and may set 'account'
+    (account ID, name or exchange market code, DEFAULT_EXCHANGE when omitted).
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            return [{key.strip(): _parse_value(value.strip()) for key, value in row.items() if key and value and value.strip()}
+                    for row in csv.DictReader(f)]
+
+    with open(path) as f:
+        manifest = yaml.safe_load(f) or []
+    if isinstance(manifest, list):
+        return manifest
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('bots'), list):
+        raise Exception("Manifest must be a list of bots or a mapping with a 'bots' list")
+    defaults = manifest.get('defaults') or {}
+    return [{**defaults, **entry} for entry in manifest['bots']]
+
+
+async def validate_manifest(client, entries, registry):
+    """
+    Check every entry before anything is created
+
+    Returns (plans, errors). Each plan holds the bot type, account and full
+    configuration; errors lists every problem found, with the entry number.
+    DCA bots are also checked against the account balances, counting what
+    the DCA bots listed before them on the same account already need.
+    """
+    plans = []
+    errors = []
+    names = set()
+    catalogs = {}
+    balances = {}
+    committed = {}  # (account ID, currency) -> amount needed by the DCA bots validated so far
+
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            errors.append(f"#{number}: expected a mapping, got {entry!r}")
+            continue
+        entry = dict(entry)
+        bot_type = str(entry.pop('type', '')).lower()
+        label = f"#{number} ({entry.get('name', 'unnamed')})"
+        if bot_type not in BOT_TYPES:
+            errors.append(f"{label}: type must be 'grid' or 'dca', got {bot_type!r}")
+            continue
+
+        value = entry.pop('account', entry.pop('account_id', None))
+        account = registry.default() if value in (None, '') else registry.find(value)
+        if account is None:
+            errors.append(f"{label}: no matching account")
+            continue
+
+        defaults = BOT_TYPES[bot_type][1]
+        unknown = [key for key in entry if key not in defaults]
+        if unknown:
+            errors.append(f"{label}: unknown parameters {unknown}")
+            continue
+        config = {**defaults, **entry}
+
+        missing = [param for param in REQUIRED_PARAMS[bot_type] if config.get(param) in (None, '')]
+        if missing:
+            errors.append(f"{label}: missing {missing}")
+            continue
+
+        problems = [f"{param} must be a positive number" for param in POSITIVE_PARAMS
+                    if config.get(param) is not None
+                    and (not isinstance(config[param], (int, float)) or config[param] <= 0)]
+        if bot_type == 'grid':
+            if not isinstance(config['grids_count'], int) or config['grids_count'] < 2:
+                problems.append("grids_count must be an integer of at least 2")
+            if config.get('upper_price') and config.get('lower_price') and not problems:
+                problems.extend(validate_grid(plan_grid(config['lower_price'], config['upper_price'],
+                                                        config['grids_count'], config['quantity_per_grid'])))
+            if config.get('leverage_type') not in ('spot', 'cross', 'isolated'):
+                problems.append("leverage_type must be 'spot', 'cross' or 'isolated'")
+        else:
+            if not isinstance(config['max_safety_orders'], int) or config['max_safety_orders'] < 0:
+                problems.append("max_safety_orders must be a non-negative integer")
+            if config.get('strategy') not in ('long', 'short'):
+                problems.append("strategy must be 'long' or 'short'")
+            if not problems:
+                problems.extend(validate_ladder(config))
+
+        key = (bot_type, config['name'])
+        if key in names:
+            problems.append(f"duplicate {bot_type} bot name")
+        names.add(key)
+
+        market_code = account['market_code']
+        if market_code not in catalogs:
+            try:
+                catalogs[market_code] = await load_pair_catalog(client, market_code)
+            except Exception as e:
+                print(f"⚠️ Could not load pairs for {market_code}, skipping pair checks: {e}")
+                catalogs[market_code] = None
+        catalog = catalogs[market_code]
+        if catalog is not None:
+            exchange_pair = catalog.normalize(str(config['pair']))
+            if exchange_pair:
+                config['pair'] = exchange_pair
+            else:
+                suggestions = catalog.similar(str(config['pair'])) or catalog.suggest(str(config['pair']))
+                problems.append(f"pair {config['pair']} not found on {market_code}"
+                                + (f" (similar: {suggestions})" if suggestions else ""))
+
+        if bot_type == 'dca' and not problems:
+            # Every DCA bot on an account draws from the same balances, fetched once per account
+            if account['id'] not in balances:
+                try:
+                    balances[account['id']] = await load_balances(client, account['id'])
+                except Exception as e:
+                    print(f"⚠️ Could not load balances for {account['name']}, skipping capital checks: {e}")
+                    balances[account['id']] = None
+            if balances[account['id']] is not None:
+                currency, needed = required_funds(config)
+                key = (account['id'], currency)
+                problems.extend(check_capital(config, balances[account['id']], committed=committed.get(key, 0)))
+                if needed is not None:
+                    committed[key] = committed.get(key, 0) + needed
+
+        if problems:
+            errors.extend(f"{label}: {problem}" for problem in problems)
+            continue
+        plans.append({'type': bot_type, 'account': account, 'config': config})
+
+    return plans, errors
+
+
+async def load_existing_bots(client):
+    """Existing bots keyed by (type, name), used to skip bots that were already provisioned"""
+    async def collect(method):
+        return [bot async for bot in iter_client(method)]
+
+    dca_bots, grid_bots = await asyncio.gather(collect(client.iter_bots), collect(client.iter_grid_bots))
+    existing = {('dca', bot.get('name')): bot for bot in dca_bots}
+    existing.update({('grid', bot.get('name')): bot for bot in grid_bots})
+    return existing
+
+
+async def provision_bot(client, plan, existing, semaphore):
+    """
+    Create and start one bot, or start the existing bot with the same name
+
+    Returns (status, bot ID, error) where status is 'created', 'resumed',
+    'exists' or 'failed'.
+    """
+    bot_type = plan['type']
+    config = plan['config']
+    bot_class = BOT_TYPES[bot_type][0]
+    current = existing.get((bot_type, config['name']))
+    bot_id = current.get('id') if current else None
+
+    async with semaphore:
+        try:
+            bot = bot_class(client, plan['account']['id'], dict(config))
+            if current:
+                if current.get('is_enabled'):
+                    return 'exists', bot_id, None
+                # Created by an earlier run that failed before starting it
+                await bot.start_bot(bot_id)
+                return 'resumed', bot_id, None
+
+            data = await bot.create_bot()
+            bot_id = data.get('id') if data else None
+            if not bot_id:
+                raise Exception(f"No bot ID in response: {data}")
+            await bot.start_bot(bot_id)
+            return 'created', bot_id, None
+        except Exception as e:
+            return 'failed', bot_id, str(e)
+
+
+async def provision(client, plans, concurrency=PROVISION_CONCURRENCY):
+    """Provision every plan with at most concurrency bots in flight, returns a list of (plan, result)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    existing = await load_existing_bots(client)
+    print(f"Found {len(existing)} existing bots")
+
+    async def run(plan):
+        return plan, await provision_bot(client, plan, existing, semaphore)
+
+    results = []
+    for finished in asyncio.as_completed([run(plan) for plan in plans]):
+        plan, (status, bot_id, error) = await finished
+        results.append((plan, (status, bot_id, error)))
+        icon = '❌' if status == 'failed' else '✅'
+        details = f" - {error}" if error else ""
+        print(f"{icon} [{len(results)}/{len(plans)}] {plan['type']} bot '{plan['config']['name']}' "
+              f"({plan['config']['pair']}): {status} (ID: {bot_id}){details}")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Create and start bots from a YAML or CSV manifest')
+    parser.add_argument('manifest', help='Path to a .yaml/.yml or .csv manifest')
+    parser.add_argument('--concurrency', type=int, default=PROVISION_CONCURRENCY,
+                        help='Maximum number of bots created at once')
+    parser.add_argument('--test-mode', action='store_true', help='Validate the manifest without creating bots')
+    parser.add_argument('--async-client', action='store_true', help='Use the asyncio client with pooled connections')
+    parser.add_argument('--stream', action='store_true', help='Price grid bots from the live WebSocket price stream')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                        help='Serve Prometheus metrics on this port (off by default)')
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        port = metrics.start_server(args.metrics_port)
+        print(f"📈 Metrics at http://{METRICS_HOST}:{port}/metrics")
+
+    try:
+        entries = load_manifest(args.manifest)
+    except Exception as e:
+        print(f"❌ Could not read manifest: {e}")
+        return
+    print(f"\n📋 Loaded {len(entries)} bots from {args.manifest}")
+
+    print("🔄 Connecting to 3Commas API...")
+    client = AsyncThreeCommasClient() if args.async_client else ThreeCommasClient()
+    try:
+        registry = await load_accounts(client)
+        if not len(registry):
+            print("⚠️ No exchange accounts connected to 3Commas!")
+            return
+
+        print("🔍 Validating manifest...")
+        plans, errors = await validate_manifest(client, entries, registry)
+        if errors:
+            print(f"\n❌ {len(errors)} problems found, nothing was created:")
+            for error in errors:
+                print(f"  - {error}")
+            return
+        print(f"✅ All {len(plans)} bots are valid")
+
+        if args.test_mode:
+            print("\n🧪 Test mode: no bots will be created")
+            for plan in plans:
+                print(f"  {plan['type']} bot '{plan['config']['name']}' on {plan['account']['name']}: {plan['config']['pair']}")
+            return
+
+        if args.stream:
+            grid_pairs = {plan['config']['pair'] for plan in plans if plan['type'] == 'grid'}
+            await market_stream.subscribe(grid_pairs)
+            if await market_stream.wait_connected(STREAM_CONNECT_TIMEOUT):
+                print(f"📡 Streaming prices for {len(grid_pairs)} pairs")
+            else:
+                print("⚠️ Price stream did not connect, using REST prices")
+
+        print(f"\n🚀 Provisioning {len(plans)} bots ({args.concurrency} at a time)...")
+        start = time.perf_counter()
+        results = await provision(client, plans, args.concurrency)
+        elapsed = time.perf_counter() - start
+
+        counts = {}
+        for _, (status, _, _) in results:
+            counts[status] = counts.get(status, 0) + 1
+        print(f"\n📊 Done in {elapsed:.1f}s: {counts.get('created', 0)} created, {counts.get('resumed', 0)} resumed, "
+              f"{counts.get('exists', 0)} already running, {counts.get('failed', 0)} failed")
+        if counts.get('failed'):
+            print("Rerun the same manifest to retry the failed bots, existing ones are skipped.")
+    except Exception as e:
+        print(f"\n❌ Fatal error: {e}")
+    finally:
+        await market_stream.stop()
+        if isinstance(client, AsyncThreeCommasClient):
+            await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
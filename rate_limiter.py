@@ -0,0 +1,242 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from config import RATE_LIMITS, ENDPOINT_WEIGHTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET_RATIO
+
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Exponential backoff with full jitter: a random delay between 0 and base * 2^attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        Token bucket where callers reserve tokens ahead of time
+
+        The balance may go negative: each reservation then waits its turn,
+        which queues requests in arrival order instead of failing them.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, weight=1):
+        """Take weight tokens and return how many seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= weight
+            return max(0, -self.tokens / self.rate, self.paused_until - now)
+
+    def limit_tokens(self, remaining):
+        """Never allow more tokens than the server says are left"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+
+    def pause(self, seconds):
+        """Hold every new reservation for the given number of seconds"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RetryBudget:
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, minimum=10):
+        """
+        Caps retries at a fraction of recent requests so failures cannot turn into retry storms
+
+        Args:
+            ratio: Retry tokens earned per request
+            minimum: Retry tokens available before any requests were made
+        """
+        self.ratio = ratio
+        self.capacity = max(minimum, minimum / ratio)
+        self.tokens = minimum
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """Spend one retry token, False when the budget is exhausted"""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class _GroupStats:
+    __slots__ = ('requests', 'throttled', 'errors', 'retries', 'retries_denied', 'waited',
+                 'queue_depth', 'max_queue_depth', 'recent')
+
+    def __init__(self):
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.waited = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.recent = deque(maxlen=10000)
+
+
+class RateLimiter:
+    def __init__(self, limits=RATE_LIMITS, weights=ENDPOINT_WEIGHTS):
+        """
+        Shared client-side rate limiting for every API the bots talk to
+
+        Args:
+            limits: {group: (tokens per second, burst capacity)}, e.g. '3commas', 'binance'
+            weights: {'group:endpoint': weight}, endpoints not listed weigh 1
+        """
+        self.weights = weights
+        self.buckets = {group: TokenBucket(rate, capacity) for group, (rate, capacity) in limits.items()}
+        self.budgets = {group: RetryBudget() for group in limits}
+        self._stats = {group: _GroupStats() for group in limits}
+        self._lock = threading.Lock()
+
+    def set_limit(self, group, rate, capacity):
+        """Replace the bucket for a group, e.g. when talking to a local stand-in server"""
+        self.buckets[group] = TokenBucket(rate, capacity)
+
+    def _begin(self, group, endpoint):
+        stats = self._stats[group]
+        wait = self.buckets[group].reserve(self.weights.get(f"{group}:{endpoint}", 1))
+        with self._lock:
+            stats.requests += 1
+            stats.recent.append(time.monotonic())
+            stats.waited += wait
+            if wait > 0:
+                stats.queue_depth += 1
+                stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
+        self.budgets[group].deposit()
+        return wait
+
+    def _end_wait(self, group):
+        with self._lock:
+            self._stats[group].queue_depth -= 1
+
+    def acquire(self, group, endpoint=''):
+        """Block until a request to endpoint may be sent"""
+        wait = self._begin(group, endpoint)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._end_wait(group)
+
+    async def acquire_async(self, group, endpoint=''):
+        """Wait without blocking the event loop until a request to endpoint may be sent"""
+        wait = self._begin(group, endpoint)
+        if wait > 0:
+            # Cancelled waiters (hedged race losers, wait_for timeouts) leave the queue too
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._end_wait(group)
+
+    def update(self, group, status_code, headers=None):
+        """Record a response and adjust the bucket from its rate-limit headers"""
+        headers = headers or {}
+        stats = self._stats[group]
+        with self._lock:
+            if status_code == 429 or status_code == 418:
+                stats.throttled += 1
+            elif status_code is None or status_code >= 400:
+                stats.errors += 1
+
+        bucket = self.buckets[group]
+        used_weight = headers.get('X-MBX-USED-WEIGHT-1M')
+        if used_weight is not None:
+            # Binance reports the weight used in the current minute
+            try:
+                bucket.limit_tokens(bucket.rate * 60 - int(used_weight))
+            except ValueError:
+                pass
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            try:
+                bucket.limit_tokens(int(remaining))
+            except ValueError:
+                pass
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                bucket.pause(float(retry_after))
+            except ValueError:
+                pass
+        elif status_code in (418, 429):
+            bucket.pause(backoff_delay(0, base=1))
+
+    def should_retry(self, group, status_code, attempt, max_retries):
+        """True when a failed request may be retried within the shared retry budget"""
+        if status_code is not None and status_code not in RETRY_STATUS_CODES:
+            return False
+        if attempt >= max_retries:
+            return False
+        allowed = self.budgets[group].withdraw()
+        with self._lock:
+            if allowed:
+                self._stats[group].retries += 1
+            else:
+                self._stats[group].retries_denied += 1
+        return allowed
+
+    def stats(self):
+        """Throughput and queue statistics per group"""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for group, stats in self._stats.items():
+                last_minute = sum(1 for t in stats.recent if now - t <= 60)
+                window = min(60, now - stats.recent[0]) if stats.recent else 0
+                result[group] = {
+                    'requests': stats.requests,
+                    'throughput': last_minute / window if window > 0 else 0.0,
+                    'queue_depth': stats.queue_depth,
+                    'max_queue_depth': stats.max_queue_depth,
+                    'waited': stats.waited,
+                    'throttled': stats.throttled,
+                    'errors': stats.errors,
+                    'retries': stats.retries,
+                    'retries_denied': stats.retries_denied,
+                    'limit': self.buckets[group].rate,
+                }
+        return result
+
+    def format_stats(self):
+        """One line per group, for printing"""
+        lines = []
+        for group, stats in self.stats().items():
+            if not stats['requests']:
+                continue
+            lines.append(
+                f"{group}: {stats['requests']} requests, {stats['throughput']:.1f}/s (limit {stats['limit']:g}/s), "
+                f"queue {stats['queue_depth']} (max {stats['max_queue_depth']}), waited {stats['waited']:.1f}s, "
+                f"throttled {stats['throttled']}, retries {stats['retries']} ({stats['retries_denied']} denied)"
+            )
+        return lines
+
+
+# Shared by every client in the process so limits apply to the whole fleet
+rate_limiter = RateLimiter()
@@ -0,0 +1,158 @@
+import asyncio
+import copy
+import functools
+import inspect
+import threading
+
+from config import SINGLEFLIGHT_KEYS
+from metrics import metrics
+
+
+class _Call:
+    """A call in flight, the callers waiting on it and its outcome"""
+    __slots__ = ('done', 'task', 'waiters', 'result', 'error')
+
+    def __init__(self, task=None):
+        self.done = threading.Event() if task is None else None
+        self.task = task  # asyncio.Task of async calls
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, keys=SINGLEFLIGHT_KEYS):
+        """
+        Shares one in-flight call between concurrent callers asking for the same thing
+
+        The first caller for a key runs the call, callers arriving before it
+        finishes wait and get its result or its exception. When a result is
+        shared every caller gets a deep copy, so nobody sees another caller's
+        changes. Nothing is kept once the call finishes, caching is left to
+        the callers.
+
+        Args:
+            keys: {method name: argument names forming the key (with the client)}, methods not listed (or None)
+                are never shared
+        """
+        self.keys = dict(keys)
+        self.calls = 0
+        self.shared = 0
+        self._calls = {}  # key -> _Call of blocking callers
+        self._tasks = {}  # key -> _Call of async callers
+        self._lock = threading.Lock()
+
+    def key(self, name, signature, args, kwargs):
+        """
+        Coalescing key for a call, None when the method is not coalesced
+
+        The client instance is part of the key, so clients with a different
+        base URL or credentials never share each other's results.
+        """
+        names = self.keys.get(name)
+        if names is None:
+            return None
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            return (name, bound.arguments.get('self')) + tuple(bound.arguments[arg] for arg in names)
+        except KeyError as e:
+            raise Exception(f"Unknown argument {e} in the coalescing key of {name}")
+
+    def _count(self, name, shared):
+        with self._lock:
+            self.calls += 1
+            if shared:
+                self.shared += 1
+        if shared:
+            metrics.inc('singleflight_shared_total', (name,))
+
+    def do(self, key, function, *args, **kwargs):
+        """Run function(*args, **kwargs), or wait for the identical call already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        self._count(key[0], not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return copy.deepcopy(call.result) if call.waiters else call.result
+
+    async def do_async(self, key, function, *args, **kwargs):
+        """
+        Await function(*args, **kwargs), or the identical call already in flight on this event loop
+
+        The call runs as a task of its own, so a caller that is cancelled
+        does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        call = self._tasks.get(key)
+        leader = call is None or call.task.get_loop() is not loop
+        if leader:
+            call = self._tasks[key] = _Call(loop.create_task(function(*args, **kwargs)))
+            call.task.add_done_callback(functools.partial(self._task_done, key, call))
+        else:
+            call.waiters += 1
+        self._count(key[0], not leader)
+
+        result = await asyncio.shield(call.task)
+        return copy.deepcopy(result) if call.waiters else result
+
+    def _task_done(self, key, call, task):
+        # Runs before any caller resumes, so no caller can join a finished call
+        if self._tasks.get(key) is call:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved, even when every caller was cancelled
+
+
+def coalesced(name=None):
+    """
+    Decorator for read-only client methods whose identical concurrent calls share one request
+
+    Calls are keyed by name (the method name by default) and the arguments
+    listed for it in the singleflight keys.
+    """
+    def decorate(method):
+        key_name = name or method.__name__
+        signature = inspect.signature(method)
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                key = singleflight.key(key_name, signature, args, kwargs)
+                if key is None:
+                    return await method(*args, **kwargs)
+                return await singleflight.do_async(key, method, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            key = singleflight.key(key_name, signature, args, kwargs)
+            if key is None:
+                return method(*args, **kwargs)
+            return singleflight.do(key, method, *args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+# Shared by every client in the process, calls are only coalesced per client instance
+singleflight = SingleFlight()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+# The scripts live at the repository root and are imported as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# mock_server.py does not check signatures, so dummy credentials are fine
+os.environ.setdefault('3COMMAS_API_KEY', 'test')
+os.environ.setdefault('3COMMAS_SECRET', 'test')
+
+import pytest
+
+from mock_server import Fleet, start_mock_server
+from tests.stream_server import start_stand_in_server
+
+
+@pytest.fixture(scope='session')
+def mock_server():
+    """MockServer with a small fleet, running in a daemon thread until the test process exits"""
+    return start_mock_server(Fleet(bots=5, grid_bots=2, deals_per_bot=3, seed=1))
+
+
+@pytest.fixture
+def stream_server():
+    """(ws_url, rest_url, state) of a fresh Binance stream stand-in, see tests/stream_server.py"""
+    return start_stand_in_server()
@@ -0,0 +1,106 @@
+# Local stand-in for the Binance bookTicker WebSocket stream and REST ticker,
+# used by tests/test_market_stream.py (through the stream_server fixture) and benchmark_stream.py.
+
+import asyncio
+import threading
+
+from aiohttp import web
+
+
+def start_stand_in_server(drop_after=0, batch=1):
+    """
+    Start a local stand-in for the Binance bookTicker stream in a background thread
+
+    The WebSocket endpoint answers SUBSCRIBE / UNSUBSCRIBE like Binance and
+    sends bookTicker updates for the subscribed symbols as fast as the client
+    reads them, closing the connection after drop_after messages (0 never
+    drops). The REST endpoint serves a bulk ticker download for backfills.
+
+    Returns (ws_url, rest_url, state). state counts connections, messages sent
+    and backfills, and records the symbols subscribed on each connection.
+    Tests steer the server through it: 'symbols' are served by the REST
+    endpoint, 'paused' stops sending updates, 'refuse' rejects new connections
+    and state['drop']() closes every open connection.
+    """
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    sockets = set()
+    state = {'connections': 0, 'sent': 0, 'backfills': 0, 'subscriptions': [], 'paused': False, 'refuse': False}
+
+    def ticker(symbol, tick):
+        price = 100 + (tick % 100) / 100
+        return {'u': tick, 's': symbol, 'b': f"{price:.2f}", 'B': '1.0', 'a': f"{price + 0.01:.2f}", 'A': '1.0'}
+
+    async def handle_ws(request):
+        if state['refuse']:
+            return web.Response(status=503)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        state['connections'] += 1
+        sockets.add(ws)
+        symbols = []
+        state['subscriptions'].append(symbols)
+        sent = 0
+
+        async def send():
+            nonlocal sent
+            tick = 0
+            while not ws.closed:
+                if not symbols or state['paused']:
+                    await asyncio.sleep(0.01)
+                    continue
+                for _ in range(batch):
+                    tick += 1
+                    await ws.send_json(ticker(symbols[tick % len(symbols)], tick))
+                    sent += 1
+                    state['sent'] += 1
+                if drop_after and sent >= drop_after:
+                    await ws.close()
+                    return
+                await asyncio.sleep(0)
+
+        sender = asyncio.create_task(send())
+        try:
+            async for message in ws:
+                request = message.json()
+                params = [param.split('@')[0].upper() for param in request.get('params', [])]
+                if request.get('method') == 'SUBSCRIBE':
+                    symbols.extend(symbol for symbol in params if symbol not in symbols)
+                elif request.get('method') == 'UNSUBSCRIBE':
+                    symbols[:] = [symbol for symbol in symbols if symbol not in params]
+                await ws.send_json({'result': None, 'id': request.get('id')})
+        finally:
+            sender.cancel()
+            sockets.discard(ws)
+        return ws
+
+    async def handle_rest(request):
+        state['backfills'] += 1
+        tickers = [{'symbol': symbol, 'bidPrice': '99.00', 'bidQty': '1.0', 'askPrice': '99.01', 'askQty': '1.0'}
+                   for symbol in state.get('symbols', [])]
+        return web.json_response(tickers)
+
+    async def close_all():
+        for ws in list(sockets):
+            await ws.close()
+
+    def drop():
+        """Close every open WebSocket connection, as a network failure would"""
+        asyncio.run_coroutine_threadsafe(close_all(), loop).result()
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/ws', handle_ws)
+        app.router.add_get('/api/v3/ticker/bookTicker', handle_rest)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        state['port'] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+
+    state['drop'] = drop
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(run()), loop.run_forever()), daemon=True)
+    thread.start()
+    ready.wait()
+    return f"ws://127.0.0.1:{state['port']}/ws", f"http://127.0.0.1:{state['port']}", state
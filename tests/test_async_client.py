@@ -0,0 +1,56 @@
+import asyncio
+
+from aiohttp import web
+
+from async_three_commas_client import AsyncThreeCommasClient
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_route('*', '/public/api/{tail:.*}', handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def test_malformed_json_is_not_retried():
+    requests = []
+
+    async def handler(request):
+        requests.append(request.path)
+        return web.Response(text='{"id": 1,', content_type='application/json')
+
+    async def run():
+        runner, base_url = await serve(handler)
+        try:
+            async with AsyncThreeCommasClient(base_url=base_url, nr_of_retries=3) as client:
+                return await client.request('accounts')
+        finally:
+            await runner.cleanup()
+
+    error, data = asyncio.run(run())
+    assert len(requests) == 1
+    assert error['status_code'] == 200
+    assert 'Invalid JSON' in error['msg']
+    assert data == {}
+
+
+def test_server_errors_are_retried():
+    statuses = [503, 200]
+
+    async def handler(request):
+        status = statuses.pop(0)
+        return web.json_response([] if status == 200 else {'error': 'unavailable'}, status=status)
+
+    async def run():
+        runner, base_url = await serve(handler)
+        try:
+            async with AsyncThreeCommasClient(base_url=base_url, nr_of_retries=3) as client:
+                return await client.request('accounts')
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == ({}, [])
+    assert statuses == []
@@ -0,0 +1,55 @@
+from bot_state import BotStateTracker
+
+
+def bot(profit=0.0, active=1, finished=0):
+    return {'id': 1, 'name': 'DCA', 'pairs': ['USDT_BTC'], 'profit': {'usd': str(profit)},
+            'active_deals_count': active, 'finished_deals_count': finished}
+
+
+def deal(deal_id, status):
+    return {'id': deal_id, 'status': status}
+
+
+def refresh(tracker, *args, **kwargs):
+    tracker.begin_refresh()
+    return tracker.update(*args, **kwargs)[1]
+
+
+def test_new_bot_is_summarized_then_quiet():
+    tracker = BotStateTracker(profit_delta=0.5)
+    assert refresh(tracker, bot(1.25), [deal(10, 'bought')]) == \
+        ["➕ ['USDT_BTC'], profit $1.25, 1 active / 0 finished deals"]
+    assert refresh(tracker, bot(1.5), [deal(10, 'bought')]) == []  # Below profit_delta
+
+
+def test_profit_deal_counts_and_deal_statuses_are_diffed():
+    tracker = BotStateTracker(profit_delta=0.5)
+    refresh(tracker, bot(1.0), [deal(10, 'bought')])
+    changes = refresh(tracker, bot(2.0, active=1, finished=1), [deal(11, 'bought'), deal(10, 'completed')])
+    assert changes == [
+        "💰 Profit $1.00 -> $2.00 (+1.00)",
+        "📈 Deals: 1 -> 1 active, 0 -> 1 finished",
+        "🆕 Deal 11: bought",
+        "🔄 Deal 10: bought -> completed",
+    ]
+    # The profit trend shows once there is some history
+    assert refresh(tracker, bot(3.0, active=1, finished=1), [deal(11, 'bought'), deal(10, 'completed')]) == \
+        ["💰 Profit $2.00 -> $3.00 (+1.00, +2.00 over 3 refreshes)"]
+
+
+def test_deal_errors_are_reported_once_and_recovery_is_announced():
+    tracker = BotStateTracker()
+    refresh(tracker, bot(), [deal(10, 'bought')])
+    assert refresh(tracker, bot(), error='timeout') == ["⚠️ Could not get deals: timeout"]
+    assert refresh(tracker, bot(), error='timeout') == []
+    assert refresh(tracker, bot(), [deal(10, 'bought')]) == ["✅ Deals available again"]
+
+
+def test_bots_missing_from_a_refresh_are_removed():
+    tracker = BotStateTracker()
+    refresh(tracker, bot())
+    tracker.update(dict(bot(), id=2))
+    tracker.begin_refresh()
+    tracker.update(bot())
+    assert [state.bot_id for state in tracker.remove_missing()] == [2]
+    assert len(tracker) == 1
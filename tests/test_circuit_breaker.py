@@ -0,0 +1,79 @@
+from circuit_breaker import CircuitBreaker, CircuitBreakers, CLOSED, OPEN, HALF_OPEN
+
+
+def breaker():
+    return CircuitBreaker('currency_rates', 'USDT', min_requests=3, failure_rate=0.8, open_time=10, max_open_time=35,
+                          probes=1)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False)
+
+
+def wait_out(breaker):
+    """Pretend the open time has passed"""
+    breaker.opened_until = 0.0
+
+
+def test_opens_once_enough_calls_fail():
+    cb = breaker()
+    fail(cb, 2)
+    assert cb.state == CLOSED  # Fewer than min_requests outcomes
+    fail(cb, 1)
+    assert cb.state == OPEN
+    assert not cb.allow()
+    assert cb.snapshot()['skipped'] == 1
+    assert 0 < cb.snapshot()['next_probe'] <= 10
+
+
+def test_successes_keep_it_closed():
+    cb = breaker()
+    for succeeded in (False, True, False, False):
+        assert cb.allow()
+        cb.record(succeeded)
+    assert cb.state == CLOSED  # 3 of 4 failed, below 80%
+
+
+def test_half_open_probe_closes_on_success():
+    cb = breaker()
+    fail(cb, 3)
+    wait_out(cb)
+    assert cb.allow()
+    assert cb.state == HALF_OPEN
+    assert not cb.allow()  # Only one probe at a time
+    cb.record(True)
+    assert cb.state == CLOSED
+    assert cb.open_time == 10
+    assert cb.snapshot()['calls'] == 0
+
+
+def test_failed_probes_double_the_open_time_up_to_the_maximum():
+    cb = breaker()
+    fail(cb, 3)
+    for expected in (20, 35, 35):
+        wait_out(cb)
+        fail(cb, 1)
+        assert cb.state == OPEN
+        assert cb.open_time == expected
+    wait_out(cb)
+    assert cb.allow()
+    cb.record(True)
+    assert cb.open_time == 10  # Reset once closed
+
+
+def test_cancelled_probe_is_released():
+    cb = breaker()
+    fail(cb, 3)
+    wait_out(cb)
+    assert cb.allow()
+    cb.cancel()
+    assert cb.allow()
+
+
+def test_breakers_are_shared_per_quote_currency():
+    breakers = CircuitBreakers(mode='quote')
+    assert breakers.get('binance', 'BTC_USDT') is breakers.get('binance', 'ETH_USDT')
+    assert breakers.get('binance', 'BTC_USDT') is not breakers.get('binance', 'ETH_BTC')
+    assert breakers.get('binance', 'BTC_USDT') is not breakers.get('market_info', 'BTC_USDT')
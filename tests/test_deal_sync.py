@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from deal_store import DealStore, DealSync
+from three_commas_client import ThreeCommasClient
+
+
+@pytest.fixture
+def bot(mock_server):
+    """A disabled bot with 5 open deals an hour apart, the mock server never churns disabled bots"""
+    fleet = mock_server.fleet
+    bot = fleet._add_bot(fleet.accounts[0]['id'], 'Deal sync test', 'BTC_USDT', is_enabled=False)
+    started = time.time() - 5 * 3600
+    for k in range(5):
+        fleet._open_deal(bot, started + k * 3600)
+    fleet.changed(bot['id'])
+    return bot
+
+
+def deal_ids(store, bot_id):
+    return sorted(deal['id'] for deal in store.get_recent_deals(bot_id))
+
+
+def test_sync_bot_backfills_then_advances_the_cursor(mock_server, bot):
+    fleet = mock_server.fleet
+    store = DealStore(':memory:')
+    sync = DealSync(ThreeCommasClient(base_url=mock_server.base_url), store, page_size=2, backfill_pages=1)
+    history = sorted(fleet.bot_deals[bot['id']])
+
+    # First sync: the newest page, then one page of backfill
+    assert asyncio.run(sync.sync_bot(bot['id'])) == 4
+    assert sync.needs_sync(bot['id'])
+    cursor = store.get_cursor(f"bot:{bot['id']}")
+    assert cursor['last_deal_id'] == history[-1]
+    assert cursor['backfill_offset'] == 4
+
+    # Second sync: nothing new, the backfill reaches the oldest deal and completes
+    asyncio.run(sync.sync_bot(bot['id']))
+    assert deal_ids(store, bot['id']) == history
+    assert not sync.needs_sync(bot['id'])
+
+    # A closed deal and a new one are picked up from the newest pages only
+    fleet._close_deal(bot, history[0], time.time())
+    new = fleet._open_deal(bot, time.time() + 1)
+    fleet.changed(bot['id'])
+    requests = sync.requests_made
+    asyncio.run(sync.sync_bot(bot['id']))
+    assert sync.requests_made - requests == 2
+    assert store.get_cursor(f"bot:{bot['id']}")['last_deal_id'] == new['id']
+    assert {deal['id']: deal['status'] for deal in store.get_recent_deals(bot['id'])}[history[0]] == 'completed'
+    assert deal_ids(store, bot['id']) == history + [new['id']]
+
+
+def test_sync_all_starts_at_the_high_water_mark(mock_server, bot):
+    store = DealStore(':memory:')
+    sync = DealSync(ThreeCommasClient(base_url=mock_server.base_url), store, page_size=50)
+
+    # The first call only records where to start
+    assert asyncio.run(sync.sync_all()) == 0
+    assert store.get_cursor('all')['last_updated_at'] is not None
+
+    new = mock_server.fleet._open_deal(bot, time.time() + 1)
+    mock_server.fleet.changed(bot['id'])
+    assert asyncio.run(sync.sync_all()) >= 1
+    assert new['id'] in deal_ids(store, bot['id'])
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from three_commas_client import ThreeCommasClient
+from grid_bot import GridBot
+from grid_params import creation_limits
+from metadata_cache import MetadataCache
+import grid_params
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = MetadataCache(str(tmp_path / 'metadata.bin'))
+    monkeypatch.setattr(grid_params, 'metadata_cache', cache)
+    return cache
+
+
+def test_sync_client_gets_creation_params(mock_server):
+    client = ThreeCommasClient(base_url=mock_server.base_url)
+    limits = creation_limits(client.get_grid_creation_params(1, 'BTC_USDT'))
+    assert limits['min_grids'] == 2
+    assert limits['max_grids'] == 200
+    assert limits['quantity_step'] == 0.0001
+    assert limits['price_step'] > 0
+
+
+def test_grid_bot_applies_limits_with_sync_client(mock_server, cache):
+    client = ThreeCommasClient(base_url=mock_server.base_url)
+    bot = GridBot(client, 1, {'name': 'Test grid', 'pair': 'BTC_USDT', 'lower_price': 60000, 'upper_price': 70000,
+                              'grids_count': 500, 'quantity_per_grid': 0.00001})
+    asyncio.run(bot.apply_exchange_limits())
+    assert bot.config['grids_count'] == 200
+    assert bot.config['quantity_per_grid'] == 0.0001
+    assert cache.get('grid_params', '1:BTC_USDT') is not None
+
+
+def test_unknown_limit_fields_are_reported(capsys):
+    limits = creation_limits({'min_price': '0.01', 'max_price': '1000', 'price_precision': 2,
+                              'quantity_step': '0.001', 'min_quantity': '0.001', 'max_quantity': '100',
+                              'grids_min': 2, 'grids_max': 100})
+    assert limits['price_step'] == 0.01
+    assert limits['min_grids'] is None and limits['max_grids'] is None
+    output = capsys.readouterr().out
+    assert 'min_grids, max_grids' in output
+    assert 'grids_max' in output
+
+
+def test_known_limit_fields_are_not_reported(mock_server, capsys):
+    client = ThreeCommasClient(base_url=mock_server.base_url)
+    creation_limits(client.get_grid_creation_params(1, 'BTC_USDT'))
+    assert 'No known field' not in capsys.readouterr().out
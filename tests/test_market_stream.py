@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from market_stream import MarketStream, stream_symbol
+
+PAIRS = ['BTC_USDT', 'ETH_USDT', 'SOL_USDT']
+
+
+async def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def sources(stream):
+    return {pair: stream.quotes[pair].source for pair in PAIRS if pair in stream.quotes}
+
+
+def test_reconnect_resubscribes_backfills_and_keeps_quotes(stream_server):
+    ws_url, rest_url, state = stream_server
+    state['symbols'] = [stream_symbol(pair) for pair in PAIRS]
+
+    async def run():
+        stream = MarketStream(url=ws_url, rest_url=rest_url)
+        try:
+            await stream.subscribe(PAIRS)
+            await wait_until(lambda: set(sources(stream).values()) == {'stream'} and len(sources(stream)) == len(PAIRS))
+
+            # Drop the connection and keep the server down: the snapshot stays readable meanwhile
+            state['paused'] = True
+            state['refuse'] = True
+            state['drop']()
+            await wait_until(lambda: not stream.connected)
+            before = dict(stream.quotes)
+            await asyncio.sleep(0.2)
+            assert not stream.connected
+            assert all(stream.get(pair) is before[pair] for pair in PAIRS)
+
+            # Back up but not streaming yet: the gap is filled from the REST ticker
+            backfills = state['backfills']
+            state['refuse'] = False
+            await wait_until(lambda: stream.connected)
+            await wait_until(lambda: set(sources(stream).values()) == {'backfill'})
+            assert state['backfills'] > backfills
+            assert stream.get('BTC_USDT').bid == pytest.approx(99.0)
+
+            # Every pair was subscribed again on the new connection and streams again
+            await wait_until(lambda: len(state['subscriptions'][-1]) == len(PAIRS))
+            assert sorted(state['subscriptions'][-1]) == sorted(state['symbols'])
+            state['paused'] = False
+            await wait_until(lambda: set(sources(stream).values()) == {'stream'})
+            assert stream.reconnects >= 1
+        finally:
+            await stream.stop()
+
+    asyncio.run(run())
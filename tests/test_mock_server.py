@@ -0,0 +1,28 @@
+import asyncio
+
+from three_commas_client import ThreeCommasClient
+from async_three_commas_client import AsyncThreeCommasClient
+from config import DCA_BOT_CONFIG
+
+
+def dca_config(pair):
+    return dict(DCA_BOT_CONFIG, name='Test DCA', pair=pair)
+
+
+def test_sync_client_creates_dca_bot(mock_server):
+    client = ThreeCommasClient(base_url=mock_server.base_url)
+    bot = client.create_dca_bot(1, dca_config('ETH_USDT'))
+    assert bot['pairs'] == ['ETH_USDT']
+    assert mock_server.fleet.bots[bot['id']]['account_id'] == 1
+    client.start_bot(bot['id'])
+    assert mock_server.fleet.bots[bot['id']]['is_enabled']
+
+
+def test_async_client_creates_dca_bot(mock_server):
+    async def create():
+        async with AsyncThreeCommasClient(base_url=mock_server.base_url) as client:
+            return await client.create_dca_bot(1, dca_config('BTC_USDT'))
+
+    bot = asyncio.run(create())
+    assert bot['pairs'] == ['BTC_USDT']
+    assert bot['id'] in mock_server.fleet.bots
@@ -0,0 +1,61 @@
+import time
+
+from price_cache import PriceCache
+from three_commas_client import ThreeCommasClient
+
+
+def age(cache, pair, seconds):
+    """Pretend the cached price of a pair was fetched seconds ago"""
+    cache._entries[pair].fetched_at = time.monotonic() - seconds
+
+
+def test_fresh_then_stale_then_expired():
+    cache = PriceCache(ttl=10, stale_ttl=50, max_size=4)
+    cache.put('BTC_USDT', {'last': 1.0}, 'currency_rates')
+    entry, state = cache.get('BTC_USDT')
+    assert state == 'fresh'
+    assert entry.as_rate()['source'] == 'currency_rates'
+
+    age(cache, 'BTC_USDT', 30)
+    assert cache.get('BTC_USDT')[1] == 'stale'
+
+    age(cache, 'BTC_USDT', 61)
+    assert cache.get('BTC_USDT') == (None, None)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_pair_is_evicted():
+    cache = PriceCache(max_size=2)
+    cache.put('BTC_USDT', {'last': 1.0}, 'binance')
+    cache.put('ETH_USDT', {'last': 2.0}, 'binance')
+    cache.get('BTC_USDT')  # ETH_USDT is now the least recently used
+    cache.put('SOL_USDT', {'last': 3.0}, 'binance')
+    assert cache.get('ETH_USDT') == (None, None)
+    assert cache.get('BTC_USDT')[1] == 'fresh'
+    assert cache.get('SOL_USDT')[1] == 'fresh'
+
+
+def test_only_one_refresh_is_claimed_per_pair():
+    cache = PriceCache()
+    assert cache.begin_refresh('BTC_USDT')
+    assert not cache.begin_refresh('BTC_USDT')
+    cache.put('BTC_USDT', {'last': 1.0}, 'binance')  # A stored price releases the claim
+    assert cache.begin_refresh('BTC_USDT')
+    cache.end_refresh('BTC_USDT')
+    assert cache.begin_refresh('BTC_USDT')
+
+
+def test_client_serves_stale_price_while_refreshing(mock_server):
+    client = ThreeCommasClient(base_url=mock_server.base_url)
+    first = client.get_currency_rate('BTC_USDT')
+    assert first['source'] != 'hardcoded'
+
+    age(client.price_cache, 'BTC_USDT', client.price_cache.ttl + 1)
+    stale = client.get_currency_rate('BTC_USDT')
+    assert stale['age'] > client.price_cache.ttl
+
+    # The background refresh stores a fresh price
+    deadline = time.monotonic() + 5
+    while client.price_cache.get('BTC_USDT')[1] != 'fresh':
+        assert time.monotonic() < deadline, "stale price was not refreshed"
+        time.sleep(0.01)
@@ -0,0 +1,40 @@
+import time
+
+from three_commas_client import ThreeCommasClient
+from circuit_breaker import CircuitBreakers
+
+
+def test_sync_client_sends_market_info(mock_server, monkeypatch):
+    breakers = CircuitBreakers(min_requests=1)
+    monkeypatch.setattr('three_commas_client.circuit_breakers', breakers)
+    client = ThreeCommasClient(base_url=mock_server.base_url)
+    sources = dict(client._price_sources())
+    rate, source = client._try_source(('market_info', sources['market_info']), 'BTC_USDT')
+    assert source == 'market_info'
+    assert float(rate['last']) > 0
+    assert breakers.get('market_info', 'BTC_USDT').state == 'closed'
+
+
+def test_sync_and_async_clients_share_the_source_chain():
+    from async_three_commas_client import AsyncThreeCommasClient
+    client = ThreeCommasClient()
+    async_client = AsyncThreeCommasClient()
+    # Async sources are partials of _try_source(name, pair, fetch)
+    assert [name for name, _ in client._price_sources()] == \
+        [source.args[0] for source in async_client._price_sources('BTC_USDT')]
+
+
+def test_hedged_sources_give_up_at_the_deadline(monkeypatch):
+    from mock_server import Fleet, start_mock_server
+    slow = start_mock_server(Fleet(bots=1, grid_bots=0, deals_per_bot=1, seed=1), latency=2.0)
+    monkeypatch.setattr('three_commas_client.circuit_breakers', CircuitBreakers())
+    monkeypatch.setattr('three_commas_client.PRICE_RESOLUTION_DEADLINE', 0.5)
+    monkeypatch.setattr('three_commas_client.PRICE_HEDGE_DELAY', 0.05)
+    monkeypatch.setattr('price_graph.BINANCE_API_URL', slow.base_url)
+    client = ThreeCommasClient(base_url=slow.base_url)
+
+    started = time.monotonic()
+    assert client._resolve_hedged('BTC_USDT') is None
+    # Every source, losers included, has freed its worker by the deadline instead of after the 2s response
+    client._price_executor.shutdown(wait=True)
+    assert time.monotonic() - started < 1.5
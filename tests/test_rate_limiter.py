@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import RateLimiter, RetryBudget
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter(limits={'3commas': (10, 10)}, weights={})
+
+
+def test_retry_after_pauses_every_request(limiter):
+    limiter.update('3commas', 429, {'Retry-After': '2'})
+    wait = limiter.buckets['3commas'].reserve()
+    assert 1.9 < wait <= 2
+    assert limiter.stats()['3commas']['throttled'] == 1
+
+
+def test_429_without_retry_after_backs_off(limiter):
+    limiter.update('3commas', 429)
+    assert 0 <= limiter.buckets['3commas'].reserve() <= 1
+
+
+def test_remaining_header_caps_the_bucket(limiter):
+    limiter.update('3commas', 200, {'X-RateLimit-Remaining': '0'})
+    # No tokens left: the next request waits for one to be added at 10 per second
+    assert limiter.buckets['3commas'].reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_only_retryable_statuses_are_retried(limiter):
+    assert limiter.should_retry('3commas', 429, 0, 3)
+    assert limiter.should_retry('3commas', 503, 0, 3)
+    assert limiter.should_retry('3commas', None, 0, 3)  # Connection errors
+    assert not limiter.should_retry('3commas', 400, 0, 3)
+    assert not limiter.should_retry('3commas', 429, 3, 3)
+
+
+def test_retry_budget_is_exhausted_and_refilled_by_requests():
+    budget = RetryBudget(ratio=0.5, minimum=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_denied_retries_are_counted(limiter):
+    limiter.budgets['3commas'] = RetryBudget(minimum=1)
+    assert limiter.should_retry('3commas', 429, 0, 3)
+    assert not limiter.should_retry('3commas', 429, 1, 3)
+    stats = limiter.stats()['3commas']
+    assert (stats['retries'], stats['retries_denied']) == (1, 1)
+
+
+def test_cancelled_waiters_leave_the_queue(limiter):
+    limiter.update('3commas', 429, {'Retry-After': '5'})
+
+    async def run():
+        waiter = asyncio.create_task(limiter.acquire_async('3commas'))
+        await asyncio.sleep(0.05)
+        assert limiter.stats()['3commas']['queue_depth'] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(run())
+    assert limiter.stats()['3commas']['queue_depth'] == 0
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import singleflight
+from singleflight import SingleFlight, coalesced
+
+
+class Source:
+    """Blocking client whose fetch() waits until release is set, counting the calls that ran"""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.calls = 0
+        self.error = error
+
+    @coalesced()
+    def fetch(self, pair):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {'pair': pair, 'levels': [1, 2, 3]}
+
+
+class AsyncSource:
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+
+    @coalesced('fetch')
+    async def fetch(self, pair):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.error:
+            raise self.error
+        return {'pair': pair}
+
+
+@pytest.fixture(autouse=True)
+def flight(monkeypatch):
+    flight = SingleFlight({'fetch': ('pair',)})
+    monkeypatch.setattr(singleflight, 'singleflight', flight)
+    return flight
+
+
+def call_concurrently(calls, release, flight):
+    """Run the calls in threads and release() them once all are in flight, returns their results or exceptions"""
+    results = [None] * len(calls)
+
+    def run(i, call):
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    while flight.calls < len(calls):
+        time.sleep(0.01)
+    release()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_share_one_result(flight):
+    source = Source()
+    results = call_concurrently([lambda: source.fetch('BTC_USDT')] * 4, source.release.set, flight)
+    assert source.calls == 1
+    assert flight.shared == 3
+    assert all(result == {'pair': 'BTC_USDT', 'levels': [1, 2, 3]} for result in results)
+    # Every caller gets its own copy
+    results[0]['levels'].append(4)
+    assert results[1]['levels'] == [1, 2, 3]
+
+
+def test_concurrent_callers_share_one_exception(flight):
+    source = Source(error=Exception('boom'))
+    results = call_concurrently([lambda: source.fetch('BTC_USDT')] * 3, source.release.set, flight)
+    assert source.calls == 1
+    assert all(isinstance(result, Exception) and str(result) == 'boom' for result in results)
+
+
+def test_clients_and_arguments_do_not_share(flight):
+    first, second = Source(), Source()
+    calls = [lambda: first.fetch('BTC_USDT'), lambda: second.fetch('BTC_USDT'), lambda: first.fetch('ETH_USDT')]
+    call_concurrently(calls, lambda: (first.release.set(), second.release.set()), flight)
+    assert (first.calls, second.calls) == (2, 1)
+    assert flight.shared == 0
+
+
+def test_async_callers_share_per_client(flight):
+    first, second = AsyncSource(), AsyncSource()
+
+    async def run():
+        return await asyncio.gather(*[first.fetch('BTC_USDT') for _ in range(3)], second.fetch('BTC_USDT'))
+
+    results = asyncio.run(run())
+    assert (first.calls, second.calls) == (1, 1)
+    assert results == [{'pair': 'BTC_USDT'}] * 4
+
+
+def test_async_callers_share_one_exception(flight):
+    source = AsyncSource(error=Exception('boom'))
+
+    async def run():
+        return await asyncio.gather(*[source.fetch('BTC_USDT') for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert source.calls == 1
+    assert all(str(result) == 'boom' for result in results)
+
+
+def test_methods_without_a_key_are_not_coalesced(flight):
+    flight.keys['fetch'] = None
+    source = Source()
+    source.release.set()
+    source.fetch('BTC_USDT')
+    assert flight.calls == 0
@@ -1,29 +1,155 @@
 import hashlib
 import hmac
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from urllib.parse import urlencode
 import requests
+import py3cw.request
+from py3cw.config import API_METHODS
 from py3cw.request import Py3CW
 
-from config import API_URL, API_KEY, API_SECRET
+from config import (API_BASE_URL, API_KEY, API_SECRET, PRICE_RESOLUTION_MODE, PRICE_HEDGE_DELAY, PRICE_RESOLUTION_DEADLINE,
+                    RETRY_MAX_ATTEMPTS, BINANCE_TIMEOUT)
+from price_cache import PriceCache
+from price_graph import PriceGraph
+from dca_ladder import validate_ladder
+from pair_catalog import split_pair, alternate_format
+from pagination import paginate, updated_since
+from rate_limiter import rate_limiter, backoff_delay
+from metrics import metrics
+from circuit_breaker import circuit_breakers
+from singleflight import coalesced
+from cassette import cassette_from_config
+
+# Endpoints missing from py3cw's method table, registered so they use the same signed request path
+EXTRA_API_METHODS = {
+    ('accounts', 'market_info'): ('GET', 'market_info'),
+    ('grid_bots', 'manual_creation_params'): ('GET', 'manual_creation_params'),
+}
+for (entity, action), api in EXTRA_API_METHODS.items():
+    API_METHODS.setdefault(entity, {}).setdefault(action, api)
+
+
+def fallback_rate(pair):
+    """Hardcoded approximate rate for a pair, used when every price source has failed"""
+    if pair in ['BTC_USDT', 'BTCUSDT']:
+        print("Using hardcoded price for BTC")
+        return {'last': 66000}  # Updated to more recent BTC price
+    elif pair in ['ETH_USDT', 'ETHUSDT']:
+        print("Using hardcoded price for ETH")
+        return {'last': 3500}  # Updated to more recent ETH price
+    elif pair in ['BTC_ETH', 'BTCETH']:
+        print("Using hardcoded price for BTC/ETH")
+        # Approx ratio of BTC/ETH 
+        return {'last': 18.85}  # Updated to more accurate BTC/ETH ratio
+    elif '_' in pair:
+        # Try to derive a price for any pair
+        base, quote = pair.split('_')
+        if base == 'BTC' and quote != 'USDT':
+            print(f"Using hardcoded price for BTC/{quote}")
+            return {'last': 15}  # A reasonable default for most BTC pairs
+        elif base == 'ETH' and quote != 'USDT':
+            print(f"Using hardcoded price for ETH/{quote}")
+            return {'last': 1.5}  # A reasonable default for most ETH pairs
+
+    print(f"Failed to get current price for {pair} after trying all methods")
+    return {'last': 100}  # Last resort fallback
+
 
 class ThreeCommasClient:
-    def __init__(self):
+    def __init__(self, base_url=None):
+        """
+        Initialize the blocking 3Commas client
+
+        Args:
+            base_url: 3Commas API base URL (defaults to API_BASE_URL from config)
+        """
+        self.base_url = (base_url or API_BASE_URL).rstrip('/')
         # Using py3cw library for API calls
         self.client = Py3CW(
             key=API_KEY,
             secret=API_SECRET,
             request_options={
                 'request_timeout': 30,
-                'nr_of_retries': 3,
+                'nr_of_retries': 0,  # Retries are handled by _request with jittered backoff
                 'retry_status_codes': [500, 502, 503, 504]
             }
         )
+        self._route_to_base_url()
+        self.client.session.hooks['response'].append(
+            lambda response, *args, **kwargs: rate_limiter.update('3commas', response.status_code, response.headers)
+        )
+        self.price_cache = PriceCache()
+        self.price_graph = PriceGraph()
+        self._price_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='price')
+        self._hedge = threading.local()  # deadline: monotonic deadline of the hedged price lookup running in this thread
+        self._page_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='page')
+        # Record or replay every request when CASSETTE_MODE is set
+        self.cassette = cassette_from_config(self)
         
+    def _call_timeout(self, default):
+        """Timeout for a request: default, or what is left of the hedged lookup's deadline in this thread"""
+        deadline = getattr(self._hedge, 'deadline', None)
+        if deadline is None:
+            return default
+        return max(0.001, min(default, deadline - time.monotonic()))
+
+    def _route_to_base_url(self):
+        """Send this client's py3cw requests to base_url, py3cw itself only has a process-wide API_URL"""
+        session = self.client.session
+        send = session.request
+
+        def request(method, url, *args, **kwargs):
+            default_url = py3cw.request.API_URL
+            if url.startswith(default_url) and default_url != self.base_url:
+                url = self.base_url + url[len(default_url):]
+            if getattr(self._hedge, 'deadline', None) is not None:
+                timeout = self._call_timeout(self.client.request_timeout)
+                kwargs['timeout'] = (timeout, timeout)
+            return send(method, url, *args, **kwargs)
+
+        session.request = request
+
+    def _request(self, entity, action='', action_id=None, payload=None):
+        """
+        Make a 3Commas request through the shared rate limiter
+
+        Requests wait for a token instead of failing, and 429 / 5xx / connection
+        errors are retried with full-jitter backoff within the shared retry budget.
+        """
+        kwargs = {'entity': entity, 'action': action}
+        if action_id is not None:
+            kwargs['action_id'] = action_id
+        if payload is not None:
+            kwargs['payload'] = payload
+
+        endpoint = f"{entity}/{action}" if action else entity
+        attempt = 0
+        while True:
+            rate_limiter.acquire('3commas', endpoint)
+            start = time.perf_counter()
+            error, data = self.client.request(**kwargs)
+            metrics.observe('threecommas_request_duration_seconds', time.perf_counter() - start, (endpoint,))
+            if not error:
+                metrics.inc('threecommas_requests_total', (endpoint, 'ok'))
+                return error, data
+            status_code = error.get('status_code') if isinstance(error, dict) else None
+            metrics.inc('threecommas_requests_total', (endpoint, str(status_code or 'error')))
+            # Hedged price lookups are not retried, their deadline is too short and another source is racing
+            hedged = getattr(self._hedge, 'deadline', None) is not None
+            if hedged or not rate_limiter.should_retry('3commas', status_code, attempt, RETRY_MAX_ATTEMPTS):
+                metrics.inc('threecommas_errors_total', (endpoint, str(status_code or 'error')))
+                return error, data
+            metrics.inc('threecommas_retries_total', (endpoint,))
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+    
+    @coalesced()
     def get_accounts(self):
         """Get all accounts (exchanges) connected to 3Commas"""
-        error, accounts = self.client.request(
+        error, accounts = self._request(
             entity='accounts',
             action=''
         )
@@ -31,9 +157,10 @@ class ThreeCommasClient:
             raise Exception(f"Error getting accounts: {error}")
         return accounts
     
+    @coalesced()
     def get_market_pairs(self, market_code):
         """Get all available pairs for a specific market"""
-        error, pairs = self.client.request(
+        error, pairs = self._request(
             entity='accounts',
             action='market_pairs',
             payload={
@@ -44,9 +171,10 @@ class ThreeCommasClient:
             raise Exception(f"Error getting market pairs: {error}")
         return pairs
     
+    @coalesced()
     def get_available_pairs(self, market_code):
         """Get all available pairs for a specific market"""
-        error, pairs = self.client.request(
+        error, pairs = self._request(
             entity='accounts',
             action='market_pairs',
             payload={
@@ -57,165 +185,201 @@ class ThreeCommasClient:
             raise Exception(f"Error getting market pairs for {market_code}: {error}")
         return pairs
     
-    def get_currency_rate(self, pair):
-        """Get current rate for a currency pair"""
+    def get_currency_rate(self, pair, max_age=None):
+        """
+        Get current rate for a currency pair
+
+        Rates are served from the price cache while fresh. Stale rates are served
+        while a background refresh runs, unless they are older than max_age.
+        The returned dict carries the 'source' that produced the rate and its 'age'.
+        """
+        entry, state = self.price_cache.get(pair)
+        if entry is not None and (max_age is None or entry.age <= max_age):
+            metrics.inc('price_cache_hits_total', (state,))
+            if state == 'stale' and self.price_cache.begin_refresh(pair):
+                threading.Thread(target=self._refresh_currency_rate, args=(pair,), daemon=True).start()
+            return entry.as_rate()
+
+        rate, source = self._fetch_currency_rate(pair)
+        if source == 'hardcoded':
+            # Never cache hardcoded fallbacks, the next call should try the real sources again
+            return dict(rate, source=source, age=0.0)
+        return self.price_cache.put(pair, rate, source).as_rate()
+
+    def _refresh_currency_rate(self, pair):
+        """Background refresh of a stale cached rate"""
+        try:
+            rate, source = self._fetch_currency_rate(pair)
+        except Exception as e:
+            print(f"Background price refresh failed for {pair}: {str(e)}")
+            self.price_cache.end_refresh(pair)
+            return
+        if source == 'hardcoded':
+            self.price_cache.end_refresh(pair)
+        else:
+            self.price_cache.put(pair, rate, source)
+
+    @coalesced('get_currency_rate')
+    def _fetch_currency_rate(self, pair):
+        """Fetch the rate for a pair from the network, returns (rate, source)"""
         print(f"Attempting to get rate for pair: {pair}")
-        
-        # First try using the currency_rates endpoint
-        error, rate = self.client.request(
+
+        if PRICE_RESOLUTION_MODE == 'hedged':
+            result = self._resolve_hedged(pair)
+        else:
+            result = self._resolve_sequential(pair)
+        if result:
+            metrics.inc('price_source_hits_total', (result[1],))
+            return result
+
+        # If all else fails, use hardcoded prices for common pairs
+        metrics.inc('price_source_hits_total', ('hardcoded',))
+        return fallback_rate(pair), 'hardcoded'
+
+    def _price_sources(self):
+        """(name, source) price sources in priority order"""
+        return [
+            ('currency_rates', self._rate_from_currency_rates),
+            ('market_info', self._rate_from_market_info),
+            ('currency_rates_alt', self._rate_from_alt_format),
+            ('binance', self._rate_from_binance),
+        ]
+
+    def _try_source(self, source, pair, deadline=None):
+        """
+        Run a single price source through its circuit breaker, returns (rate, source) or None
+
+        Sources whose breaker is open return None at once, so the next one is tried without waiting.
+        With a deadline (monotonic time) the source's requests time out by then and are not retried.
+        """
+        name, fetch = source
+        breaker = circuit_breakers.get(name, pair)
+        if not breaker.allow():
+            print(f"⏭️ Skipping {name} for {pair} (circuit {breaker.state.replace('_', '-')})")
+            return None
+        self._hedge.deadline = deadline
+        try:
+            result = fetch(pair)
+        except Exception as e:
+            print(f"Price source {name} failed for {pair}: {str(e)}")
+            result = None
+        finally:
+            self._hedge.deadline = None
+        breaker.record(bool(result))
+        return result
+
+    def _resolve_sequential(self, pair):
+        """Try each price source one after another"""
+        for source in self._price_sources():
+            result = self._try_source(source, pair)
+            if result:
+                return result
+        return None
+
+    def _resolve_hedged(self, pair):
+        """
+        Race the price sources against a hard deadline
+
+        The primary source is launched first, the fallbacks after PRICE_HEDGE_DELAY
+        (or as soon as the primary fails). The first valid rate wins, preferring the
+        highest priority source when several finish together, and the rest are cancelled.
+        Every source gets the deadline as its request timeout and is not retried, so
+        sources that lose the race free their worker by the deadline at the latest.
+        """
+        deadline = time.monotonic() + PRICE_RESOLUTION_DEADLINE
+        sources = self._price_sources()
+        primary = self._price_executor.submit(self._try_source, sources[0], pair, deadline)
+        futures = {primary: 0}
+
+        done, _ = wait([primary], timeout=PRICE_HEDGE_DELAY)
+        if done and primary.result():
+            return primary.result()
+
+        for priority, source in enumerate(sources[1:], start=1):
+            futures[self._price_executor.submit(self._try_source, source, pair, deadline)] = priority
+
+        pending = set(futures)
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"⏱️ Price resolution deadline of {PRICE_RESOLUTION_DEADLINE}s reached for {pair}")
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                valid = sorted((futures[f], f.result()) for f in done if f.result())
+                if valid:
+                    return valid[0][1]
+            return None
+        finally:
+            # Sources already running cannot be interrupted, their requests time out at the deadline
+            for future in pending:
+                future.cancel()
+
+    def _rate_from_currency_rates(self, pair):
+        """Rate from the currency_rates endpoint"""
+        error, rate = self._request(
             entity='accounts',
             action='currency_rates',
             payload={
                 'pair': pair
             }
         )
-        
+
         if not error and rate and 'last' in rate:
             print(f"✅ Got rate from currency_rates: {rate['last']}")
-            return rate
-        else:
-            print(f"Could not get rate from currency_rates: {error}")
-            
-        # If that fails, try getting market info
-        try:
-            print("Trying market_info endpoint...")
-            error, market_info = self.client.request(
-                entity='accounts',
-                action='market_info',
-                payload={
-                    'pair': pair
-                }
-            )
-            
-            if not error and market_info and 'last' in market_info:
-                print(f"✅ Got rate from market_info: {market_info['last']}")
-                return market_info
-            else:
-                print(f"Could not get rate from market_info: {error}")
-                
-            # Try different pair format (with and without underscore)
-            alt_pair = pair.replace('_', '') if '_' in pair else f"{pair[:3]}_{pair[3:]}"
-            print(f"Trying alternative pair format: {alt_pair}")
-            
-            error, alt_rate = self.client.request(
-                entity='accounts',
-                action='currency_rates',
-                payload={
-                    'pair': alt_pair
-                }
-            )
-            
-            if not error and alt_rate and 'last' in alt_rate:
-                print(f"✅ Got rate using alternative format: {alt_rate['last']}")
-                return alt_rate            # As a last resort, try to get the ticker directly from Binance API
-            print("Trying direct Binance API...")
-            import requests
-            
-            # For BTC_ETH specifically, we need to calculate from BTC/USDT and ETH/USDT
-            if pair in ['BTC_ETH', 'BTCETH']:
-                try:
-                    print("Calculating BTC_ETH price from BTC/USDT and ETH/USDT...")
-                    # Make sure to use a proper User-Agent header to avoid being blocked
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                    }
-                    
-                    # Get BTC/USDT price
-                    btc_response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT", headers=headers)
-                    print(f"BTC/USDT response: {btc_response.status_code}")
-                    
-                    # Get ETH/USDT price
-                    eth_response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=ETHUSDT", headers=headers)
-                    print(f"ETH/USDT response: {eth_response.status_code}")
-                    
-                    if btc_response.status_code == 200 and eth_response.status_code == 200:
-                        btc_data = btc_response.json()
-                        eth_data = eth_response.json()
-                        
-                        print(f"BTC data: {btc_data}")
-                        print(f"ETH data: {eth_data}")
-                        
-                        if 'price' in btc_data and 'price' in eth_data:
-                            btc_price = float(btc_data['price'])
-                            eth_price = float(eth_data['price'])
-                            derived_price = btc_price / eth_price
-                            print(f"✅ Calculated BTC_ETH price: {derived_price} (BTC/USDT: {btc_price}, ETH/USDT: {eth_price})")
-                            return {'last': derived_price}
-                        else:
-                            print(f"Missing price field in response: BTC has 'price': {'price' in btc_data}, ETH has 'price': {'price' in eth_data}")
-                    else:
-                        print(f"Failed to get data: BTC status: {btc_response.status_code}, ETH status: {eth_response.status_code}")
-                except Exception as e:
-                    print(f"Error calculating BTC_ETH price: {str(e)}")
-                    # If there's an error with the API, use a hardcoded value
-                    print("Using hardcoded value for BTC/ETH ratio")
-                    return {'last': 15.5}  # Approximate BTC/ETH value
-            
-            # Try both with and without underscore for other pairs
-            symbols_to_try = [
-                pair.replace('_', ''),  # BTCETH
-                pair.replace('_', '') + 'USDT',  # BTCETHUSDT
-                pair.split('_')[0] + 'USDT' if '_' in pair else pair + 'USDT',  # BTCUSDT (if pair is BTC_ETH)
-                pair.split('_')[1] + 'USDT' if '_' in pair else pair  # ETHUSDT (if pair is BTC_ETH)
-            ]
-            
-            price_data = {}
-            
-            for symbol in symbols_to_try:
-                try:
-                    print(f"Trying Binance symbol: {symbol}")
-                    response = requests.get(f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}")
-                    if response.status_code == 200:
-                        data = response.json()
-                        if 'price' in data:
-                            price = float(data['price'])
-                            print(f"✅ Got price from Binance API for {symbol}: {price}")
-                            price_data[symbol] = price
-                except Exception as e:
-                    print(f"Error with Binance API for {symbol}: {str(e)}")
-            
-            # If we got prices for both the base and quote currencies in USDT, calculate the pair rate
-            if '_' in pair:
-                base, quote = pair.split('_')
-                base_usdt = f"{base}USDT"
-                quote_usdt = f"{quote}USDT"
-                
-                if base_usdt in price_data and quote_usdt in price_data:
-                    # Calculate the rate: base/quote = (base/USDT) / (quote/USDT)
-                    derived_price = price_data[base_usdt] / price_data[quote_usdt]
-                    print(f"✅ Derived price for {pair} from {base_usdt} and {quote_usdt}: {derived_price}")
-                    return {'last': derived_price}
-            
-            # If we have a direct price, return it
-            symbol_direct = pair.replace('_', '')
-            if symbol_direct in price_data:
-                return {'last': price_data[symbol_direct]}            # If all else fails, use hardcoded prices for common pairs
-            if pair in ['BTC_USDT', 'BTCUSDT']:
-                print("Using hardcoded price for BTC")
-                return {'last': 66000}  # Updated to more recent BTC price
-            elif pair in ['ETH_USDT', 'ETHUSDT']:
-                print("Using hardcoded price for ETH")
-                return {'last': 3500}  # Updated to more recent ETH price
-            elif pair in ['BTC_ETH', 'BTCETH']:
-                print("Using hardcoded price for BTC/ETH")
-                # Approx ratio of BTC/ETH 
-                return {'last': 18.85}  # Updated to more accurate BTC/ETH ratio
-            elif '_' in pair:
-                # Try to derive a price for any pair
-                base, quote = pair.split('_')
-                if base == 'BTC' and quote != 'USDT':
-                    print(f"Using hardcoded price for BTC/{quote}")
-                    return {'last': 15}  # A reasonable default for most BTC pairs
-                elif base == 'ETH' and quote != 'USDT':
-                    print(f"Using hardcoded price for ETH/{quote}")
-                    return {'last': 1.5}  # A reasonable default for most ETH pairs
-                
-            print(f"Failed to get current price for {pair} after trying all methods")
-            return {'last': 100}  # Last resort fallback
-        except Exception as e:
-            print(f"All methods failed: {str(e)}")
-            raise Exception(f"Failed to get current price for {pair}: {str(e)}")
-    
+            return rate, 'currency_rates'
+        print(f"Could not get rate from currency_rates: {error}")
+        return None
+
+    def _rate_from_market_info(self, pair):
+        """Rate from the market_info endpoint"""
+        print("Trying market_info endpoint...")
+        error, market_info = self._request(
+            entity='accounts',
+            action='market_info',
+            payload={
+                'pair': pair
+            }
+        )
+
+        if not error and market_info and 'last' in market_info:
+            print(f"✅ Got rate from market_info: {market_info['last']}")
+            return market_info, 'market_info'
+        print(f"Could not get rate from market_info: {error}")
+        return None
+
+    def _rate_from_alt_format(self, pair):
+        """Rate from currency_rates using the pair with and without underscore"""
+        alt_pair = alternate_format(pair)
+        print(f"Trying alternative pair format: {alt_pair}")
+
+        error, alt_rate = self._request(
+            entity='accounts',
+            action='currency_rates',
+            payload={
+                'pair': alt_pair
+            }
+        )
+
+        if not error and alt_rate and 'last' in alt_rate:
+            print(f"✅ Got rate using alternative format: {alt_rate['last']}")
+            return alt_rate, 'currency_rates_alt'
+        print(f"Could not get rate using alternative format: {error}")
+        return None
+
+    def _rate_from_binance(self, pair):
+        """Rate from the bulk Binance ticker snapshot, directly or through a hub currency"""
+        print("Trying Binance ticker snapshot...")
+        base, quote = split_pair(pair)
+        route = self.price_graph.get_rate(base, quote, timeout=self._call_timeout(BINANCE_TIMEOUT))
+        if not route:
+            print(f"No Binance market route found for {pair}")
+            return None
+
+        price, path = route
+        print(f"✅ Got price from Binance for {pair} via {' -> '.join(path)}: {price}")
+        return {'last': price}, 'binance' if len(path) == 1 else 'binance_derived'
+
     def create_grid_bot(self, account_id, config):
         """Create a Grid Bot with the specified configuration"""
         # Validate required parameters
@@ -239,9 +403,9 @@ class ThreeCommasClient:
         print(f"📡 Sending request to create grid bot with params: {payload}")
         
         try:
-            error, bot = self.client.request(
+            error, bot = self._request(
                 entity='grid_bots',
-                action='create',
+                action='manual',
                 payload=payload
             )
             
@@ -258,21 +422,20 @@ class ThreeCommasClient:
             return bot
         except Exception as e:
             print(f"❌ Exception during grid bot creation: {str(e)}")
-            # Try to get more detailed error information
-            try:
-                # Check if we can get grid bot parameters
-                error, params = self.client.request(
-                    entity='grid_bots',
-                    action='manual_creation_params',
-                    payload={'account_id': account_id, 'pair': config['pair']}
-                )
-                if not error and params:
-                    print(f"ℹ️ Valid grid bot parameters for {config['pair']}: {params}")
-            except Exception as param_error:
-                print(f"Could not get valid parameters: {str(param_error)}")
-                
             raise Exception(f"Failed to create grid bot: {str(e)}")
     
+    @coalesced()
+    def get_grid_creation_params(self, account_id, pair):
+        """Get the exchange limits (prices, steps, grid count) for a manual grid bot on a pair"""
+        error, params = self._request(
+            entity='grid_bots',
+            action='manual_creation_params',
+            payload={'account_id': account_id, 'pair': pair}
+        )
+        if error:
+            raise Exception(f"Error getting grid bot parameters: {error}")
+        return params
+    
     def create_dca_bot(self, account_id, config):
         """Create a DCA Bot with the specified configuration"""
         # Validate required parameters
@@ -281,6 +444,11 @@ class ThreeCommasClient:
         for param in required_params:
             if param not in config or config[param] is None:
                 raise Exception(f"Missing required parameter for DCA bot: {param}")
+        
+        # Reject ladders the API would refuse without a round-trip
+        problems = validate_ladder(config)
+        if problems:
+            raise Exception(f"Invalid DCA bot configuration: {'; '.join(problems)}")
                 
         payload = {
             'account_id': account_id,
@@ -301,7 +469,7 @@ class ThreeCommasClient:
         print(f"📡 Sending request to create DCA bot with params: {payload}")
         
         try:
-            error, bot = self.client.request(
+            error, bot = self._request(
                 entity='bots',
                 action='create_bot',
                 payload=payload
@@ -320,25 +488,11 @@ class ThreeCommasClient:
             return bot
         except Exception as e:
             print(f"❌ Exception during DCA bot creation: {str(e)}")
-            # Try to get more detailed error information
-            try:
-                # Check if we can get valid pairs for this account
-                error, pairs = self.client.request(
-                    entity='accounts',
-                    action='market_pairs',
-                    payload={'market_code': 'binance'}
-                )
-                if not error and pairs and config['pair'] not in pairs:
-                    print(f"⚠️ The pair {config['pair']} may not be available on this account/exchange.")
-                    print(f"ℹ️ Consider using one of these pairs: {pairs[:5]}...")
-            except Exception as pair_error:
-                print(f"Could not verify pair availability: {str(pair_error)}")
-                
             raise Exception(f"Failed to create DCA bot: {str(e)}")
     
     def start_bot(self, bot_id):
         """Start a bot by ID"""
-        error, response = self.client.request(
+        error, response = self._request(
             entity='bots',
             action='enable',
             action_id=str(bot_id)
@@ -349,7 +503,7 @@ class ThreeCommasClient:
     
     def stop_bot(self, bot_id):
         """Stop a bot by ID"""
-        error, response = self.client.request(
+        error, response = self._request(
             entity='bots',
             action='disable',
             action_id=str(bot_id)
@@ -358,23 +512,76 @@ class ThreeCommasClient:
             raise Exception(f"Error stopping bot: {error}")
         return response
     
-    def get_bot_deals(self, bot_id):
-        """Get deals for a specific bot"""
-        error, deals = self.client.request(
-            entity='bots',
-            action='deals',
-            payload={
-                'bot_id': bot_id,
-                'limit': 50
-            }
+    def start_grid_bot(self, bot_id):
+        """Start a grid bot by ID"""
+        error, response = self._request(
+            entity='grid_bots',
+            action='enable',
+            action_id=str(bot_id)
+        )
+        if error:
+            raise Exception(f"Error starting grid bot: {error}")
+        return response
+    
+    def stop_grid_bot(self, bot_id):
+        """Stop a grid bot by ID"""
+        error, response = self._request(
+            entity='grid_bots',
+            action='disable',
+            action_id=str(bot_id)
+        )
+        if error:
+            raise Exception(f"Error stopping grid bot: {error}")
+        return response
+    
+    @coalesced()
+    def get_bot_deals(self, bot_id, limit=50, offset=0, order=None, order_direction=None):
+        """
+        Get deals for a specific bot
+        
+        Args:
+            bot_id: Bot ID, or None for deals of every bot
+            limit: Maximum number of deals to return
+            offset: Number of deals to skip, for paging
+            order: Sort field (e.g. 'created_at', 'updated_at', 'closed_at')
+            order_direction: 'asc' or 'desc'
+        """
+        payload = {
+            'limit': limit
+        }
+        if bot_id is not None:
+            payload['bot_id'] = bot_id
+        if offset:
+            payload['offset'] = offset
+        if order:
+            payload['order'] = order
+        if order_direction:
+            payload['order_direction'] = order_direction
+        error, deals = self._request(
+            entity='deals',
+            action='',
+            payload=payload
         )
         if error:
             raise Exception(f"Error getting bot deals: {error}")
         return deals
     
+    @coalesced()
+    def get_account_balances(self, account_id):
+        """Get the balance table of an account (one row per currency)"""
+        error, rows = self._request(
+            entity='accounts',
+            action='account_table_data',
+            action_id=str(account_id)
+        )
+        if error:
+            raise Exception(f"Error getting account balances: {error}")
+        return rows
+    
+    @coalesced()
     def get_market_info(self, pair):
         """Get market information for a pair"""
-        error, info = self.client.request(
+        error, info = self._request(
             entity='accounts',
             action='market_info',
             payload={
@@ -385,16 +592,88 @@ class ThreeCommasClient:
             raise Exception(f"Error getting market info: {error}")
         return info
         
-    def get_active_bots(self):
-        """Get all active bots"""
-        error, bots = self.client.request(
+    @coalesced()
+    def get_bots(self, scope=None, limit=100, offset=0):
+        """
+        Get one page of bots
+        
+        Args:
+            scope: 'enabled', 'disabled', or None for all bots
+            limit: Maximum number of bots to return
+            offset: Number of bots to skip, for paging
+        """
+        payload = {
+            'limit': limit
+        }
+        if scope:
+            payload['scope'] = scope
+        if offset:
+            payload['offset'] = offset
+        error, bots = self._request(
             entity='bots',
             action='',
-            payload={
-                'limit': 100,
-                'scope': 'enabled'
-            }
+            payload=payload
         )
         if error:
-            raise Exception(f"Error getting active bots: {error}")
+            raise Exception(f"Error getting bots: {error}")
         return bots
+    
+    @coalesced()
+    def get_grid_bots(self, limit=100, offset=0):
+        """
+        Get one page of grid bots
+        
+        Args:
+            limit: Maximum number of grid bots to return
+            offset: Number of grid bots to skip, for paging
+        """
+        payload = {
+            'limit': limit
+        }
+        if offset:
+            payload['offset'] = offset
+        error, bots = self._request(
+            entity='grid_bots',
+            action='',
+            payload=payload
+        )
+        if error:
+            raise Exception(f"Error getting grid bots: {error}")
+        return bots
+    
+    def iter_bots(self, scope=None, page_size=100):
+        """Lazily iterate over all bots in a scope, prefetching the next page"""
+        return paginate(lambda offset: self.get_bots(scope, page_size, offset), page_size, self._page_executor)
+    
+    def iter_grid_bots(self, page_size=100):
+        """Lazily iterate over all grid bots, prefetching the next page"""
+        return paginate(lambda offset: self.get_grid_bots(page_size, offset), page_size, self._page_executor)
+    
+    def iter_deals(self, bot_id, since=None, page_size=50):
+        """
+        Lazily iterate over a bot's deals, most recently updated first
+        
+        Args:
+            bot_id: Bot ID
+            since: Only deals updated at or after this ISO 8601 timestamp
+            page_size: Deals per request
+        """
+        pages = paginate(
+            lambda offset: self.get_bot_deals(bot_id, page_size, offset, order='updated_at', order_direction='desc'),
+            page_size,
+            self._page_executor
+        )
+        try:
+            for deal in pages:
+                if not updated_since(deal, since):
+                    break
+                yield deal
+        finally:
+            pages.close()
+    
+    def get_active_bots(self):
+        """Get all active bots"""
+        try:
+            return list(self.iter_bots(scope='enabled'))
+        except Exception as e:
+            raise Exception(f"Error getting active bots: {e}")